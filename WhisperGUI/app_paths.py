@@ -0,0 +1,25 @@
+# app_paths.py
+# Where the application keeps its caches and settings on disk.
+
+import os
+
+
+def _base_dir(env_var, fallback):
+    """Resolves an XDG-style base directory, using LOCALAPPDATA on Windows."""
+    if os.name == "nt" and os.getenv("LOCALAPPDATA"):
+        return os.getenv("LOCALAPPDATA")
+    return os.getenv(env_var) or os.path.join(os.path.expanduser("~"), fallback)
+
+
+def get_cache_dir(*parts):
+    """Returns (and creates) a directory under the user's cache dir, e.g. ~/.cache/whisper_gui/transcripts."""
+    path = os.path.join(_base_dir("XDG_CACHE_HOME", ".cache"), "whisper_gui", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_config_dir(*parts):
+    """Returns (and creates) a directory under the user's config dir, e.g. ~/.config/whisper_gui."""
+    path = os.path.join(_base_dir("XDG_CONFIG_HOME", ".config"), "whisper_gui", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,182 @@
+# audio_cache.py
+# Single-pass ffmpeg decoding into a persistent, memory-mapped cache.
+#
+# Each input is decoded once: ffmpeg drops every stream except the first audio
+# track and streams 16 kHz mono float32 samples straight into a .npy file, in
+# fixed-size blocks, so even multi-GB videos never sit in RAM. Later runs (a
+# different model, a retry after a failure) memory-map the cached samples and
+# skip ffmpeg entirely.
+
+import os
+import struct
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+
+from app_paths import get_cache_dir
+from transcript_cache import hash_file
+
+SAMPLE_RATE = 16000
+# Default size cap for the decoded-audio cache (about 21 hours of audio)
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+# How much ffmpeg output is copied to disk at a time
+READ_BLOCK_SIZE = 1024 ** 2
+# A version 1.0 .npy header padded to a fixed size, so it can be written after
+# the sample count is known without moving the data
+NPY_HEADER_SIZE = 128
+
+_decode_locks = {}
+_decode_locks_lock = threading.Lock()
+
+
+def _npy_header(n_samples):
+    """Builds a fixed-size .npy v1.0 header for a 1-D little-endian float32 array."""
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d,), }" % n_samples
+    prefix_size = len(b"\x93NUMPY") + 2 + 2 # magic, version, header length field
+    header = header.ljust(NPY_HEADER_SIZE - prefix_size - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def decode_to_npy(file_path, target_path, sr=SAMPLE_RATE):
+    """
+    Decodes the first audio track of file_path to mono float32 at sr and writes
+    it to target_path as a .npy file, streaming in blocks. Writes atomically.
+    """
+    # fmt: off
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", file_path,
+        "-map", "0:a:0",          # first audio track only
+        "-vn", "-sn", "-dn",      # never decode video, subtitles or data streams
+        "-ac", "1",
+        "-ar", str(sr),
+        "-f", "f32le",
+        "-acodec", "pcm_f32le",
+        "-",
+    ]
+    # fmt: on
+    target_dir = os.path.dirname(target_path)
+    fd, temp_path = tempfile.mkstemp(dir=target_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out, tempfile.TemporaryFile() as stderr:
+            out.write(b"\0" * NPY_HEADER_SIZE) # Placeholder, rewritten once the length is known
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+            n_bytes = 0
+            for block in iter(lambda: process.stdout.read(READ_BLOCK_SIZE), b""):
+                out.write(block)
+                n_bytes += len(block)
+            process.stdout.close()
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"Failed to load audio: {stderr.read().decode(errors='replace')}")
+
+            out.seek(0)
+            out.write(_npy_header(n_bytes // 4))
+        os.replace(temp_path, target_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def probe_duration(file_path):
+    """
+    Length in seconds of the first audio track of file_path, read by ffprobe from
+    the container headers without decoding. None if it can't be determined.
+    """
+    # fmt: off
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=duration:format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        file_path,
+    ]
+    # fmt: on
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # The stream duration comes first; some containers only give the format's
+    for value in output.split():
+        try:
+            return float(value)
+        except ValueError:
+            continue # "N/A"
+    return None
+
+
+class AudioCache:
+    """Decoded audio stored as .npy files named by the hash of the source file."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or get_cache_dir("audio")
+        self.max_bytes = max_bytes
+
+    def path_for(self, file_path):
+        return os.path.join(self.cache_dir, hash_file(file_path) + ".npy")
+
+    def decoded_path(self, file_path):
+        """Returns the cached .npy path for file_path, decoding it first if needed."""
+        target_path = self.path_for(file_path)
+        # One decode per file at a time, even if several threads ask for it
+        with _decode_locks_lock:
+            lock = _decode_locks.setdefault(target_path, threading.Lock())
+        with lock:
+            if os.path.exists(target_path):
+                os.utime(target_path) # Mark as recently used for eviction
+                return target_path
+            print(f"Decoding audio: {file_path}")
+            decode_to_npy(file_path, target_path)
+        self._evict(keep=target_path)
+        return target_path
+
+    def load(self, file_path):
+        """
+        Returns the decoded samples as a memory-mapped float32 array.
+        Copy-on-write mapping: pages are shared with the page cache until written.
+        """
+        return np.load(self.decoded_path(file_path), mmap_mode="c")
+
+    def _evict(self, keep=None):
+        """Deletes the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy") and entry.path != keep:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and os.path.exists(keep):
+            total += os.path.getsize(keep)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path) # Open memory maps stay valid on POSIX
+                total -= size
+            except OSError:
+                pass
+
+
+# --- Process-wide instance ---
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Returns the decoded-audio cache shared by everything in this process."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AudioCache()
+        return _shared_cache
+
+
+def load_audio(file_path):
+    """Drop-in replacement for whisper.load_audio backed by the decoded-audio cache."""
+    return get_audio_cache().load(file_path)
@@ -0,0 +1,366 @@
+# batch.py
+# Headless batch transcription: fans a directory or glob of files out over a pool
+# of worker processes, each holding a loaded Whisper model. On the CPU the workers
+# share one copy of the weights through a memory-mapped file (see mmap_weights.py).
+#
+# Usage:
+#   python batch.py /path/to/recordings --model small --workers 4
+#   python batch.py "/data/**/*.wav" --output-dir transcripts
+#   python batch.py long_meeting.mp3 --chunk-workers 8   # split one long file across cores
+#   python batch.py calls/ --preset fastest --language en
+#   python batch.py calls/ --trace-dir traces            # per-stage timings, one Chrome trace per file
+#   python batch.py videos/ --output-format srt vtt      # subtitles next to each video
+#   python batch.py voicemails/ --clip-batch-size 16     # short clips decoded 16 at a time
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+from engine import TranscriptionEngine, audio_throughput
+from model_registry import get_sorted_models
+from chunked import ChunkedTranscriber
+from batched import BatchedTranscriber, MAX_CLIP_SECONDS
+from audio_cache import probe_duration
+from calibration import recommend_for_this_machine, DEFAULT_TARGET_RTF
+from quantization import PRECISIONS, DEFAULT_PRECISION, check_precision
+from mmap_weights import prepare_shared_weights
+from decode_presets import add_decode_arguments, decode_options_from_args
+from profiling import Trace, format_summary
+from writers import FORMATS, DEFAULT_FORMATS, TranscriptWriter, get_output_base
+from thread_plan import plan_for_this_machine, describe_plan, make_slot_counter, init_worker_threads
+
+# Same extensions the GUI file dialog offers
+MEDIA_EXTENSIONS = (
+    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".opus", ".mpga",
+    ".mp4", ".mov", ".avi", ".mkv",
+)
+
+# Each worker process keeps its own engine for its whole lifetime
+_worker_engine = None
+
+
+def collect_input_files(source, recursive=True):
+    """Expands a directory or glob pattern into a sorted list of media files."""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*") if recursive else os.path.join(source, "*")
+        candidates = glob.glob(pattern, recursive=recursive)
+    else:
+        candidates = glob.glob(source, recursive=True)
+
+    return sorted(
+        path for path in candidates
+        if os.path.isfile(path) and path.lower().endswith(MEDIA_EXTENSIONS)
+    )
+
+
+def _init_worker(model_name, device, use_cache, precision, thread_plan=None, slot_counter=None):
+    """Pool initializer: pins the worker and sets its threads, then creates its engine; the model loads on the first cache miss."""
+    global _worker_engine
+    init_worker_threads(thread_plan, slot_counter)
+    _worker_engine = TranscriptionEngine(model_name, device=device, lazy=True, use_transcript_cache=use_cache,
+                                         precision=precision, use_checkpoints=use_cache)
+
+
+def _transcribe_file(task):
+    """Transcribes one file inside a worker process and returns a summary dict."""
+    file_path, output_dir, output_formats, options, trace_dir = task
+    trace = Trace(file_path) if trace_dir is not None else None
+    writer = None
+    try:
+        if output_dir is not None:
+            # Segments go to the output files as they are decoded
+            writer = TranscriptWriter(get_output_base(file_path, output_dir), output_formats)
+            options = dict(options, on_segment=writer.write_segment)
+        if trace is None:
+            result = _worker_engine.transcribe(file_path, **options)
+        else:
+            with trace.sampling():
+                result = _worker_engine.transcribe(file_path, trace=trace, **options)
+        if writer is not None:
+            writer.close(result.get("language"))
+    except Exception as e:
+        if writer is not None:
+            writer.abort()
+        return {"file": file_path, "error": str(e)}
+
+    summary = {
+        "file": file_path,
+        "audio_duration": result["audio_duration"],
+        "elapsed_time": result["elapsed_time"],
+        "cached": result["cached"],
+        "skipped_seconds": result.get("vad", {}).get("skipped_seconds", 0.0),
+        "fallbacks": result.get("fallbacks", 0),
+        "resumed_seconds": result.get("resumed_seconds", 0.0),
+        "worker": os.getpid(),
+    }
+    if trace is not None:
+        summary["profile"] = trace.summary()
+        trace.save(get_trace_path(file_path, trace_dir))
+    return summary
+
+
+def get_trace_path(file_path, trace_dir):
+    """<trace_dir>/<name>.trace.json; files with the same name in different folders get numbered."""
+    os.makedirs(trace_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    path = os.path.join(trace_dir, base_name + ".trace.json")
+    index = 1
+    while os.path.exists(path):
+        index += 1
+        path = os.path.join(trace_dir, f"{base_name}-{index}.trace.json")
+    return path
+
+
+def write_outputs(file_path, result, output_dir, output_formats=DEFAULT_FORMATS):
+    """Writes a finished result as <name>.<format> in output_dir (or next to the input)."""
+    with TranscriptWriter(get_output_base(file_path, output_dir), output_formats) as writer:
+        writer.write_segments(result["segments"])
+        writer.close(result.get("language"))
+
+
+def run_batch(files, model_name, workers, device=None, output_dir=None, use_cache=True, options=None,
+              precision=DEFAULT_PRECISION, trace_dir=None, output_formats=DEFAULT_FORMATS):
+    """
+    Transcribes files over a process pool, printing per-file and aggregate throughput.
+    options are passed to TranscriptionEngine.transcribe (e.g. {"vad": True}).
+    Unless output_dir is None, each transcript is written in output_formats while it is decoded.
+    With trace_dir, each file's per-stage profile is saved there as a Chrome trace.
+    """
+    workers = max(1, min(workers, len(files)))
+    print(f"Transcribing {len(files)} file(s) with model '{model_name}' ({precision}) on {workers} worker(s)")
+
+    # 'spawn' gives every worker a clean interpreter; forking a process that has
+    # already initialised torch threads is not reliable on every platform.
+    context = multiprocessing.get_context("spawn")
+    tasks = [(path, output_dir, tuple(output_formats), dict(options or {}), trace_dir) for path in files]
+    summaries = []
+
+    if workers > 1 and precision == DEFAULT_PRECISION:
+        prepare_shared_weights(model_name, device) # Convert once here rather than in every worker
+    # Each worker gets its own cores instead of every torch starting a thread per core
+    thread_plan = plan_for_this_machine(workers)
+    print(f"Threads: {describe_plan(thread_plan)}")
+
+    start_time = time.time()
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(model_name, device, use_cache, precision, thread_plan, make_slot_counter(context))) as pool:
+        for index, summary in enumerate(pool.imap_unordered(_transcribe_file, tasks), start=1):
+            summaries.append(summary)
+            report_file(index, len(files), summary)
+    report_aggregate(summaries, len(files), time.time() - start_time)
+    if trace_dir is not None:
+        report_profile(summaries, trace_dir)
+    return summaries
+
+
+def run_chunked(files, model_name, chunk_workers, device=None, output_dir=None, precision=DEFAULT_PRECISION,
+                options=None, output_formats=DEFAULT_FORMATS):
+    """Transcribes files one at a time, each split into chunks across chunk_workers processes."""
+    print(f"Transcribing {len(files)} file(s) with model '{model_name}', "
+          f"each split across {chunk_workers} worker(s)")
+    summaries = []
+
+    start_time = time.time()
+    with ChunkedTranscriber(model_name, workers=chunk_workers, device=device, precision=precision) as transcriber:
+        for index, file_path in enumerate(files, start=1):
+            try:
+                result = transcriber.transcribe(file_path, **dict(options or {}))
+                if output_dir is not None:
+                    write_outputs(file_path, result, output_dir, output_formats)
+                summary = {
+                    "file": file_path,
+                    "audio_duration": result["audio_duration"],
+                    "elapsed_time": result["elapsed_time"],
+                    "chunks": result["chunks"],
+                    "cached": result["cached"],
+                    "fallbacks": result.get("fallbacks", 0),
+                }
+            except Exception as e:
+                summary = {"file": file_path, "error": str(e)}
+            summaries.append(summary)
+            report_file(index, len(files), summary)
+    report_aggregate(summaries, len(files), time.time() - start_time)
+    return summaries
+
+
+def split_short_clips(files):
+    """
+    Returns (clips of at most one Whisper window, longer files), judged by the
+    length in the container headers so nothing is decoded here. Files whose
+    length can't be probed go with the longer files.
+    """
+    short, long = [], []
+    for path in files:
+        duration = probe_duration(path)
+        # A clip whose decoded audio turns out a little longer is still transcribed on its own by BatchedTranscriber
+        (short if duration is not None and duration <= MAX_CLIP_SECONDS else long).append(path)
+    return short, long
+
+
+def run_clip_batches(files, model_name, batch_size, device=None, output_dir=None, use_cache=True, options=None,
+                     precision=DEFAULT_PRECISION, output_formats=DEFAULT_FORMATS):
+    """Transcribes short clips in this process, batch_size at a time through one encoder pass (see batched.py)."""
+    print(f"Transcribing {len(files)} short clip(s) with model '{model_name}' ({precision}), "
+          f"{batch_size} per batch")
+    summaries = []
+
+    def on_result(file_path, result):
+        if output_dir is not None:
+            try:
+                write_outputs(file_path, result, output_dir, output_formats)
+            except Exception as e:
+                on_error(file_path, e)
+                return
+        summary = {
+            "file": file_path,
+            "audio_duration": result["audio_duration"],
+            "elapsed_time": result["elapsed_time"],
+            "cached": result["cached"],
+            "fallbacks": result.get("fallbacks", 0),
+        }
+        summaries.append(summary)
+        report_file(len(summaries), len(files), summary)
+
+    def on_error(file_path, error):
+        summary = {"file": file_path, "error": str(error)}
+        summaries.append(summary)
+        report_file(len(summaries), len(files), summary)
+
+    start_time = time.time()
+    transcriber = BatchedTranscriber(model_name, device=device, precision=precision, batch_size=batch_size,
+                                     use_transcript_cache=use_cache)
+    transcriber.transcribe_files(files, on_result=on_result, on_error=on_error, **dict(options or {}))
+    report_aggregate(summaries, len(files), time.time() - start_time)
+    return summaries
+
+
+def report_file(index, total, summary):
+    """Prints one line of per-file throughput."""
+    name = os.path.basename(summary["file"])
+    if "error" in summary:
+        print(f"[{index}/{total}] {name}: FAILED ({summary['error']})")
+        return
+    speed = audio_throughput(summary["audio_duration"], summary["elapsed_time"])
+    chunks = f", {summary['chunks']} chunks" if "chunks" in summary else ""
+    cached = ", cached" if summary.get("cached") else ""
+    skipped = f", {summary['skipped_seconds']:.1f}s silence skipped" if summary.get("skipped_seconds") else ""
+    fallbacks = f", {summary['fallbacks']} fallback re-decode(s)" if summary.get("fallbacks") else ""
+    resumed = f", resumed at {summary['resumed_seconds']:.0f}s" if summary.get("resumed_seconds") else ""
+    print(f"[{index}/{total}] {name}: {summary['audio_duration']:.1f}s audio "
+          f"in {summary['elapsed_time']:.1f}s ({speed:.2f} audio-s/s{chunks}{cached}{skipped}{fallbacks}{resumed})")
+
+
+def report_aggregate(summaries, total, wall_time):
+    """Prints the aggregate throughput over all successful files."""
+    succeeded = [s for s in summaries if "error" not in s]
+    total_audio = sum(s["audio_duration"] for s in succeeded)
+    cache_hits = sum(1 for s in succeeded if s.get("cached"))
+    print(f"Done: {len(succeeded)}/{total} file(s), {total_audio:.1f}s audio in {wall_time:.1f}s wall "
+          f"-> {audio_throughput(total_audio, wall_time):.2f} audio-s/s aggregate "
+          f"(transcript cache: {cache_hits} hit(s), {len(succeeded) - cache_hits} miss(es))")
+    total_fallbacks = sum(s.get("fallbacks", 0) for s in succeeded)
+    if total_fallbacks:
+        print(f"Temperature fallback re-decoded {total_fallbacks} window(s); a faster --preset avoids them")
+    total_skipped = sum(s.get("skipped_seconds", 0.0) for s in succeeded)
+    if total_skipped:
+        decoded = total_audio - total_skipped
+        print(f"VAD skipped {total_skipped:.1f}s of silence ({total_skipped / total_audio * 100:.0f}%), "
+              f"decoding {total_audio / decoded if decoded else float('inf'):.1f}x less audio")
+
+
+def report_profile(summaries, trace_dir):
+    """Prints the time spent in each stage over all profiled files."""
+    stages = {}
+    for summary in summaries:
+        for name, seconds in summary.get("profile", {}).get("stages", {}).items():
+            stages[name] = stages.get(name, 0.0) + seconds
+    if stages:
+        print(f"Time per stage: {format_summary({'stages': stages})}")
+        print(f"Traces written to {trace_dir} (open them in chrome://tracing or ui.perfetto.dev)")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Transcribe many audio/video files without the GUI.")
+    parser.add_argument("source", help="Directory (searched recursively) or glob pattern of input files")
+    parser.add_argument("--model", default="base", choices=["auto"] + get_sorted_models(),
+                        help="Whisper model to load in each worker; 'auto' uses the calibrated recommendation")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help="With --model auto: required real-time factor, processing time / audio time")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (each loads its own model)")
+    parser.add_argument("--chunk-workers", type=int, default=0,
+                        help="Long-file mode: split each file at quiet points and transcribe the chunks "
+                             "in this many processes (files are then processed one at a time)")
+    parser.add_argument("--clip-batch-size", type=int, default=0,
+                        help="Short-clip mode: transcribe files of up to 30 s this many at a time in one "
+                             "batched encoder/decoder pass; longer files use the worker pool as usual")
+    parser.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    parser.add_argument("--precision", default=DEFAULT_PRECISION, choices=PRECISIONS,
+                        help="Inference precision; int8 is quantised and runs on the CPU (default: fp32)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for the transcripts (default: next to each input file)")
+    parser.add_argument("--output-format", nargs="+", default=list(DEFAULT_FORMATS), choices=FORMATS,
+                        help="Transcript formats to write, e.g. 'srt vtt' (default: txt)")
+    parser.add_argument("--no-output", action="store_true", help="Only report throughput, do not write transcripts")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't update the transcript cache or resume checkpoints")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip silence: only decode the speech regions found by an energy pre-pass")
+    parser.add_argument("--trace-dir", default=None,
+                        help="Profile each file's stages and write a Chrome trace per file to this directory")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    add_decode_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    try:
+        check_precision(args.precision, args.device)
+        decode_options = decode_options_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    files = collect_input_files(args.source, recursive=not args.no_recursive)
+    if not files:
+        print(f"No audio or video files found for: {args.source}")
+        return 1
+
+    if args.model == "auto":
+        # Every worker process holds the model
+        args.model, reason = recommend_for_this_machine(args.target_rtf, workers=max(args.workers, args.chunk_workers))
+        print(f"Selected model '{args.model}' ({reason})")
+
+    # None means "don't write"; an empty string means "next to each input"
+    output_dir = None if args.no_output else (args.output_dir or "")
+    if args.chunk_workers > 1:
+        if args.vad:
+            print("Note: --vad is not applied in long-file mode (--chunk-workers)")
+        if args.trace_dir:
+            print("Note: --trace-dir is not applied in long-file mode (--chunk-workers)")
+        summaries = run_chunked(files, args.model, args.chunk_workers, device=args.device, output_dir=output_dir,
+                                precision=args.precision, options=decode_options, output_formats=args.output_format)
+    else:
+        summaries = []
+        if args.clip_batch_size > 1 and args.vad:
+            # The batched decode can't skip silence, so every file goes to the worker pool
+            print("Note: --clip-batch-size is not applied with --vad")
+        elif args.clip_batch_size > 1:
+            clips, files = split_short_clips(files)
+            if clips:
+                summaries += run_clip_batches(clips, args.model, args.clip_batch_size, device=args.device,
+                                              output_dir=output_dir, use_cache=not args.no_cache,
+                                              options=decode_options, precision=args.precision,
+                                              output_formats=args.output_format)
+        if files:
+            summaries += run_batch(files, args.model, args.workers, device=args.device, output_dir=output_dir,
+                                   use_cache=not args.no_cache,
+                                   options=dict(decode_options, vad=True) if args.vad else decode_options,
+                                   precision=args.precision, trace_dir=args.trace_dir,
+                                   output_formats=args.output_format)
+    return 0 if all("error" not in s for s in summaries) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,378 @@
+# batched.py
+# Many short clips (voicemails, prompts, snippets) decoded together in batches.
+#
+# model.transcribe handles one file at a time: every clip pays the per-call
+# overhead and runs the encoder and decoder with a batch size of one. A clip of
+# up to 30 s is a single Whisper window, so here the log-mels of several clips
+# are stacked into one tensor: the encoder runs once for the whole stack and the
+# decoder steps all clips together. Clips whose output fails Whisper's quality
+# checks are decoded again at the next fallback temperature, in a smaller batch
+# of just those clips. Every clip still gets its own result, with segments,
+# language and fallback count, mapped back to its file.
+#
+# Clips longer than one window go through the normal per-file path.
+# batch.py uses this with --clip-batch-size; this script compares the two paths.
+#
+# Usage:
+#   python batched.py voicemails/ --model base --batch-size 16
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine import TranscriptionEngine, SAMPLE_RATE, WINDOW_SECONDS, audio_throughput
+from audio_cache import load_audio, probe_duration
+from transcript_cache import get_transcript_cache, hash_file, make_cache_key
+from quantization import DEFAULT_PRECISION
+from decode_presets import WHISPER_TEMPERATURES, add_decode_arguments, decode_options_from_args
+import profiling
+
+# Clips decoded together; the encoder input is batch_size x 30 s of log-mel
+DEFAULT_BATCH_SIZE = 8
+# Longest clip the batched path takes: one Whisper window
+MAX_CLIP_SECONDS = WINDOW_SECONDS
+# Whisper's own fallback thresholds (whisper.transcribe's defaults)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+# Seconds per timestamp token
+TIMESTAMP_SECONDS = 0.02
+# Options the batched decode applies; anything else set (vad, initial_prompt,
+# word_timestamps, ...) sends the files through the per-file path instead
+BATCHED_OPTIONS = ("language", "task", "temperature", "beam_size", "best_of", "patience", "length_penalty",
+                   "suppress_tokens", "suppress_blank", "condition_on_previous_text", "fp16")
+
+
+def is_short_clip(audio):
+    return len(audio) <= MAX_CLIP_SECONDS * SAMPLE_RATE
+
+
+def _is_silent(result):
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def _needs_fallback(result):
+    if _is_silent(result):
+        return False # transcribe() would skip this window rather than decode it again
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def segments_from_tokens(tokenizer, tokens, duration):
+    """
+    Splits a decoded window at its timestamp tokens into segments, the way
+    Whisper does: <|0.00|> text <|2.40|><|2.40|> more text <|5.00|>.
+    """
+    segments = []
+    start = None
+    text_tokens = []
+
+    def add(end):
+        text = tokenizer.decode(text_tokens)
+        if text.strip():
+            segments.append({"id": len(segments), "seek": 0, "start": start, "end": min(end, duration),
+                             "text": text, "tokens": list(text_tokens)})
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            time_seconds = (token - tokenizer.timestamp_begin) * TIMESTAMP_SECONDS
+            if start is None:
+                start = time_seconds
+            elif text_tokens:
+                add(time_seconds)
+                text_tokens = []
+                start = None
+        elif token < tokenizer.eot:
+            if start is None:
+                start = segments[-1]["end"] if segments else 0.0
+            text_tokens.append(token)
+    if text_tokens:
+        add(duration) # No closing timestamp: the text runs to the end of the clip
+    return segments
+
+
+class BatchedTranscriber:
+    """
+    Transcribes short clips in batches with one loaded model. options are the
+    usual decode options (see decode_presets.py); condition_on_previous_text
+    has no effect, since every clip is a single window.
+    """
+
+    def __init__(self, model_name, device=None, precision=DEFAULT_PRECISION, batch_size=DEFAULT_BATCH_SIZE,
+                 use_transcript_cache=True):
+        self.engine = TranscriptionEngine(model_name, device=device, lazy=True, precision=precision,
+                                          use_transcript_cache=use_transcript_cache)
+        self.batch_size = batch_size
+
+    def _cache_key(self, file_path, options):
+        # Not the per-file path's key: a batched decode of a clip can differ slightly from model.transcribe
+        key_options = dict(options, batched=True)
+        if self.engine.precision != DEFAULT_PRECISION:
+            key_options["precision"] = self.engine.precision
+        return make_cache_key(hash_file(file_path), self.engine.model_name, key_options)
+
+    def transcribe_files(self, file_paths, on_result=None, on_error=None, **options):
+        """
+        Transcribes every file and returns {file_path: result}, each result like
+        TranscriptionEngine.transcribe's. Files longer than one window, and all
+        files when options the batched decode can't apply are set, are transcribed
+        one by one. on_result(file_path, result) is called as each finishes.
+        A file that fails is passed to on_error(file_path, error) and the rest
+        carry on; without on_error the first error is raised.
+        """
+        options.setdefault("fp16", False)
+        results = {}
+        unbatched = sorted(name for name, value in options.items()
+                           if name not in BATCHED_OPTIONS and value not in (None, False))
+        if unbatched:
+            print(f"Not batching: per-file options set ({', '.join(unbatched)})")
+
+        def finish(file_path, result):
+            results[file_path] = result
+            if on_result is not None:
+                on_result(file_path, result)
+
+        def fail(file_path, error):
+            if on_error is None:
+                raise error
+            on_error(file_path, error)
+
+        def transcribe_one(file_path):
+            try:
+                finish(file_path, self.engine.transcribe(file_path, **dict(options)))
+            except Exception as e:
+                fail(file_path, e)
+
+        pending = [] # (file_path, cache key)
+        for file_path in file_paths:
+            if unbatched:
+                transcribe_one(file_path)
+                continue
+            start_time = time.time()
+            cache_key = None
+            try:
+                if self.engine.use_transcript_cache:
+                    cache_key = self._cache_key(file_path, options)
+                    cached_result = get_transcript_cache().get(cache_key)
+                    if cached_result is not None:
+                        finish(file_path, dict(cached_result, elapsed_time=time.time() - start_time,
+                                               model=self.engine.model_name, precision=self.engine.precision,
+                                               cached=True))
+                        continue
+            except Exception as e:
+                fail(file_path, e)
+                continue
+            pending.append((file_path, cache_key))
+
+        # Similar lengths together, so a batch's decoding loops end at about the same step.
+        # Lengths come from the headers; each batch's audio is only decoded when it is reached.
+        lengths = {file_path: probe_duration(file_path) for file_path, _ in pending}
+        pending.sort(key=lambda entry: lengths[entry[0]] if lengths[entry[0]] is not None else MAX_CLIP_SECONDS)
+        for i in range(0, len(pending), self.batch_size):
+            clips = [] # (file_path, audio, cache key)
+            for file_path, cache_key in pending[i:i + self.batch_size]:
+                try:
+                    audio = load_audio(file_path)
+                except Exception as e:
+                    fail(file_path, e)
+                    continue
+                if is_short_clip(audio):
+                    clips.append((file_path, audio, cache_key))
+                else:
+                    transcribe_one(file_path)
+            if not clips:
+                continue
+            try:
+                batches = [(clips, self._transcribe_batch(clips, options))]
+            except Exception as e:
+                if len(clips) == 1:
+                    fail(clips[0][0], e)
+                    continue
+                print(f"Batch of {len(clips)} clip(s) failed ({e}); decoding them one at a time")
+                batches = []
+                for clip in clips:
+                    try:
+                        batches.append(([clip], self._transcribe_batch([clip], options)))
+                    except Exception as clip_error:
+                        fail(clip[0], clip_error)
+            for batch, batch_results in batches:
+                for (file_path, _, cache_key), result in zip(batch, batch_results):
+                    if cache_key is not None:
+                        get_transcript_cache().put(cache_key, result)
+                    finish(file_path, result)
+        return results
+
+    def _transcribe_batch(self, clips, options):
+        """Decodes up to batch_size clips together, with per-clip temperature fallback."""
+        import torch
+        from whisper.audio import log_mel_spectrogram, pad_or_trim
+        from whisper.decoding import DecodingOptions
+        from whisper.tokenizer import get_tokenizer
+
+        if self.engine.model is None:
+            self.engine.load_model(self.engine.model_name)
+        model = self.engine.model
+        start_time = time.time()
+
+        with profiling.stage(profiling.MEL):
+            mel = torch.stack([
+                log_mel_spectrogram(pad_or_trim(np.asarray(audio, dtype=np.float32)), model.dims.n_mels)
+                for _, audio, _ in clips
+            ]).to(model.device)
+
+        temperatures = options.get("temperature", WHISPER_TEMPERATURES)
+        temperatures = list(temperatures) if isinstance(temperatures, (list, tuple)) else [temperatures]
+        profiling.set_first_temperature(temperatures)
+        language = options.get("language")
+        decoded = [None] * len(clips)
+        fallbacks = [0] * len(clips)
+        pending = list(range(len(clips)))
+        for attempt, temperature in enumerate(temperatures):
+            # Like whisper.transcribe: beam search only at temperature 0, sampling above it
+            decode_options = DecodingOptions(
+                task=options.get("task", "transcribe"),
+                language=language,
+                temperature=temperature,
+                beam_size=options.get("beam_size") if temperature == 0 else None,
+                patience=options.get("patience") if temperature == 0 else None,
+                best_of=options.get("best_of") if temperature > 0 else None,
+                length_penalty=options.get("length_penalty"),
+                suppress_tokens=options.get("suppress_tokens", "-1"),
+                suppress_blank=options.get("suppress_blank", True),
+                fp16=options["fp16"],
+            )
+            # One encoder pass and one decoding loop for every clip still pending
+            results = model.decode(mel[pending], decode_options)
+            retry = []
+            for index, result in zip(pending, results):
+                decoded[index] = result
+                fallbacks[index] = attempt
+                if attempt + 1 < len(temperatures) and _needs_fallback(result):
+                    retry.append(index)
+            pending = retry
+            if not pending:
+                break
+        elapsed_time = time.time() - start_time
+
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  task=options.get("task", "transcribe"))
+        total_audio = sum(len(audio) for _, audio, _ in clips)
+        batch_results = []
+        for (file_path, audio, _), result, clip_fallbacks in zip(clips, decoded, fallbacks):
+            duration = len(audio) / SAMPLE_RATE
+            segments = [] if _is_silent(result) else segments_from_tokens(tokenizer, result.tokens, duration)
+            for segment in segments:
+                segment.update(temperature=result.temperature, avg_logprob=result.avg_logprob,
+                               compression_ratio=result.compression_ratio, no_speech_prob=result.no_speech_prob)
+            batch_results.append({
+                "text": "".join(segment["text"] for segment in segments),
+                "segments": segments,
+                "language": result.language,
+                "fallbacks": clip_fallbacks,
+                "audio_duration": duration,
+                # The batch's time, shared out by audio length
+                "elapsed_time": elapsed_time * len(audio) / total_audio if total_audio else 0.0,
+                "model": self.engine.model_name,
+                "precision": self.engine.precision,
+                "batched": len(clips),
+                "cached": False,
+            })
+        return batch_results
+
+
+# --- Throughput comparison ---
+
+def compare_paths(file_paths, model_name, batch_size=DEFAULT_BATCH_SIZE, device=None, precision=DEFAULT_PRECISION,
+                  options=None):
+    """
+    Transcribes the files per file and batched, with the transcript cache off,
+    and returns the throughput of both and how far their transcripts differ.
+    """
+    from benchmark import word_error_rate # benchmark imports the engine; only needed here
+
+    options = dict(options or {})
+    per_file_engine = TranscriptionEngine(model_name, device=device, precision=precision,
+                                          use_transcript_cache=False, use_checkpoints=False)
+    per_file_engine.warm_up() # Both paths then start with a warm model
+    durations = {path: len(load_audio(path)) / SAMPLE_RATE for path in file_paths} # Decoded before timing
+
+    start_time = time.time()
+    per_file = {path: per_file_engine.transcribe(path, **dict(options)) for path in file_paths}
+    per_file_seconds = time.time() - start_time
+
+    transcriber = BatchedTranscriber(model_name, device=device, precision=precision, batch_size=batch_size,
+                                     use_transcript_cache=False)
+    start_time = time.time()
+    batched = transcriber.transcribe_files(file_paths, **dict(options))
+    batched_seconds = time.time() - start_time
+
+    total_audio = sum(durations.values())
+    return {
+        "files": len(file_paths),
+        "audio_seconds": total_audio,
+        "batch_size": batch_size,
+        "per_file": {"seconds": per_file_seconds, "throughput": audio_throughput(total_audio, per_file_seconds)},
+        "batched": {"seconds": batched_seconds, "throughput": audio_throughput(total_audio, batched_seconds)},
+        "speedup": per_file_seconds / batched_seconds if batched_seconds else None,
+        "wer": {path: word_error_rate(per_file[path]["text"], batched[path]["text"]) for path in file_paths},
+    }
+
+
+def print_comparison(comparison):
+    print(f"{comparison['files']} file(s), {comparison['audio_seconds']:.1f}s audio, "
+          f"batch size {comparison['batch_size']}")
+    for name in ("per_file", "batched"):
+        entry = comparison[name]
+        print(f"  {name:>9}: {entry['seconds']:7.1f}s  {entry['throughput']:6.2f} audio-s/s")
+    if comparison["speedup"]:
+        print(f"  speedup: {comparison['speedup']:.2f}x")
+    wer = comparison["wer"]
+    if wer:
+        print(f"  WER of batched against per-file transcripts: mean {sum(wer.values()) / len(wer) * 100:.1f}%, "
+              f"worst {max(wer.values()) * 100:.1f}%")
+
+
+def build_arg_parser():
+    from model_registry import get_sorted_models
+    parser = argparse.ArgumentParser(description="Compare batched and per-file transcription of short clips.")
+    parser.add_argument("source", help="Directory (searched recursively) or glob pattern of input files")
+    parser.add_argument("--model", default="base", choices=get_sorted_models(), help="Whisper model (default: base)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Clips decoded together (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    parser.add_argument("--output", default=None, help="Where to write the JSON results (default: print only)")
+    add_decode_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    from batch import collect_input_files # Not at the top: batch.py imports this module
+
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    try:
+        options = decode_options_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    files = collect_input_files(args.source)
+    if not files:
+        print(f"No audio or video files found for: {args.source}")
+        return 1
+
+    comparison = compare_paths(files, args.model, args.batch_size, device=args.device, options=options)
+    print_comparison(comparison)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(comparison, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+# benchmark.py
+# Offline benchmark of every Whisper model: load time, real-time factor, peak RSS
+# and time to first segment, written as JSON so runs can be compared across commits.
+#
+# Usage:
+#   python benchmark.py --models tiny base --output bench/HEAD.json
+#   python benchmark.py --models tiny base --compare bench/main.json
+#   python benchmark.py --fixtures my_clip.wav other_clip.mp3
+#
+# Fixtures are generated locally (espeak-ng speech if installed, otherwise a
+# synthetic speech-like signal), so no network access or bundled media is needed.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+import psutil
+
+from app_paths import get_cache_dir
+from audio_cache import load_audio
+from engine import TranscriptionEngine
+from model_registry import get_sorted_models
+from profiling import ResourceSampler
+from mmap_weights import prepare_shared_weights
+from quantization import PRECISIONS, convert as convert_int8
+
+SAMPLE_RATE = 16000
+# (name, seconds) of the generated fixtures
+DEFAULT_FIXTURES = [("short", 10), ("long", 60)]
+# Relative slowdown that --compare reports as a regression
+DEFAULT_TOLERANCE = 0.15
+# How often the RSS sampler polls while a model runs
+RSS_SAMPLE_SECONDS = 0.05
+
+FIXTURE_TEXT = (
+    "The quick brown fox jumps over the lazy dog. "
+    "Please call the office tomorrow morning to confirm the meeting time. "
+    "Our quarterly results improved compared to the same period last year. "
+)
+
+
+# --- Fixtures ---
+
+def _write_wav(path, samples):
+    """Writes float samples in [-1, 1] as 16-bit mono WAV."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(pcm.tobytes())
+
+
+def synthetic_speech(seconds, seed=0):
+    """A deterministic speech-like signal: voiced harmonic bursts separated by pauses."""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    position = 0
+    while position < len(audio):
+        burst = int(rng.uniform(0.2, 0.6) * SAMPLE_RATE)
+        t = np.arange(burst) / SAMPLE_RATE
+        pitch = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        envelope = np.hanning(burst)
+        audio[position:position + burst] = (0.3 * voiced * envelope)[:len(audio) - position]
+        position += burst + int(rng.uniform(0.05, 0.4) * SAMPLE_RATE)
+    audio += 0.005 * rng.standard_normal(len(audio)).astype(np.float32)
+    return audio
+
+
+def _espeak_binary():
+    return shutil.which("espeak-ng") or shutil.which("espeak")
+
+
+def generate_fixture(path, seconds):
+    """Creates a WAV fixture of the given length. Returns the generator used."""
+    espeak = _espeak_binary()
+    if espeak:
+        # Repeat the sentence until it is long enough, then trim to the exact length
+        text = FIXTURE_TEXT * max(1, int(seconds // 8) + 1)
+        raw_path = path + ".raw.wav"
+        subprocess.run([espeak, "-w", raw_path, text], check=True, capture_output=True)
+        with wave.open(raw_path, "rb") as f:
+            rate = f.getframerate()
+            pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").astype(np.float32) / 32768.0
+        os.remove(raw_path)
+        # Linear resample to 16 kHz; espeak's output is already band-limited speech
+        target_length = int(len(pcm) * SAMPLE_RATE / rate)
+        samples = np.interp(np.linspace(0, len(pcm) - 1, target_length), np.arange(len(pcm)), pcm)
+        _write_wav(path, samples[:int(seconds * SAMPLE_RATE)])
+        return "espeak"
+    _write_wav(path, synthetic_speech(seconds))
+    return "synthetic"
+
+
+def prepare_fixtures(fixture_dir=None, specs=DEFAULT_FIXTURES):
+    """Generates the (name, seconds) fixtures once and returns {name: path}."""
+    fixture_dir = fixture_dir or get_cache_dir("benchmark_fixtures")
+    generator = "espeak" if _espeak_binary() else "synthetic"
+    fixtures = {}
+    for name, seconds in specs:
+        path = os.path.join(fixture_dir, f"{name}_{seconds}s_{generator}.wav")
+        if not os.path.exists(path):
+            generate_fixture(path, seconds)
+        fixtures[name] = path
+    return fixtures
+
+
+# --- Measurement ---
+
+def _benchmark_model(model_name, fixtures, device, precision, result_queue):
+    """Runs in a fresh process so load time and peak RSS are not polluted by other models."""
+    try:
+        # Decode fixtures up front: the benchmark measures the model, not ffmpeg
+        durations = {name: len(load_audio(path)) / SAMPLE_RATE for name, path in fixtures.items()}
+        # One-time conversions (memory-mapped or int8 copy) only happen on a model's first run, so they are
+        # reported on their own; otherwise the first run's load time would not compare with later ones
+        conversion_start = time.time()
+        if precision == "int8":
+            convert_int8([model_name])
+        else:
+            prepare_shared_weights(model_name, device)
+        conversion_time = time.time() - conversion_start
+
+        with ResourceSampler(RSS_SAMPLE_SECONDS) as sampler:
+            engine = TranscriptionEngine(device=device, use_transcript_cache=False, precision=precision,
+                                         use_checkpoints=False)
+            load_start = time.time()
+            engine.load_model(model_name)
+            load_time = time.time() - load_start
+
+            fixture_results = {}
+            for name, path in fixtures.items():
+                result = engine.transcribe(path, stream=True)
+                fixture_results[name] = {
+                    "audio_seconds": durations[name],
+                    "elapsed_seconds": result["elapsed_time"],
+                    "rtf": result["elapsed_time"] / durations[name] if durations[name] else None,
+                    "time_to_first_segment": result.get("time_to_first_segment"),
+                    "segments": len(result["segments"]),
+                    "text": result["text"],
+                }
+
+        total_audio = sum(r["audio_seconds"] for r in fixture_results.values())
+        total_elapsed = sum(r["elapsed_seconds"] for r in fixture_results.values())
+        result_queue.put({
+            "load_time_seconds": load_time,
+            "conversion_seconds": conversion_time,
+            "rtf": total_elapsed / total_audio if total_audio else None,
+            "peak_rss_mb": sampler.peak_bytes / 1024 ** 2,
+            "fixtures": fixture_results,
+        })
+    except Exception as e:
+        result_queue.put({"error": str(e)})
+
+
+def run_benchmark(models, fixtures, device=None, precision="fp32"):
+    """Benchmarks each model in its own process; returns {model: result}."""
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for model_name in models:
+        print(f"Benchmarking '{model_name}' ({precision})...")
+        result_queue = context.Queue()
+        process = context.Process(target=_benchmark_model, args=(model_name, fixtures, device, precision, result_queue))
+        process.start()
+        result = _wait_for_result(process, result_queue)
+        process.join()
+        results[model_name] = result
+        if "error" in result:
+            print(f"  FAILED: {result['error']}")
+        else:
+            first = [r["time_to_first_segment"] for r in result["fixtures"].values() if r["time_to_first_segment"]]
+            first_text = f"{min(first):.2f}s" if first else "n/a"
+            conversion = result.get("conversion_seconds", 0.0)
+            conversion_text = f" (after a one-time conversion of {conversion:.1f}s)" if conversion >= 0.5 else ""
+            print(f"  load {result['load_time_seconds']:.2f}s{conversion_text}, RTF {result['rtf']:.3f}, "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB, first segment {first_text}")
+    return results
+
+
+def _wait_for_result(process, result_queue):
+    """Waits for the child's result, without hanging if it dies (e.g. killed for OOM)."""
+    while True:
+        try:
+            return result_queue.get(timeout=1.0)
+        except queue.Empty:
+            if not process.is_alive():
+                return {"error": f"benchmark process exited with code {process.exitcode}"}
+
+
+def _normalized_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance between two transcripts, divided by the reference length.
+    Case and punctuation are ignored."""
+    reference_words, hypothesis_words = _normalized_words(reference), _normalized_words(hypothesis)
+    if not reference_words:
+        return 0.0 if not hypothesis_words else 1.0
+    # One row of the Levenshtein table at a time
+    previous = list(range(len(hypothesis_words) + 1))
+    for i, reference_word in enumerate(reference_words, start=1):
+        current = [i]
+        for j, hypothesis_word in enumerate(hypothesis_words, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (reference_word != hypothesis_word)))
+        previous = current
+    return previous[-1] / len(reference_words)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_info():
+    """Metadata stored with every run so results are only compared like for like."""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "total_ram_gb": round(psutil.virtual_memory().total / 1024 ** 3, 1),
+    }
+
+
+# --- Comparison ---
+
+# metric name -> how to read it from a model result; higher is worse for all of them
+COMPARED_METRICS = {
+    "load_time_seconds": lambda r: r.get("load_time_seconds"),
+    "rtf": lambda r: r.get("rtf"),
+    "peak_rss_mb": lambda r: r.get("peak_rss_mb"),
+    "time_to_first_segment": lambda r: min(
+        (f["time_to_first_segment"] for f in r.get("fixtures", {}).values() if f.get("time_to_first_segment")),
+        default=None),
+}
+
+
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """Returns a list of human-readable regressions of current against baseline."""
+    regressions = []
+    for model_name, result in current["results"].items():
+        base = baseline.get("results", {}).get(model_name)
+        if not base or "error" in base or "error" in result:
+            continue
+        for metric, read in COMPARED_METRICS.items():
+            old, new = read(base), read(result)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{model_name}: {metric} {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper models on local audio fixtures.")
+    parser.add_argument("--models", nargs="+", default=get_sorted_models(), help="Models to benchmark (default: all)")
+    parser.add_argument("--fixtures", nargs="+", default=None,
+                        help="Audio files to use instead of the generated fixtures")
+    parser.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    parser.add_argument("--precision", default="fp32", choices=PRECISIONS,
+                        help="Inference precision; int8 runs on the CPU (default: fp32)")
+    parser.add_argument("--output", default=None, help="Where to write the JSON results (default: print only)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Relative increase reported as a regression (default: 0.15)")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.fixtures:
+        fixtures = {os.path.basename(path): os.path.abspath(path) for path in args.fixtures}
+    else:
+        fixtures = prepare_fixtures()
+
+    report = {
+        "machine": machine_info(),
+        "fixtures": {name: os.path.basename(path) for name, path in fixtures.items()},
+        "results": run_benchmark(args.models, fixtures, device=args.device, precision=args.precision),
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
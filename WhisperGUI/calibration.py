@@ -0,0 +1,195 @@
+# calibration.py
+# Measured, self-calibrating model recommendation.
+#
+# A short on-device probe runs each candidate model on a generated clip and
+# records its actual peak RSS and real-time factor in a calibration profile.
+# The recommender then picks the most accurate model that fits in the memory
+# that is available right now and meets the user's target real-time factor.
+#
+# Usage:
+#   python calibration.py                  # probe the models that fit, save the profile
+#   python calibration.py --models tiny base small
+#   python calibration.py --show --target-rtf 0.5
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import psutil
+
+import benchmark
+from app_paths import get_config_dir
+from model_registry import PRIORITY_MODELS, estimate_model_ram_gb, estimate_workers_ram_gb, get_sorted_models
+
+GB = 1024 ** 3
+# RAM left free for the OS and the GUI when a model's RSS was measured
+MEASURED_HEADROOM_GB = 1.0
+# Default target: transcribe at least as fast as real time
+DEFAULT_TARGET_RTF = 1.0
+# Length of the probe clip; long enough to get past one-time warm-up costs
+PROBE_SECONDS = 20
+# Rough CPU real-time factors on an 8-core machine, used only for models
+# without a measurement. Scaled by the actual core count.
+HEURISTIC_RTF_8_CORES = {
+    "tiny": 0.05,
+    "base": 0.1,
+    "small": 0.3,
+    "medium": 0.9,
+    "large": 1.8,
+}
+HEURISTIC_REFERENCE_CORES = 8
+
+
+def get_profile_path():
+    return os.path.join(get_config_dir(), "calibration.json")
+
+
+def load_profile(path=None):
+    """Returns the saved calibration profile, or None if there isn't one."""
+    path = path or get_profile_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_profile(profile, path=None):
+    path = path or get_profile_path()
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def get_available_ram_gb():
+    """RAM that can be used right now (not the installed total)."""
+    return psutil.virtual_memory().available / GB
+
+
+def candidate_models():
+    """
+    Models the recommender may choose, most accurate (largest) first. Among
+    models of the same size the newer standard ones (large-v3, large-v2) come first.
+    """
+    def newness(model):
+        return PRIORITY_MODELS.index(model) if model in PRIORITY_MODELS else -1
+
+    # sorted() is stable, so the rest keep their dropdown order
+    return sorted(get_sorted_models(), key=lambda model: (-estimate_model_ram_gb(model), -newness(model)))
+
+
+def model_ram_need_gb(model_name, profile=None, workers=1):
+    """
+    Measured RSS plus headroom if calibrated, else the static estimate.
+    For several worker processes the weights are counted once, since CPU
+    workers share them through memory-mapped files.
+    """
+    measured = (profile or {}).get("models", {}).get(model_name, {})
+    if measured.get("rss_gb"):
+        return estimate_workers_ram_gb(measured["rss_gb"], model_name, workers) + MEASURED_HEADROOM_GB
+    return estimate_workers_ram_gb(estimate_model_ram_gb(model_name), model_name, workers)
+
+
+def model_rtf(model_name, cpu_count, profile=None):
+    """Measured real-time factor if calibrated, else a heuristic scaled by core count."""
+    measured = (profile or {}).get("models", {}).get(model_name, {})
+    if measured.get("rtf"):
+        return measured["rtf"]
+    base_name = model_name.split("-")[0].split(".")[0]
+    reference = HEURISTIC_RTF_8_CORES.get(base_name)
+    if reference is None:
+        return None
+    return reference * HEURISTIC_REFERENCE_CORES / max(1, cpu_count)
+
+
+def recommend_model(available_gb, cpu_count, target_rtf=DEFAULT_TARGET_RTF, profile=None, workers=1):
+    """
+    Returns (model_name, reason) for the most accurate model that fits in
+    available_gb and whose real-time factor is at or below target_rtf.
+    Falls back to the largest model that fits, then to the smallest model.
+    With workers > 1 the model must fit once per worker process.
+    """
+    candidates = candidate_models()
+    if not candidates:
+        return None, "no models available"
+
+    fitting = [model for model in candidates if model_ram_need_gb(model, profile, workers) <= available_gb]
+    for model in fitting:
+        rtf = model_rtf(model, cpu_count, profile)
+        if rtf is not None and rtf <= target_rtf:
+            return model, f"fits in {available_gb:.1f} GB and runs at RTF {rtf:.2f} <= {target_rtf:.2f}"
+    if fitting:
+        fastest = min(fitting, key=lambda model: model_rtf(model, cpu_count, profile) or float("inf"))
+        return fastest, f"no model meets RTF {target_rtf:.2f}; fastest that fits in {available_gb:.1f} GB"
+    smallest = "tiny" if "tiny" in candidates else candidates[-1]
+    return smallest, f"nothing fits in {available_gb:.1f} GB; using the smallest model"
+
+
+def recommend_for_this_machine(target_rtf=DEFAULT_TARGET_RTF, workers=1):
+    """recommend_model with live memory, the core count and the saved profile."""
+    return recommend_model(get_available_ram_gb(), os.cpu_count() or 1, target_rtf, load_profile(), workers)
+
+
+def calibrate(models=None, probe_seconds=PROBE_SECONDS, device=None):
+    """
+    Probes each model on a short generated clip and saves the calibration profile.
+    By default only models whose static estimate fits in available RAM are probed.
+    """
+    if models is None:
+        available_gb = get_available_ram_gb()
+        models = [model for model in candidate_models() if estimate_model_ram_gb(model) <= available_gb]
+
+    fixtures = benchmark.prepare_fixtures(specs=[("probe", probe_seconds)])
+    results = benchmark.run_benchmark(models, fixtures, device=device)
+
+    profile = load_profile() or {}
+    profile["machine"] = benchmark.machine_info()
+    profile["calibrated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    profile.setdefault("models", {})
+    for model_name, result in results.items():
+        if "error" in result:
+            continue
+        profile["models"][model_name] = {
+            "rss_gb": result["peak_rss_mb"] / 1024,
+            "rtf": result["rtf"],
+            "load_time_seconds": result["load_time_seconds"],
+        }
+    save_profile(profile)
+    print(f"Calibration profile saved to {get_profile_path()}")
+    return profile
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Measure each model on this machine and recommend one.")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="Models to probe (default: all that fit in available RAM)")
+    parser.add_argument("--probe-seconds", type=int, default=PROBE_SECONDS, help="Length of the probe clip")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help="Required real-time factor, processing time / audio time (default: 1.0)")
+    parser.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    parser.add_argument("--show", action="store_true", help="Only show the current profile and recommendation")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    profile = load_profile() if args.show else calibrate(args.models, args.probe_seconds, args.device)
+
+    cpu_count = os.cpu_count() or 1
+    for model_name in candidate_models():
+        rtf = model_rtf(model_name, cpu_count, profile)
+        measured = model_name in (profile or {}).get("models", {})
+        rtf_text = f"{rtf:.3f}" if rtf is not None else "n/a"
+        print(f"{model_name:>10}: needs {model_ram_need_gb(model_name, profile):5.1f} GB, RTF {rtf_text}"
+              f"{'' if measured else ' (estimate)'}")
+
+    model, reason = recommend_model(get_available_ram_gb(), cpu_count, args.target_rtf, profile)
+    print(f"Recommended: {model} ({reason})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
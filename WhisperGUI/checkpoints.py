@@ -0,0 +1,200 @@
+# checkpoints.py
+# Resumable window-by-window transcription.
+#
+# While a long file is decoded window by window, every finished window is
+# appended to a checkpoint file: its segments, the decoder prompt carried into
+# the next window, the detected language and the audio offset to continue from.
+# If the app crashes, the machine sleeps or the job is cancelled, transcribing
+# the same audio again with the same model and options picks up after the last
+# finished window instead of starting over.
+#
+# Checkpoints live in ~/.cache/whisper_gui/checkpoints, named by the transcript
+# cache key (audio content hash, model and decode options), so a changed file or
+# different settings never resume someone else's progress. The file is JSON
+# lines, one per window, so each checkpoint costs one small append rather than
+# rewriting everything decoded so far; a line cut short by a crash is ignored.
+#
+# Two runs can share a key (the same recording twice in a batch, or the GUI and
+# the server on the same file). The run that creates <key>.lock owns the
+# checkpoint until it finishes; any other run with that key goes without one.
+# A lock left by a process that no longer exists is taken over.
+
+import json
+import os
+import time
+
+import psutil
+
+from app_paths import get_cache_dir
+
+# Bumped whenever the content of checkpoint files changes
+CHECKPOINT_FORMAT_VERSION = 1
+# Appends are flushed every window but only forced to disk this often
+CHECKPOINT_SYNC_SECONDS = 30
+# Checkpoints of transcriptions that were never resumed are deleted after this long
+CHECKPOINT_MAX_AGE_DAYS = 7
+
+_pruned = False
+
+
+def get_checkpoint_path(key):
+    return os.path.join(get_cache_dir("checkpoints"), f"{key}.jsonl")
+
+
+def _lock_owner_alive(lock_path):
+    """True unless the lock file names a process that has exited (or can't be read)."""
+    try:
+        with open(lock_path, encoding="utf-8") as f:
+            pid = int(f.read().strip())
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError):
+        return True # Being written right now; leave it to its owner
+    return psutil.pid_exists(pid)
+
+
+def prune_checkpoints(max_age_days=CHECKPOINT_MAX_AGE_DAYS):
+    """Deletes checkpoints that have not been written for max_age_days, and locks of exited processes."""
+    checkpoint_dir = get_cache_dir("checkpoints")
+    cutoff = time.time() - max_age_days * 24 * 3600
+    for name in os.listdir(checkpoint_dir):
+        path = os.path.join(checkpoint_dir, name)
+        try:
+            if name.endswith(".lock"):
+                if not _lock_owner_alive(path):
+                    os.remove(path)
+            elif os.path.getmtime(path) < cutoff and not os.path.exists(path[:-len(".jsonl")] + ".lock"):
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class Checkpoint:
+    """
+    Progress of one transcription. acquire() must succeed before anything
+    else; then load() returns the state to resume from, add_window() records a
+    finished window, and remove() is called once the transcript is complete.
+    """
+
+    def __init__(self, key, audio_samples):
+        global _pruned
+        if not _pruned:
+            _pruned = True
+            prune_checkpoints()
+        self.path = get_checkpoint_path(key)
+        self.lock_path = self.path[:-len(".jsonl")] + ".lock"
+        self.audio_samples = audio_samples
+        self._file = None
+        self._locked = False
+        self._last_sync = time.time()
+
+    def acquire(self):
+        """
+        Takes the checkpoint for this run. Returns False if another live run
+        holds it; that run must then go without a checkpoint.
+        """
+        for _ in range(2):
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if _lock_owner_alive(self.lock_path):
+                    return False
+                try:
+                    os.remove(self.lock_path) # Left by a crashed run; its checkpoint is ours to resume
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(os.getpid()))
+            self._locked = True
+            return True
+        return False
+
+    def release(self):
+        if self._locked:
+            self._locked = False
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+
+    def load(self):
+        """
+        Returns {"seek", "prompt", "language", "fallbacks", "next_segment_id",
+        "segments"} after the last finished window, or None if there is nothing to resume.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        if not lines:
+            return None
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return None
+        if header.get("version") != CHECKPOINT_FORMAT_VERSION or header.get("audio_samples") != self.audio_samples:
+            return None
+
+        state = None
+        segments = []
+        for line in lines[1:]:
+            try:
+                window = json.loads(line)
+            except ValueError:
+                break # Cut short by a crash; everything before it is intact
+            segments.extend(window.pop("segments"))
+            state = window
+        if state is None:
+            return None
+        return dict(state, segments=segments)
+
+    def add_window(self, state, segments):
+        """Appends one finished window: its segments and the state to continue from."""
+        if self._file is None:
+            resuming = os.path.exists(self.path) and self.load() is not None
+            if resuming:
+                self._drop_partial_line()
+            self._file = open(self.path, "a" if resuming else "w", encoding="utf-8")
+            if not resuming:
+                self._file.write(json.dumps({"version": CHECKPOINT_FORMAT_VERSION,
+                                             "audio_samples": self.audio_samples}) + "\n")
+        record = {
+            "seek": state["seek"],
+            "prompt": state.get("prompt"),
+            "language": state.get("language"),
+            "fallbacks": state.get("fallbacks", 0),
+            "next_segment_id": state.get("next_segment_id", 0),
+            "segments": segments,
+        }
+        self._file.write(json.dumps(record, default=float) + "\n")
+        self._file.flush()
+        if time.time() - self._last_sync >= CHECKPOINT_SYNC_SECONDS:
+            os.fsync(self._file.fileno())
+            self._last_sync = time.time()
+
+    def _drop_partial_line(self):
+        """Truncates a last line left incomplete by a crash, so appends start on a line of their own."""
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def close(self):
+        """Keeps the checkpoint for a later resume (after a cancel or an error) and releases it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.release()
+
+    def remove(self):
+        """The transcript is complete, so there is nothing left to resume."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.release()
@@ -0,0 +1,141 @@
+# chunked.py
+# Long-file mode: cuts one recording at quiet points and transcribes the chunks
+# in parallel worker processes, then stitches the segments back together with
+# timestamps on the original timeline.
+#
+# Workers memory-map the decoded .npy from the audio cache, so chunks are never
+# pickled between processes, and on the CPU they also map one shared copy of the
+# model weights (see mmap_weights.py).
+
+import collections
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engine import TranscriptionEngine, SAMPLE_RATE
+from audio_cache import get_audio_cache
+from transcript_cache import get_transcript_cache, hash_file, make_cache_key
+from vad import find_split_points
+from quantization import DEFAULT_PRECISION
+from mmap_weights import prepare_shared_weights
+from decode_presets import WHISPER_TEMPERATURES
+from profiling import count_fallbacks
+from thread_plan import plan_for_this_machine, describe_plan, make_slot_counter, init_worker_threads
+
+# Chunks shorter than this are not worth a separate decode (and lose context)
+MIN_CHUNK_SECONDS = 60
+# More chunks than workers evens out chunks that are denser in speech
+CHUNKS_PER_WORKER = 2
+
+# Each worker process keeps its own engine for its whole lifetime
+_worker_engine = None
+
+
+def _init_worker(model_name, device, thread_plan, slot_counter, precision):
+    """Pool initializer: pins the worker to its cores, limits torch threads and loads the model once per worker."""
+    global _worker_engine
+    # Without this every worker would start one thread per core and oversubscribe the CPU
+    init_worker_threads(thread_plan, slot_counter)
+    _worker_engine = TranscriptionEngine(model_name, device=device, precision=precision)
+
+
+def _transcribe_chunk(task):
+    """Transcribes audio[start:end] of the cached .npy file; timestamps are made global."""
+    audio_path, start, end, options = task
+    audio = np.load(audio_path, mmap_mode="r")
+    chunk = np.array(audio[start:end], dtype=np.float32)
+    options.setdefault("fp16", False)
+    with count_fallbacks(options.get("temperature", WHISPER_TEMPERATURES)) as decodes:
+        result = _worker_engine.model.transcribe(chunk, **options)
+
+    offset = start / SAMPLE_RATE
+    segments = []
+    for segment in result["segments"]:
+        segment = dict(segment, start=segment["start"] + offset, end=segment["end"] + offset)
+        if "words" in segment:
+            segment["words"] = [dict(word, start=word["start"] + offset, end=word["end"] + offset)
+                                for word in segment["words"]]
+        segments.append(segment)
+    return {"segments": segments, "language": result.get("language"), "fallbacks": decodes["fallbacks"]}
+
+
+def plan_chunks(audio, workers, min_chunk_seconds=MIN_CHUNK_SECONDS, chunks_per_worker=CHUNKS_PER_WORKER):
+    """Returns (start, end) sample ranges that cover the audio, cut at quiet points."""
+    duration = len(audio) / SAMPLE_RATE
+    n_chunks = max(1, min(workers * chunks_per_worker, int(duration // min_chunk_seconds)))
+    bounds = [0] + find_split_points(audio, duration / n_chunks) + [len(audio)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class ChunkedTranscriber:
+    """A pool of worker processes that each hold the model, reused across files."""
+
+    def __init__(self, model_name, workers=None, device=None, precision=DEFAULT_PRECISION):
+        self.model_name = model_name
+        self.precision = precision
+        self.workers = workers or os.cpu_count() or 1
+        thread_plan = plan_for_this_machine(self.workers)
+        print(f"Starting {self.workers} chunk worker(s) for model '{model_name}' ({describe_plan(thread_plan)})")
+        if precision == DEFAULT_PRECISION:
+            prepare_shared_weights(model_name, device) # The workers then map one shared copy
+        context = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_name, device, thread_plan, make_slot_counter(context), precision),
+        )
+
+    def transcribe(self, file_path, **options):
+        """Transcribes one file across all workers; returns a result dict like TranscriptionEngine."""
+        start_time = time.time()
+        options.setdefault("fp16", False)
+        # Not the whole-file key: chunks are decoded independently, so the result can differ from model.transcribe
+        key_options = dict(options, chunked=True)
+        if self.precision != DEFAULT_PRECISION:
+            key_options["precision"] = self.precision
+        cache_key = make_cache_key(hash_file(file_path), self.model_name, key_options)
+        cached_result = get_transcript_cache().get(cache_key)
+        if cached_result is not None:
+            return dict(cached_result, elapsed_time=time.time() - start_time,
+                        model=self.model_name, cached=True, chunks=0)
+
+        audio_path = get_audio_cache().decoded_path(file_path)
+        chunks = plan_chunks(np.load(audio_path, mmap_mode="r"), self.workers)
+
+        tasks = [(audio_path, start, end, dict(options)) for start, end in chunks]
+        # map() keeps chunk order, so segments come back already sorted
+        chunk_results = list(self._executor.map(_transcribe_chunk, tasks))
+
+        segments = []
+        for chunk_result in chunk_results:
+            for segment in chunk_result["segments"]:
+                segments.append(dict(segment, id=len(segments)))
+        # Chunks detect their language independently unless one was forced
+        languages = collections.Counter(r["language"] for r in chunk_results if r["language"])
+
+        result = {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": languages.most_common(1)[0][0] if languages else None,
+            "audio_duration": chunks[-1][1] / SAMPLE_RATE if chunks else 0.0,
+            "elapsed_time": time.time() - start_time,
+            "model": self.model_name,
+            "chunks": len(chunks),
+            "fallbacks": sum(r["fallbacks"] for r in chunk_results),
+            "cached": False,
+        }
+        get_transcript_cache().put(cache_key, result)
+        return result
+
+    def close(self):
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
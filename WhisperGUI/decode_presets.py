@@ -0,0 +1,100 @@
+# decode_presets.py
+# Named speed/accuracy trade-offs for Whisper's decoding options.
+#
+# By default Whisper decodes greedily and, when a window's output looks wrong
+# (too repetitive or too unlikely), decodes it again at up to five higher
+# temperatures with best_of=5 samples each. Those re-decodes can cost more than
+# the first pass. A preset fixes beam size, best_of, the temperature fallback
+# schedule and whether the previous window's text is used as a prompt; any
+# single option can still be overridden on top of it.
+
+# Whisper's own temperature fallback schedule (whisper.transcribe's default)
+WHISPER_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+PRESETS = {
+    # Greedy, never re-decoded, no prompt carried between windows
+    "fastest": {
+        "beam_size": None,
+        "best_of": None,
+        "temperature": (0.0,),
+        "condition_on_previous_text": False,
+    },
+    # Greedy, with a short fallback schedule for windows that fail the checks
+    "balanced": {
+        "beam_size": None,
+        "best_of": 2,
+        "temperature": (0.0, 0.4, 0.8),
+        "condition_on_previous_text": True,
+    },
+    # Beam search and Whisper's full fallback schedule
+    "accurate": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": WHISPER_TEMPERATURES,
+        "condition_on_previous_text": True,
+    },
+}
+DEFAULT_PRESET = "balanced"
+TASKS = ("transcribe", "translate")
+
+
+def resolve_decode_options(preset=DEFAULT_PRESET, **overrides):
+    """
+    Returns the transcribe() options for a preset with overrides applied.
+    Overrides that are None are left to the preset. language=None (or "auto")
+    lets Whisper detect the language; a known language skips detection.
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown preset '{preset}', expected one of {', '.join(PRESETS)}")
+    options = dict(PRESETS[preset])
+    for name, value in overrides.items():
+        if value is not None:
+            options[name] = tuple(value) if name == "temperature" else value
+    if options.get("language") == "auto":
+        del options["language"]
+    if options.get("task", "transcribe") not in TASKS:
+        raise ValueError(f"Unknown task '{options['task']}', expected one of {', '.join(TASKS)}")
+    # None means Whisper's default, so it is left out (and out of transcript cache keys)
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def get_language_codes():
+    """Language codes Whisper accepts. Imports whisper, so call it off the Tk thread."""
+    from whisper.tokenizer import LANGUAGES
+    return sorted(LANGUAGES)
+
+
+# --- Command line ---
+
+def add_decode_arguments(parser):
+    """Adds --preset and the per-option overrides to an argparse parser."""
+    group = parser.add_argument_group("decoding")
+    group.add_argument("--preset", default=DEFAULT_PRESET, choices=list(PRESETS),
+                       help=f"Speed/accuracy preset (default: {DEFAULT_PRESET})")
+    group.add_argument("--language", default=None,
+                       help="Spoken language code, e.g. 'en'; skips language detection (default: detect)")
+    group.add_argument("--task", default=None, choices=TASKS, help="Transcribe, or translate to English")
+    group.add_argument("--beam-size", type=int, default=None, help="Beam size at temperature 0 (overrides the preset)")
+    group.add_argument("--best-of", type=int, default=None,
+                       help="Samples per fallback temperature (overrides the preset)")
+    group.add_argument("--temperature", type=float, nargs="+", default=None,
+                       help="Temperature fallback schedule, e.g. '0 0.5 1' (overrides the preset)")
+    group.add_argument("--condition-on-previous-text", default=None, action="store_true",
+                       help="Prompt each window with the previous window's text (overrides the preset)")
+    group.add_argument("--no-condition-on-previous-text", dest="condition_on_previous_text", default=None,
+                       action="store_false",
+                       help="Decode each window without a prompt (overrides the preset)")
+    return group
+
+
+# Everything add_decode_arguments adds, as resolve_decode_options keywords
+DECODE_SETTINGS = ("preset", "language", "task", "beam_size", "best_of", "temperature", "condition_on_previous_text")
+
+
+def decode_settings_from_args(args):
+    """The preset and overrides given on the command line, unresolved."""
+    return {name: getattr(args, name) for name in DECODE_SETTINGS}
+
+
+def decode_options_from_args(args):
+    return resolve_decode_options(**decode_settings_from_args(args))
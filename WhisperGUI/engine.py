@@ -0,0 +1,419 @@
+# engine.py
+# Model loading and transcription logic shared by the GUI and the headless tools.
+# Nothing in here depends on Tk, so it can run inside worker processes.
+
+import time
+import weakref
+import numpy as np
+
+# Re-exported so callers only need to import the engine
+import model_registry
+from model_registry import MODEL_RAM_REQUIREMENTS, PRIORITY_MODELS
+from model_cache import get_model_cache
+from transcript_cache import get_transcript_cache, hash_file, make_cache_key
+from audio_cache import load_audio
+from vad import find_speech_regions, is_plausible_speech, CompactAudio
+from quantization import DEFAULT_PRECISION, check_precision, get_loader
+from decode_presets import WHISPER_TEMPERATURES
+from checkpoints import Checkpoint
+import profiling
+
+# Whisper always resamples to 16 kHz mono before decoding (whisper.audio.SAMPLE_RATE).
+# Spelled out rather than read from whisper so importing the engine does not import torch.
+SAMPLE_RATE = 16000
+# Streaming mode decodes and emits the audio one Whisper window at a time (whisper.audio.CHUNK_LENGTH)
+WINDOW_SECONDS = 30
+# A segment ending this close to a window cut is re-decoded with the next window,
+# so words straddling the cut are not split in two
+WINDOW_TAIL_SECONDS = 1.0
+# How much of the previous window's text is carried over as the decoder prompt
+PROMPT_CHARS = 400
+# Longer files are always decoded window by window: a single whole-file
+# model.transcribe call would build the log-mel of the entire recording in RAM
+MAX_WHOLE_FILE_SECONDS = 20 * 60
+# Length of the generated silence decoded once after loading, see warm_up()
+WARMUP_SECONDS = 1.0
+
+# Models that already ran their warm-up inference in this process
+_warmed_up_models = weakref.WeakSet()
+
+
+def __getattr__(name):
+    # The model lists need whisper, so they are resolved on first use
+    if name in ("ALL_AVAILABLE_MODELS", "SORTED_MODELS"):
+        return getattr(model_registry, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class TranscriptionCancelled(Exception):
+    """Raised between windows when a transcription's cancel_event is set."""
+
+
+class TranscriptionEngine:
+    """
+    Holds the active Whisper model and transcribes files with it.
+    Models come from the process-wide cache, so switching back to a model
+    that was used recently does not reload it from disk.
+
+    With lazy=True the model is only loaded on the first transcript cache miss,
+    so runs that are fully cached never load a model at all.
+
+    precision="int8" runs a dynamically quantised copy of the model on the CPU,
+    see quantization.py.
+
+    With use_checkpoints=True, window-by-window transcriptions save their
+    progress after every window and resume from it when the same audio is
+    transcribed again with the same model and options, see checkpoints.py.
+    """
+
+    def __init__(self, model_name=None, device=None, lazy=False, use_transcript_cache=True,
+                 precision=DEFAULT_PRECISION, use_checkpoints=True):
+        check_precision(precision, device)
+        self.model = None
+        self.model_name = None
+        self.device = device
+        self.precision = precision
+        self.use_transcript_cache = use_transcript_cache
+        self.use_checkpoints = use_checkpoints
+        if model_name:
+            if lazy:
+                self.model_name = model_name
+            else:
+                self.load_model(model_name)
+
+    def load_model(self, model_name):
+        """Makes the given Whisper model the active one, loading it if it isn't cached."""
+        print(f"Attempting to load model: {model_name}")
+        self.model = None # Drop our reference so the cache can evict it if needed
+        self.model = get_model_cache().get(model_name, device=self._model_device(), dtype=self.precision,
+                                           loader=get_loader(self.precision))
+        profiling.instrument_model(self.model)
+        self.model_name = model_name
+        return self.model
+
+    def _model_device(self):
+        # Quantised models only exist on the CPU, even when a GPU is available
+        return "cpu" if self.precision == "int8" else self.device
+
+    def warm_up(self, seconds=WARMUP_SECONDS):
+        """
+        Runs one short inference on silence so one-time costs (kernel selection,
+        allocator growth, lazy initialisation) are paid now rather than by the
+        first real transcription. Returns the time taken, or 0.0 if this model
+        was already warmed up.
+        """
+        if self.model is None:
+            self.load_model(self.model_name)
+        if self.model in _warmed_up_models:
+            return 0.0
+        start_time = time.time()
+        silence = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+        # Whisper pads every input to a full window, so this exercises the same encoder shapes as real audio
+        self.model.transcribe(silence, fp16=False, temperature=0.0, condition_on_previous_text=False)
+        _warmed_up_models.add(self.model)
+        return time.time() - start_time
+
+    def use_cached_model(self, model_name):
+        """Switches to model_name only if it is already resident. Returns the model or None."""
+        model = get_model_cache().peek(model_name, device=self._model_device(), dtype=self.precision)
+        if model is not None:
+            self.model = model
+            self.model_name = model_name
+        return model
+
+    def transcribe(self, file_path, stream=False, on_segment=None, on_progress=None, cancel_event=None,
+                   vad=False, trace=None, **options):
+        """
+        Transcribes a single file with the loaded model.
+        Returns Whisper's result dict, extended with the audio duration and the
+        wall-clock time spent so callers can compute throughput.
+
+        With stream=True (implied by on_segment) the audio is decoded window by
+        window and on_segment(segment) is called as soon as each segment is ready.
+
+        Finished results are stored in the transcript cache; a hit is returned
+        (and replayed through on_segment) without touching the model.
+
+        on_progress(fraction) and cancel_event (a threading.Event checked between
+        windows) also imply window-by-window decoding; a set cancel_event raises
+        TranscriptionCancelled.
+
+        With vad=True only the speech regions found by an energy pre-pass are
+        decoded, back to back; timestamps are mapped back to the original audio
+        and result["vad"] reports how much silence was skipped.
+
+        options are Whisper's decode options (see decode_presets.py);
+        result["fallbacks"] counts the windows Whisper had to decode again.
+
+        Window-by-window runs resume from a checkpoint left by an interrupted
+        run of the same audio, model and options; result["resumed_seconds"]
+        is how much audio had already been decoded then.
+
+        trace (a profiling.Trace) records how long each stage took; without one,
+        the trace active on this thread, if any, is used.
+        """
+        if self.model_name is None:
+            raise RuntimeError("No Whisper model loaded")
+        with profiling.activate(trace or profiling.current_trace()):
+            profiling.set_first_temperature(options.get("temperature", WHISPER_TEMPERATURES))
+            return self._transcribe(file_path, stream, on_segment, on_progress, cancel_event, vad, options)
+
+    def _transcribe(self, file_path, stream, on_segment, on_progress, cancel_event, vad, options):
+
+        # fp16=False is generally safer for CPU and potentially Apple Silicon MPS
+        options.setdefault("fp16", False)
+
+        start_time = time.time()
+        # Streaming or any hook means decoding window by window, which gives a different transcript from
+        # model.transcribe over the whole file; long files are decoded window by window either way
+        windowed = stream or any(hook is not None for hook in (on_segment, on_progress, cancel_event))
+        cache_key = None
+        if self.use_transcript_cache or self.use_checkpoints:
+            # Also names the checkpoint: a run only resumes one with the same audio, model and options
+            key_options = dict(options)
+            if vad:
+                key_options["vad"] = True
+            if windowed:
+                key_options["windowed"] = True
+            if self.precision != DEFAULT_PRECISION:
+                key_options["precision"] = self.precision # fp32 keys stay as they were
+            cache_key = make_cache_key(hash_file(file_path), self.model_name, key_options)
+        if self.use_transcript_cache:
+            cached_result = get_transcript_cache().get(cache_key)
+            if cached_result is not None:
+                print(f"Transcript cache hit for: {file_path}")
+                if on_progress is not None:
+                    on_progress(1.0)
+                return self._replay_cached(cached_result, on_segment, start_time)
+
+        # Decoded once per file and memory-mapped from the audio cache afterwards
+        with profiling.stage(profiling.AUDIO_DECODE):
+            audio = load_audio(file_path)
+        audio_duration = len(audio) / SAMPLE_RATE
+        speech = None
+        vad_fallback = False
+        if vad:
+            with profiling.stage(profiling.VAD):
+                regions = find_speech_regions(audio)
+            if is_plausible_speech(regions, len(audio)):
+                # From here on the model only sees the speech regions, concatenated
+                speech = CompactAudio(audio, regions)
+                audio = speech
+            else:
+                # Rather decode silence than lose a file the energy pre-pass misjudged
+                print(f"VAD found almost no speech in {file_path}; decoding the whole file")
+                vad_fallback = True
+
+        remap = speech.remap_segment if speech is not None else None
+        if len(audio) == 0:
+            result = {"text": "", "segments": [], "language": options.get("language"), "fallbacks": 0}
+        elif windowed or len(audio) > MAX_WHOLE_FILE_SECONDS * SAMPLE_RATE:
+            if self.model is None:
+                self.load_model(self.model_name)
+            checkpoint = Checkpoint(cache_key, len(audio)) if self.use_checkpoints else None
+            if checkpoint is not None and not checkpoint.acquire():
+                print(f"Another run is transcribing the same audio with the same settings; "
+                      f"not checkpointing {file_path}")
+                checkpoint = None
+            try:
+                result = self._transcribe_streaming(audio, on_segment, start_time, options, on_progress=on_progress,
+                                                    cancel_event=cancel_event, remap=remap, checkpoint=checkpoint)
+            finally:
+                if checkpoint is not None:
+                    checkpoint.release() # Already released unless resuming failed before decoding started
+        else:
+            if self.model is None:
+                self.load_model(self.model_name)
+            with profiling.count_fallbacks(options.get("temperature", WHISPER_TEMPERATURES)) as decodes:
+                result = self.model.transcribe(np.asarray(audio), **options)
+            result["fallbacks"] = decodes["fallbacks"]
+            if remap is not None:
+                result["segments"] = [remap(segment) for segment in result["segments"]]
+        elapsed_time = time.time() - start_time
+
+        if speech is not None:
+            speech_seconds = len(speech) / SAMPLE_RATE
+            result["vad"] = {
+                "speech_seconds": speech_seconds,
+                "skipped_seconds": audio_duration - speech_seconds,
+                "regions": len(speech.regions),
+            }
+        elif vad_fallback:
+            result["vad"] = {"speech_seconds": audio_duration, "skipped_seconds": 0.0, "regions": 0, "fallback": True}
+        result["audio_duration"] = audio_duration
+        result["elapsed_time"] = elapsed_time
+        result["model"] = self.model_name
+        result["precision"] = self.precision
+        result["cached"] = False
+        # An empty transcript after VAD is more likely a detection miss than a silent file; don't keep it
+        if self.use_transcript_cache and not (vad and not result["segments"]):
+            get_transcript_cache().put(cache_key, result)
+        return result
+
+    def _replay_cached(self, cached_result, on_segment, start_time):
+        """Turns a transcript cache entry into a normal result, streaming its segments if asked."""
+        result = dict(cached_result)
+        if on_segment is not None:
+            for segment in result["segments"]:
+                on_segment(segment)
+            result["time_to_first_segment"] = time.time() - start_time
+        result["audio_duration"] = result.get("audio_duration") or 0.0
+        result["elapsed_time"] = time.time() - start_time
+        result["model"] = self.model_name
+        result["precision"] = self.precision
+        result["cached"] = True
+        return result
+
+    def _transcribe_streaming(self, audio, on_segment, start_time, options, on_progress=None, cancel_event=None,
+                              remap=None, checkpoint=None):
+        """
+        Runs iter_segments, forwarding each segment (passed through remap, if given) and timing the first one.
+        With a checkpoint, resumes after its last window and records every window finished here.
+        """
+        segments = []
+        time_to_first_segment = None
+        state = {}
+        prompt = options.pop("initial_prompt", None)
+        resumed = checkpoint.load() if checkpoint is not None else None
+        if resumed is not None:
+            # The segments were stored already remapped, so they are replayed as they are
+            segments = resumed.pop("segments")
+            state.update(resumed)
+            prompt = state["prompt"]
+            if state.get("language"):
+                options["language"] = state["language"]
+            print(f"Resuming from checkpoint at {format_timestamp(state['seek'] / SAMPLE_RATE)} "
+                  f"({len(segments)} segments already decoded)")
+            if segments:
+                time_to_first_segment = time.time() - start_time
+            if on_segment is not None:
+                for segment in segments:
+                    on_segment(segment)
+            if on_progress is not None:
+                on_progress(min(1.0, state["seek"] / len(audio)))
+        resumed_seconds = state.get("seek", 0) / SAMPLE_RATE
+
+        window_segments = []
+
+        def on_window(state):
+            checkpoint.add_window(state, window_segments)
+            window_segments.clear()
+
+        try:
+            for segment in self.iter_segments(audio, start_sample=state.get("seek", 0), initial_prompt=prompt,
+                                              state=state, on_progress=on_progress, cancel_event=cancel_event,
+                                              on_window=on_window if checkpoint is not None else None, **options):
+                if remap is not None:
+                    segment = remap(segment)
+                if time_to_first_segment is None:
+                    time_to_first_segment = time.time() - start_time
+                segments.append(segment)
+                window_segments.append(segment)
+                if on_segment is not None:
+                    on_segment(segment)
+        except BaseException:
+            if checkpoint is not None:
+                checkpoint.close() # Kept if decoding stopped early, so the next run resumes from it
+            raise
+        if checkpoint is not None:
+            checkpoint.remove() # Deleted before the lock is released, so no other run picks it up
+
+        result = {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": state.get("language"),
+            "fallbacks": state.get("fallbacks", 0),
+            "time_to_first_segment": time_to_first_segment,
+        }
+        if resumed_seconds:
+            result["resumed_seconds"] = resumed_seconds
+        return result
+
+    def iter_segments(self, audio, start_offset=0.0, initial_prompt=None, state=None, on_progress=None,
+                      cancel_event=None, on_window=None, start_sample=None, **options):
+        """
+        Yields segments one Whisper window (30 s) at a time, with start/end
+        timestamps on the timeline of the full audio. The language detected in
+        the first window is reused for the rest, and each window is prompted with
+        the tail of the previous window's text like Whisper does internally.
+        If a state dict is passed it is kept up to date with the detected
+        language, the prompt, the sample offset of the next window and the
+        number of temperature fallback re-decodes so far.
+
+        on_progress(fraction) is called after every window with the share of
+        the audio decoded so far, and on_window(state) once all of a window's
+        segments have been yielded. cancel_event is checked before each window.
+        start_sample, if given, overrides start_offset with an exact sample offset.
+        """
+        options.setdefault("fp16", False)
+        condition_on_previous_text = options.get("condition_on_previous_text", True)
+        window_samples = int(WINDOW_SECONDS * SAMPLE_RATE)
+        seek = start_sample if start_sample is not None else int(start_offset * SAMPLE_RATE)
+        prompt = initial_prompt
+        if state is None:
+            state = {}
+        state.setdefault("fallbacks", 0)
+        segment_id = state.get("next_segment_id", 0)
+        temperature = options.get("temperature", WHISPER_TEMPERATURES)
+
+        while seek < len(audio):
+            if cancel_event is not None and cancel_event.is_set():
+                raise TranscriptionCancelled()
+            # np.array copies just this window, even if audio is memory-mapped
+            window = np.array(audio[seek:seek + window_samples], dtype=np.float32)
+            is_last_window = seek + window_samples >= len(audio)
+            with profiling.stage(profiling.WINDOW, seek=seek), profiling.count_fallbacks(temperature) as decodes:
+                result = self.model.transcribe(window, initial_prompt=prompt, **options)
+            options["language"] = result.get("language") or options.get("language")
+            state["language"] = options["language"]
+            state["fallbacks"] += decodes["fallbacks"]
+
+            window_segments = result["segments"]
+            next_seek = seek + len(window)
+            # Hand a segment that runs into the cut over to the next window
+            if not is_last_window and len(window_segments) > 1:
+                tail = window_segments[-1]
+                if tail["end"] >= WINDOW_SECONDS - WINDOW_TAIL_SECONDS and tail["start"] > 0:
+                    window_segments = window_segments[:-1]
+                    next_seek = seek + int(tail["start"] * SAMPLE_RATE)
+
+            offset = seek / SAMPLE_RATE
+            window_text = ""
+            for segment in window_segments:
+                segment = dict(segment, id=segment_id, start=segment["start"] + offset, end=segment["end"] + offset)
+                if "words" in segment:
+                    segment["words"] = [dict(word, start=word["start"] + offset, end=word["end"] + offset)
+                                        for word in segment["words"]]
+                segment_id += 1
+                window_text += segment["text"]
+                yield segment
+
+            if condition_on_previous_text and window_text.strip():
+                prompt = window_text.strip()[-PROMPT_CHARS:]
+            elif not condition_on_previous_text:
+                prompt = initial_prompt
+            seek = next_seek
+            state["seek"] = seek
+            state["prompt"] = prompt
+            state["next_segment_id"] = segment_id
+            if on_window is not None:
+                on_window(state)
+            if on_progress is not None:
+                on_progress(min(1.0, seek / len(audio)))
+
+
+def format_timestamp(seconds):
+    """Formats seconds as [HH:]MM:SS for display next to streamed segments."""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def audio_throughput(audio_seconds, wall_seconds):
+    """Audio-seconds processed per wall-second (higher is faster)."""
+    if wall_seconds <= 0:
+        return 0.0
+    return audio_seconds / wall_seconds
@@ -0,0 +1,189 @@
+# governor.py
+# Adapts the job scheduler to memory and CPU pressure while jobs run.
+#
+# The scheduler asks the governor before it starts each queued job. The
+# governor samples psutil (available RAM, how fast swap is growing, and how
+# much CPU other processes use) and answers with a pressure level:
+#
+#   normal    jobs start up to the scheduler's concurrency limit
+#   high      only one job runs at a time
+#   critical  no queued job starts until pressure drops (a queue with nothing
+#             running waits at most MAX_PAUSE_SECONDS, so it never stalls forever)
+#
+# A job whose model does not fit in the RAM that is left is started with the
+# largest smaller model from SORTED_MODELS that does fit, instead of letting
+# the load push the machine into swap. Every change of level and every
+# downgrade is printed with the readings behind it and kept in `decisions`,
+# so the thresholds below can be tuned from real runs.
+
+import collections
+import time
+
+import psutil
+
+from model_registry import estimate_model_ram_gb, get_sorted_models
+
+# Pressure levels
+NORMAL = "normal"
+HIGH = "high"
+CRITICAL = "critical"
+LEVELS = (NORMAL, HIGH, CRITICAL)
+
+# Readings are taken at most this often
+SAMPLE_SECONDS = 2.0
+# Available RAM below which the level is high / critical
+HIGH_AVAILABLE_GB = 3.0
+CRITICAL_AVAILABLE_GB = 1.0
+# Swap growth (MB per second) above which the level is high / critical
+HIGH_SWAP_GROWTH_MB_S = 8.0
+CRITICAL_SWAP_GROWTH_MB_S = 32.0
+# CPU used by other processes, as a share of the whole machine, above which the level is high
+HIGH_OTHER_CPU_PERCENT = 85.0
+# Calmer readings needed in a row before the level is lowered, so it doesn't flap
+RECOVERY_SAMPLES = 3
+# Longest wait at the critical level while no job is running
+MAX_PAUSE_SECONDS = 60.0
+# Decisions kept for status reports
+MAX_DECISIONS = 100
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+
+def smaller_models(model_name, precision="fp32"):
+    """Models needing less RAM than model_name, largest first. English-only models only replace English-only ones."""
+    needed_gb = estimate_model_ram_gb(model_name, precision)
+    english_only = model_name.endswith(".en")
+    candidates = [name for name in get_sorted_models()
+                  if name.endswith(".en") == english_only and estimate_model_ram_gb(name, precision) < needed_gb]
+    # sorted() is stable, so models with the same estimate keep their dropdown order
+    return sorted(candidates, key=lambda name: -estimate_model_ram_gb(name, precision))
+
+
+class ResourceGovernor:
+    """Samples system load and decides how many jobs may run and which model size they may load."""
+
+    def __init__(self, sample_seconds=SAMPLE_SECONDS, allow_smaller_model=True):
+        self.sample_seconds = sample_seconds
+        self.allow_smaller_model = allow_smaller_model
+        self.level = NORMAL
+        self.readings = None
+        self.decisions = collections.deque(maxlen=MAX_DECISIONS)
+        self._process = psutil.Process()
+        self._process.cpu_percent() # The first call only starts the measurement
+        psutil.cpu_percent()
+        self._last_sample = None
+        self._last_swap_used = psutil.swap_memory().used
+        self._calm_samples = 0
+        self._paused_since = None
+
+    def sample(self):
+        """Takes a reading if the last one is older than sample_seconds, and updates the level."""
+        now = time.time()
+        if self._last_sample is not None and now - self._last_sample < self.sample_seconds:
+            return self.readings
+        elapsed = now - self._last_sample if self._last_sample is not None else None
+        self._last_sample = now
+
+        memory = psutil.virtual_memory()
+        swap_used = psutil.swap_memory().used
+        swap_growth = (swap_used - self._last_swap_used) / MB / elapsed if elapsed else 0.0
+        self._last_swap_used = swap_used
+        cpu_count = psutil.cpu_count() or 1
+        own_cpu = self._process.cpu_percent() / cpu_count # Process figures are per core
+        self.readings = {
+            "available_gb": memory.available / GB,
+            "total_gb": memory.total / GB,
+            "swap_used_gb": swap_used / GB,
+            "swap_growth_mb_s": swap_growth,
+            "other_cpu_percent": max(0.0, psutil.cpu_percent() - own_cpu),
+        }
+        self._update_level(self._level_for(self.readings))
+        return self.readings
+
+    def _level_for(self, readings):
+        available_gb = readings["available_gb"]
+        swap_growth = readings["swap_growth_mb_s"]
+        if available_gb < CRITICAL_AVAILABLE_GB or swap_growth > CRITICAL_SWAP_GROWTH_MB_S:
+            return CRITICAL
+        if (available_gb < HIGH_AVAILABLE_GB or swap_growth > HIGH_SWAP_GROWTH_MB_S
+                or readings["other_cpu_percent"] > HIGH_OTHER_CPU_PERCENT):
+            return HIGH
+        return NORMAL
+
+    def _update_level(self, level):
+        """Raises the level at once, lowers it only after RECOVERY_SAMPLES calmer readings."""
+        if LEVELS.index(level) >= LEVELS.index(self.level):
+            self._calm_samples = 0
+            if level != self.level:
+                self._set_level(level)
+            return
+        self._calm_samples += 1
+        if self._calm_samples >= RECOVERY_SAMPLES:
+            self._calm_samples = 0
+            self._set_level(level)
+
+    def _set_level(self, level):
+        previous, self.level = self.level, level
+        self._log("level", f"pressure {previous} -> {level}", previous=previous)
+
+    def concurrency_limit(self, max_jobs):
+        """Jobs that may run at the current level."""
+        if self.level == CRITICAL:
+            return 0
+        if self.level == HIGH:
+            return min(1, max_jobs)
+        return max_jobs
+
+    def may_start(self, running_count, max_jobs):
+        """True if one more job may start now, with running_count jobs already running."""
+        self.sample()
+        if running_count < self.concurrency_limit(max_jobs):
+            if self._paused_since is not None:
+                self._log("resume", "resuming the queue", paused_seconds=time.time() - self._paused_since)
+                self._paused_since = None
+            return True
+        if self.level != CRITICAL:
+            return False
+        if self._paused_since is None:
+            self._paused_since = time.time()
+            self._log("pause", "pausing queued jobs", running=running_count)
+        elif running_count == 0 and time.time() - self._paused_since >= MAX_PAUSE_SECONDS:
+            # Nothing of ours is using the memory; waiting longer won't free it
+            self._log("pause_expired", f"starting a job after {MAX_PAUSE_SECONDS:g}s paused")
+            self._paused_since = None
+            return True
+        return False
+
+    def fit_model(self, model_name, precision, available_gb):
+        """
+        The model a job should load when available_gb is left for it: model_name
+        if it fits, else the largest smaller model that does (or the smallest one
+        if none does). Returns model_name unchanged when downgrades are disabled.
+        """
+        if not self.allow_smaller_model or estimate_model_ram_gb(model_name, precision) <= available_gb:
+            return model_name
+        candidates = smaller_models(model_name, precision)
+        if not candidates:
+            return model_name
+        fitting = [name for name in candidates if estimate_model_ram_gb(name, precision) <= available_gb]
+        return fitting[0] if fitting else candidates[-1]
+
+    def record_downgrade(self, job_id, requested, model_name, precision, available_gb):
+        """Logs that a job was started with a smaller model than it asked for."""
+        self._log("downgrade", f"job {job_id} loads '{model_name}' instead of '{requested}'", job=job_id,
+                  requested=requested, model=model_name, needed_gb=estimate_model_ram_gb(requested, precision),
+                  free_gb=available_gb)
+
+    def _log(self, action, message, **details):
+        decision = dict(details, time=time.time(), action=action, level=self.level, readings=self.readings)
+        self.decisions.append(decision)
+        readings = self.readings
+        if readings is None:
+            print(f"Governor: {message}")
+            return
+        print(f"Governor: {message} (available {readings['available_gb']:.1f} GB, "
+              f"swap {readings['swap_growth_mb_s']:+.1f} MB/s, other processes {readings['other_cpu_percent']:.0f}% CPU)")
+
+    def status(self):
+        return {"level": self.level, "readings": self.readings, "decisions": list(self.decisions)[-10:]}
@@ -0,0 +1,416 @@
+# job_queue.py
+# Background scheduler for transcription jobs, shared by the GUI and other front ends.
+#
+# Jobs wait in a priority queue and run on worker threads. Jobs for different
+# models run side by side when there is RAM for both models; jobs for the same
+# model run one after the other, because a loaded Whisper model must not decode
+# two files at once. Every job reports how much of its audio has been decoded
+# and can be cancelled while queued or between two 30 s windows, and keeps a
+# per-stage profile of its run (see profiling.py). A resource governor (see
+# governor.py) holds queued jobs back, or starts them with a smaller model,
+# while the machine is short of memory.
+#
+# Jobs submitted as batchable (short clips, see batched.py) that wait for the
+# same model with the same options are started together and decoded as one
+# batch, so a burst of short requests shares the encoder and decoder passes
+# instead of queueing one after another.
+
+import contextlib
+import itertools
+import threading
+import time
+
+import psutil
+
+from engine import TranscriptionEngine, TranscriptionCancelled
+from batched import BatchedTranscriber
+from governor import ResourceGovernor
+from model_cache import get_model_cache
+from model_registry import estimate_model_ram_gb
+from profiling import Trace
+from writers import DEFAULT_FORMATS, TranscriptWriter
+from quantization import DEFAULT_PRECISION, check_precision
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Transcriptions running at the same time (each on a different model)
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+# RAM kept free when deciding whether a second model may be loaded
+MEMORY_HEADROOM_GB = 1.5
+# Batchable jobs started together; 1 turns batching off
+DEFAULT_MAX_BATCH_SIZE = 1
+
+GB = 1024 ** 3
+
+
+class Job:
+    """One file to transcribe with one model, plus its live state."""
+
+    def __init__(self, job_id, file_path, model_name, priority=0, options=None, output_base=None,
+                 precision=DEFAULT_PRECISION, output_formats=DEFAULT_FORMATS, batchable=False):
+        self.id = job_id
+        self.file_path = file_path
+        self.model_name = model_name
+        self.requested_model = model_name # model_name differs if the governor started the job with a smaller model
+        self.precision = precision
+        self.priority = priority
+        self.order = job_id # Position among jobs of equal priority; swapped when reordering
+        self.options = dict(options or {})
+        self.output_base = output_base # Transcripts go to <output_base>.<format>; None: not saved
+        self.output_formats = tuple(output_formats)
+        self.batchable = batchable # A clip of at most one window; may be decoded in a batch with others
+        self.batch_size = 1 # Jobs in the batch it ran in
+        self.status = QUEUED
+        self.progress = 0.0
+        self.segments = [] # Appended by the worker thread as they are decoded
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.trace = Trace(f"job {job_id}: {file_path} ({model_name})")
+
+    @property
+    def is_finished(self):
+        return self.status in FINISHED_STATES
+
+    def sort_key(self):
+        return (-self.priority, self.order)
+
+    def batch_key(self):
+        """Jobs with equal keys may be decoded in one batch."""
+        return (self.requested_model, self.precision, repr(sorted(self.options.items())))
+
+
+class JobScheduler:
+    """
+    Runs submitted jobs on background threads. All methods are thread-safe
+    and return immediately, so they can be called from the Tk main loop.
+    """
+
+    def __init__(self, max_concurrent_jobs=DEFAULT_MAX_CONCURRENT_JOBS, device=None, use_governor=True,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_batch_size = max_batch_size
+        self.device = device
+        self.governor = ResourceGovernor() if use_governor else None
+        self._jobs = {} # id -> Job, in submission order
+        self._busy_models = set()
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._shutdown = False
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    # --- Public API ---
+
+    def submit(self, file_path, model_name, priority=0, options=None, output_base=None, precision=DEFAULT_PRECISION,
+               output_formats=DEFAULT_FORMATS, batchable=False):
+        """
+        Queues a file for transcription and returns its Job. With output_base,
+        the transcript is written to <output_base>.<format> for each of
+        output_formats (see writers.py) while it is decoded. batchable marks
+        a clip of at most one window that may be decoded together with others.
+        """
+        check_precision(precision, self.device)
+        with self._condition:
+            job = Job(next(self._ids), file_path, model_name, priority, options, output_base, precision, output_formats,
+                      batchable)
+            self._jobs[job.id] = job
+            self._condition.notify_all()
+        return job
+
+    def cancel(self, job_id):
+        """Cancels a queued job at once, or a running one at its next window."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return False
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+            return True
+
+    def move(self, job_id, offset):
+        """Moves a queued job offset places up (negative) or down (positive) the queue."""
+        with self._condition:
+            queued = self._queued_jobs()
+            job = self._jobs.get(job_id)
+            if job not in queued:
+                return False
+            index = queued.index(job)
+            target_index = max(0, min(len(queued) - 1, index + offset))
+            step = 1 if target_index > index else -1
+            for i in range(index, target_index, step):
+                self._swap_places(queued[i], queued[i + step])
+                queued[i], queued[i + step] = queued[i + step], queued[i]
+            return target_index != index
+
+    def set_priority(self, job_id, priority):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            job.priority = priority
+            self._condition.notify_all()
+            return True
+
+    def prioritise(self, job_id):
+        """Puts a queued job in front of every other queued job."""
+        with self._condition:
+            queued = self._queued_jobs()
+            if not queued:
+                return False
+            return self.set_priority(job_id, max(job.priority for job in queued) + 1)
+
+    def get(self, job_id):
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All jobs for display: running first, then the queue in order, then finished ones."""
+        with self._condition:
+            running = [job for job in self._jobs.values() if job.status == RUNNING]
+            finished = [job for job in self._jobs.values() if job.is_finished]
+            return running + self._queued_jobs() + finished
+
+    def counts(self):
+        """Returns (running, queued) job counts."""
+        with self._condition:
+            running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+            queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            return running, queued
+
+    def remove(self, job_id):
+        """Forgets a finished job. Returns False if it is still queued or running."""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or not job.is_finished:
+                return False
+            del self._jobs[job_id]
+            return True
+
+    def clear_finished(self):
+        with self._condition:
+            for job_id in [job.id for job in self._jobs.values() if job.is_finished]:
+                del self._jobs[job_id]
+
+    @contextlib.contextmanager
+    def using_model(self, model_name):
+        """
+        Holds a model for work outside the queue (e.g. a warm-up run): waits
+        until no job is using it, and keeps jobs for it waiting until released.
+        """
+        with self._condition:
+            while model_name in self._busy_models:
+                self._condition.wait()
+            self._busy_models.add(model_name)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._busy_models.discard(model_name)
+                self._condition.notify_all()
+
+    def shutdown(self, cancel_running=True):
+        """Stops dispatching; queued jobs are cancelled, running ones too unless told otherwise."""
+        with self._condition:
+            self._shutdown = True
+            for job in list(self._jobs.values()):
+                if job.status == QUEUED or (cancel_running and job.status == RUNNING):
+                    self.cancel(job.id)
+            self._condition.notify_all()
+
+    # --- Dispatching ---
+
+    def _queued_jobs(self):
+        return sorted((job for job in self._jobs.values() if job.status == QUEUED), key=Job.sort_key)
+
+    def _swap_places(self, job_a, job_b):
+        job_a.priority, job_b.priority = job_b.priority, job_a.priority
+        job_a.order, job_b.order = job_b.order, job_a.order
+
+    def _job_device(self, job):
+        return "cpu" if job.precision == "int8" else self.device
+
+    def _pinned(self, job):
+        """Keeps the job's model in the cache while it runs."""
+        return get_model_cache().pinned(job.model_name, device=self._job_device(job), dtype=job.precision)
+
+    def _model_for(self, job):
+        """The model a queued job would start with: the one it asked for, unless the governor picks a smaller one."""
+        cache = get_model_cache()
+        if self.governor is None or cache.is_resident(job.requested_model, device=self._job_device(job),
+                                                      dtype=job.precision):
+            return job.requested_model
+        # Idle resident models count as free: the cache evicts them to make room, but never pinned ones
+        idle_gb = sum(estimate_model_ram_gb(key[0], key[2]) for key in cache.keys()
+                      if key[0] not in self._busy_models and not cache.is_pinned(key))
+        available_gb = psutil.virtual_memory().available / GB - MEMORY_HEADROOM_GB + idle_gb
+        return self.governor.fit_model(job.requested_model, job.precision, available_gb)
+
+    def _can_start(self, job, running_count, model_name):
+        """A job may start if its model is free and, when other jobs run, its model fits in RAM."""
+        if model_name in self._busy_models:
+            return False
+        if running_count == 0 or get_model_cache().is_resident(model_name, device=self._job_device(job),
+                                                               dtype=job.precision):
+            return True
+        available_gb = psutil.virtual_memory().available / GB - MEMORY_HEADROOM_GB
+        return estimate_model_ram_gb(model_name, job.precision) <= available_gb
+
+    def _next_runnable(self):
+        """The next job to start and the model to start it with, or None."""
+        running_count = len(self._busy_models)
+        if self.governor is not None:
+            self.governor.sample() # Also while nothing is queued, so levels are logged as they change
+        if running_count >= self.max_concurrent_jobs:
+            return None
+        queued = self._queued_jobs()
+        if not queued:
+            return None
+        if self.governor is not None and not self.governor.may_start(running_count, self.max_concurrent_jobs):
+            return None
+        for job in queued:
+            model_name = self._model_for(job)
+            if self._can_start(job, running_count, model_name):
+                return job, model_name
+        return None
+
+    def _batch_for(self, job):
+        """job plus the queued jobs that can be decoded in the same batch, in queue order."""
+        if not job.batchable or self.max_batch_size <= 1:
+            return [job]
+        key = job.batch_key()
+        companions = [other for other in self._queued_jobs()
+                      if other is not job and other.batchable and other.batch_key() == key]
+        return [job] + companions[:self.max_batch_size - 1]
+
+    def _dispatch_loop(self):
+        with self._condition:
+            while not self._shutdown:
+                runnable = self._next_runnable()
+                if runnable is None:
+                    # Also wake up now and then: free memory can change without any job event
+                    self._condition.wait(timeout=1.0)
+                    continue
+                job, model_name = runnable
+                batch = self._batch_for(job)
+                for batch_job in batch:
+                    if model_name != batch_job.model_name:
+                        self.governor.record_downgrade(batch_job.id, batch_job.requested_model, model_name,
+                                                       batch_job.precision, psutil.virtual_memory().available / GB)
+                        batch_job.model_name = model_name
+                    batch_job.status = RUNNING
+                    batch_job.started_at = time.time()
+                    batch_job.batch_size = len(batch)
+                self._busy_models.add(model_name)
+                if len(batch) == 1:
+                    threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+                else:
+                    threading.Thread(target=self._run_batch, args=(batch,), daemon=True).start()
+
+    def _run_job(self, job):
+        """Worker thread body: transcribes one job and records the outcome."""
+        writer = None
+        try:
+            if job.output_base:
+                writer = TranscriptWriter(job.output_base, job.output_formats)
+
+            def on_segment(segment):
+                job.segments.append(segment)
+                if writer is not None:
+                    writer.write_segment(segment)
+
+            def on_progress(fraction):
+                job.progress = fraction
+
+            # A lazy engine only loads the model on a transcript cache miss
+            engine = TranscriptionEngine(job.model_name, device=self.device, lazy=True, precision=job.precision)
+            with self._pinned(job), job.trace.sampling():
+                job.result = engine.transcribe(job.file_path, on_segment=on_segment, on_progress=on_progress,
+                                               cancel_event=job.cancel_event, trace=job.trace, **job.options)
+            if writer is not None:
+                writer.close(job.result.get("language"))
+            job.progress = 1.0
+            outcome = DONE
+        except TranscriptionCancelled:
+            print(f"Job {job.id} cancelled: {job.file_path}")
+            outcome = CANCELLED
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            outcome = FAILED
+        finally:
+            if writer is not None:
+                writer.abort() # No-op once closed; otherwise no partial transcript is left behind
+
+        with self._condition:
+            self._busy_models.discard(job.model_name)
+            self._finish(job, outcome)
+
+    def _run_batch(self, jobs):
+        """Worker thread body: transcribes several short clips with one model in batches (see batched.py)."""
+        first = jobs[0]
+        by_path = {}
+        for job in jobs:
+            by_path.setdefault(job.file_path, []).append(job) # The same file may be asked for twice
+        outcomes = {}
+
+        def on_result(file_path, result):
+            for job in by_path[file_path]:
+                try:
+                    if job.output_base:
+                        writer = TranscriptWriter(job.output_base, job.output_formats)
+                        try:
+                            for segment in result["segments"]:
+                                writer.write_segment(segment)
+                            writer.close(result.get("language"))
+                        finally:
+                            writer.abort()
+                except Exception as e:
+                    on_job_error(job, e)
+                    continue
+                job.segments.extend(result["segments"])
+                job.result = result
+                job.progress = 1.0
+                outcomes[job.id] = DONE
+
+        def on_job_error(job, error):
+            print(f"Job {job.id} failed: {error}")
+            job.error = str(error)
+            outcomes[job.id] = FAILED
+
+        def on_error(file_path, error):
+            for job in by_path[file_path]:
+                on_job_error(job, error)
+
+        print(f"Decoding jobs {', '.join(str(job.id) for job in jobs)} in one batch")
+        try:
+            transcriber = BatchedTranscriber(first.model_name, device=self.device, precision=first.precision,
+                                             batch_size=len(jobs))
+            with self._pinned(first), first.trace.sampling():
+                transcriber.transcribe_files(list(by_path), on_result=on_result, on_error=on_error,
+                                             **dict(first.options))
+        except Exception as e:
+            for job in jobs:
+                if job.id not in outcomes:
+                    on_job_error(job, e)
+
+        with self._condition:
+            self._busy_models.discard(first.model_name)
+            for job in jobs:
+                # A batch can't stop part way, so a job cancelled while it ran still gets its result
+                self._finish(job, outcomes.get(job.id, CANCELLED if job.cancel_event.is_set() else FAILED))
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        self._condition.notify_all()
@@ -0,0 +1,132 @@
+# mmap_weights.py
+# Model weights that several processes on one host share instead of copying.
+#
+# whisper.load_model reads the fp16 checkpoint and copies it into freshly
+# allocated fp32 parameters, so every worker process holds its own copy of the
+# weights. Here each model is converted once into an fp32 checkpoint in the
+# cache directory, in the same layout as Whisper's own ({"dims", "model_state_dict"}),
+# and loaded with torch.load(mmap=True): the parameters point straight into the
+# memory-mapped file, so all processes share one physical copy through the page
+# cache and loading it again takes a fraction of a second.
+#
+# Usage:
+#   python mmap_weights.py --models tiny base small   # convert ahead of time
+
+import argparse
+import inspect
+import os
+import sys
+import time
+from dataclasses import asdict
+
+from app_paths import get_cache_dir
+
+# Bumped whenever the layout of the converted files changes
+WEIGHTS_FORMAT_VERSION = 1
+
+
+def get_weights_path(model_name):
+    return os.path.join(get_cache_dir("models"), f"{model_name}-fp32-v{WEIGHTS_FORMAT_VERSION}.pt")
+
+
+def has_shared_weights(model_name):
+    return os.path.exists(get_weights_path(model_name))
+
+
+def mmap_supported():
+    """torch.load(mmap=True) and load_state_dict(assign=True) need torch 2.1 or later."""
+    import torch
+    return "mmap" in inspect.signature(torch.load).parameters
+
+
+def convert_checkpoint(model_name):
+    """Writes the fp32 checkpoint that load_shared_model maps. Returns its path."""
+    import torch
+    import whisper
+
+    path = get_weights_path(model_name)
+    start_time = time.time()
+    model = whisper.load_model(model_name, device="cpu")
+    checkpoint = {"dims": asdict(model.dims), "model_state_dict": model.state_dict()}
+    # Unique per process: several workers may convert the same model at once on a first run
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(checkpoint, temp_path)
+    os.replace(temp_path, path)
+    print(f"Converted '{model_name}' for shared loading in {time.time() - start_time:.1f}s: {path}")
+    return path
+
+
+def load_shared_model(model_name):
+    """Builds a CPU model whose parameters are memory-mapped from the converted checkpoint."""
+    import numpy as np
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    path = get_weights_path(model_name)
+    if not os.path.exists(path):
+        convert_checkpoint(model_name)
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint["dims"])
+    # On the meta device the constructor allocates nothing; assign=True then
+    # makes the mapped tensors the parameters instead of copying into them
+    with torch.device("meta"):
+        model = Whisper(dims)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+
+    # Buffers that are not saved in checkpoints, rebuilt as Whisper's constructor does
+    n_ctx = dims.n_text_ctx
+    model.decoder.register_buffer("mask", torch.empty(n_ctx, n_ctx).fill_(-np.inf).triu_(1), persistent=False)
+    all_heads = torch.zeros(dims.n_text_layer, dims.n_text_head, dtype=torch.bool)
+    all_heads[dims.n_text_layer // 2:] = True
+    model.register_buffer("alignment_heads", all_heads.to_sparse(), persistent=False)
+    if model_name in whisper._ALIGNMENT_HEADS:
+        model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_name])
+    return model
+
+
+def load_model(model_name, device):
+    """Default ModelCache loader: shared weights on the CPU, whisper.load_model otherwise."""
+    if device == "cpu" and mmap_supported():
+        return load_shared_model(model_name)
+    import whisper # Deferred: importing whisper imports torch
+    return whisper.load_model(model_name, device=device)
+
+
+def prepare_shared_weights(model_name, device=None):
+    """
+    Converts the model before worker processes start, so they don't all convert
+    it at once. Cheap when the converted file already exists.
+    """
+    if has_shared_weights(model_name):
+        return
+    if device is None:
+        from model_cache import default_device
+        device = default_device()
+    if device == "cpu" and mmap_supported():
+        convert_checkpoint(model_name)
+
+
+def build_arg_parser():
+    from model_registry import get_sorted_models
+    parser = argparse.ArgumentParser(description="Convert Whisper models for memory-mapped, shared loading.")
+    parser.add_argument("--models", nargs="+", required=True, choices=get_sorted_models(), help="Models to convert")
+    parser.add_argument("--force", action="store_true", help="Convert again even if a converted file exists")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if not mmap_supported():
+        print("This version of torch cannot memory-map checkpoints (torch 2.1 or later is needed)")
+        return 1
+    for model_name in args.models:
+        if args.force or not has_shared_weights(model_name):
+            convert_checkpoint(model_name)
+        else:
+            print(f"{model_name}: already converted ({get_weights_path(model_name)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
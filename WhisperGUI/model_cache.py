@@ -0,0 +1,177 @@
+# model_cache.py
+# Process-wide cache of loaded Whisper models with least-recently-used eviction.
+# The cache is bounded by the RAM estimates in MODEL_RAM_REQUIREMENTS and by live
+# psutil readings, so keeping old models resident never pushes the machine into swap.
+
+import contextlib
+import gc
+import threading
+from collections import Counter, OrderedDict
+
+import psutil
+
+from model_registry import estimate_model_ram_gb
+import mmap_weights
+
+# RAM kept free for the OS, the GUI and the transcription itself
+DEFAULT_HEADROOM_GB = 1.5
+
+GB = 1024 ** 3
+
+
+def default_device():
+    """The device whisper.load_model would pick on its own."""
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class ModelCache:
+    """LRU cache of loaded models keyed by (model name, device, dtype)."""
+
+    def __init__(self, max_ram_gb=None, headroom_gb=DEFAULT_HEADROOM_GB):
+        # max_ram_gb=None means "whatever the machine has, minus headroom"
+        self.max_ram_gb = max_ram_gb
+        self.headroom_gb = headroom_gb
+        self._models = OrderedDict() # key -> model, least recently used first
+        self._lock = threading.RLock()
+        self._loading = {} # key -> Event set once the thread loading it is done
+        self._pins = Counter() # key -> running jobs using it; pinned models are never evicted to make room
+
+    def _budget_gb(self):
+        """Total RAM the cache may account for, from config or physical RAM."""
+        if self.max_ram_gb is not None:
+            return self.max_ram_gb
+        return psutil.virtual_memory().total / GB - self.headroom_gb
+
+    def resident_gb(self):
+        """Sum of the estimates of all cached models."""
+        with self._lock:
+            return sum(estimate_model_ram_gb(name, dtype) for name, _, dtype in self._models)
+
+    def keys(self):
+        with self._lock:
+            return list(self._models.keys())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def _make_key(self, model_name, device, dtype):
+        return (model_name, device or default_device(), dtype)
+
+    def peek(self, model_name, device=None, dtype="fp32"):
+        """Returns a cached model (marking it recently used) or None, never loads."""
+        key = self._make_key(model_name, device, dtype)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    @contextlib.contextmanager
+    def pinned(self, model_name, device=None, dtype="fp32"):
+        """
+        Keeps a model from being evicted to make room while a job uses it. Evicting
+        it then would free nothing, since the job still holds it, and would only
+        make the cache undercount what is resident.
+        """
+        key = self._make_key(model_name, device, dtype)
+        with self._lock:
+            self._pins[key] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+                if not self._pins[key]:
+                    del self._pins[key]
+
+    def is_pinned(self, key):
+        with self._lock:
+            return key in self._pins
+
+    def is_resident(self, model_name, device=None, dtype="fp32"):
+        """True if the model is cached. Unlike peek() this does not count as a use."""
+        return self._make_key(model_name, device, dtype) in self
+
+    def get(self, model_name, device=None, dtype="fp32", loader=None):
+        """
+        Returns the cached model for the key, loading it on a miss.
+        Least-recently-used models are evicted first until the new one fits.
+        """
+        key = self._make_key(model_name, device, dtype)
+        while True:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    print(f"Model cache hit: {key}")
+                    return model
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    self._make_room(estimate_model_ram_gb(model_name, dtype))
+                    break
+            # Another thread is loading this key; use its model (or try again if its load failed)
+            loading.wait()
+
+        # Load outside the lock so peek() from the GUI thread never waits on disk I/O
+        print(f"Model cache miss, loading: {key}")
+        try:
+            # By default CPU models map their weights from disk, shared with other processes
+            model = (loader or mmap_weights.load_model)(model_name, key[1])
+            with self._lock:
+                self._models[key] = model
+                self._models.move_to_end(key)
+            return model
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _make_room(self, needed_gb):
+        """
+        Evicts LRU entries until needed_gb fits in both the budget and live
+        available RAM. Pinned models stay, even if it then doesn't fit.
+        """
+        while True:
+            available_gb = psutil.virtual_memory().available / GB - self.headroom_gb
+            fits_budget = self.resident_gb() + needed_gb <= self._budget_gb()
+            if fits_budget and needed_gb <= available_gb:
+                return
+            unpinned = [key for key in self._models if key not in self._pins]
+            if not unpinned:
+                return
+            self.evict(unpinned[0])
+
+    def evict(self, key):
+        """Drops one model from the cache and releases its memory."""
+        with self._lock:
+            if self._models.pop(key, None) is None:
+                return
+        print(f"Model cache evicting: {key}")
+        gc.collect() # Make sure the weights are actually freed before the next reading
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def clear(self):
+        for key in self.keys():
+            self.evict(key)
+
+
+# --- Process-wide instance ---
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_model_cache():
+    """Returns the cache shared by everything in this process."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ModelCache()
+        return _shared_cache
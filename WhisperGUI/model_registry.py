@@ -0,0 +1,108 @@
+# model_registry.py
+# Static information about the Whisper models: which ones exist, how they are
+# ordered in the UI and roughly how much RAM each one needs.
+#
+# Importing whisper also imports torch, which takes seconds, so the model list
+# is only built when it is first asked for.
+
+import threading
+
+# --- Model RAM Requirements (Approximate Guide) ---
+# These are rough estimates, actual usage can vary.
+# We leave some headroom for the OS and other apps.
+MODEL_RAM_REQUIREMENTS = {
+    # model_name: min_system_ram_gb_required
+    "tiny": 2,
+    "base": 2.5,
+    "small": 4,
+    "medium": 8,
+    "large": 12, # large-v2/v3 might need slightly more
+    # Add .en models if desired, they often use slightly less RAM
+    "tiny.en": 1.8,
+    "base.en": 2.2,
+    "small.en": 3.5,
+    "medium.en": 7,
+}
+# Estimate used for models missing from the table above (turbo, ...)
+UNKNOWN_MODEL_RAM_GB = max(MODEL_RAM_REQUIREMENTS.values())
+
+# Size of each model's fp32 weights (parameter count * 4 bytes). Processes on one
+# host that map the same weights file (see mmap_weights.py) hold this part only once.
+MODEL_WEIGHTS_GB = {
+    "tiny": 0.15,
+    "base": 0.28,
+    "small": 0.91,
+    "medium": 2.87,
+    "large": 5.77,
+    "turbo": 3.01,
+    "large-v3-turbo": 3.01,
+}
+
+# int8 weights are a quarter of fp32, but activations, embeddings and the
+# decoder's working memory are not quantised, so the saving overall is smaller
+INT8_RAM_FACTOR = 0.5
+
+# Prioritize standard models in the dropdown list if they exist
+PRIORITY_MODELS = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"]
+
+_available_models = None
+_available_models_lock = threading.Lock()
+
+
+def get_available_models():
+    """All models Whisper knows about. The first call imports whisper (and torch)."""
+    global _available_models
+    with _available_models_lock:
+        if _available_models is None:
+            import whisper
+            _available_models = whisper.available_models()
+        return _available_models
+
+
+def get_sorted_models():
+    """Available models in dropdown order: standard sizes first, then the rest by name."""
+    return sorted(
+        get_available_models(),
+        key=lambda x: (PRIORITY_MODELS.index(x) if x in PRIORITY_MODELS else float('inf'), x)
+    )
+
+
+def __getattr__(name):
+    # ALL_AVAILABLE_MODELS and SORTED_MODELS used to be built at import time;
+    # keep them importable, but only compute them when they are actually used
+    if name == "ALL_AVAILABLE_MODELS":
+        return get_available_models()
+    if name == "SORTED_MODELS":
+        return get_sorted_models()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def estimate_model_ram_gb(model_name, precision="fp32"):
+    """Estimated RAM for a model, falling back to its base model's entry."""
+    if model_name in MODEL_RAM_REQUIREMENTS:
+        estimate = MODEL_RAM_REQUIREMENTS[model_name]
+    else:
+        base_name = model_name.split("-")[0].split(".")[0] # large-v3 -> large, tiny.en -> tiny
+        estimate = MODEL_RAM_REQUIREMENTS.get(base_name, UNKNOWN_MODEL_RAM_GB)
+    return estimate * INT8_RAM_FACTOR if precision == "int8" else estimate
+
+
+def estimate_weights_gb(model_name):
+    """fp32 weight size of a model, falling back to its base model's entry."""
+    if model_name in MODEL_WEIGHTS_GB:
+        return MODEL_WEIGHTS_GB[model_name]
+    base_name = model_name.split("-")[0].split(".")[0]
+    return MODEL_WEIGHTS_GB.get(base_name, max(MODEL_WEIGHTS_GB.values()))
+
+
+def estimate_workers_ram_gb(single_process_gb, model_name, workers, shared_weights=True):
+    """
+    RAM for `workers` processes that each hold the model, given what one process
+    needs. With shared (memory-mapped) weights only the first process pays for them.
+    """
+    if workers <= 1:
+        return single_process_gb
+    if not shared_weights:
+        return single_process_gb * workers
+    per_extra_worker = max(0.0, single_process_gb - estimate_weights_gb(model_name))
+    return single_process_gb + (workers - 1) * per_extra_worker
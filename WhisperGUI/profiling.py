@@ -0,0 +1,338 @@
+# profiling.py
+# Per-stage timing of the transcription pipeline, exportable as a Chrome trace.
+#
+# A Trace collects timed spans (audio decode, log-mel, encoder, decoder,
+# temperature fallback re-decodes, GUI updates, ...) and, while a job runs,
+# samples the process's peak RSS and CPU use. Spans nest: the summary reports
+# each stage's own time, without the time of the stages inside it.
+#
+# Whisper's internals are timed through hooks installed once per model: forward
+# hooks on the encoder, and wrappers around model.decode, model.detect_language
+# and whisper's log_mel_spectrogram. The hooks record into the trace activated on
+# the calling thread, so jobs on different threads never mix, and cost next to
+# nothing when no trace is active.
+#
+# The model.decode wrapper is also where temperature fallback re-decodes are
+# counted (count_fallbacks), so the timing and the count never disagree.
+#
+# Traces open in chrome://tracing or https://ui.perfetto.dev.
+
+import contextlib
+import functools
+import importlib
+import json
+import os
+import threading
+import time
+import weakref
+
+import psutil
+
+# How often the resource sampler polls while a job runs
+RESOURCE_SAMPLE_SECONDS = 0.1
+
+# Stage names, in pipeline order; also the order of the summary
+AUDIO_DECODE = "audio decode"
+VAD = "vad"
+MEL = "mel"
+LANGUAGE_DETECTION = "language detection"
+ENCODER = "encoder"
+DECODER = "decoder"
+FALLBACK = "fallback re-decode"
+WINDOW = "window"
+GUI_UPDATE = "gui update"
+STAGES = (AUDIO_DECODE, VAD, MEL, LANGUAGE_DETECTION, ENCODER, DECODER, FALLBACK, WINDOW, GUI_UPDATE)
+
+_local = threading.local()
+_instrumented_models = weakref.WeakSet()
+_whisper_patched = False
+_patch_lock = threading.Lock()
+
+
+class ResourceSampler:
+    """Polls this process's RSS on a background thread and keeps the maximum."""
+
+    def __init__(self, interval=RESOURCE_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._start_cpu = None
+        self._start_wall = None
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self):
+        self.peak_bytes = max(self.peak_bytes, self._process.memory_info().rss)
+
+    def _cpu_time(self):
+        times = self._process.cpu_times()
+        return times.user + times.system
+
+    def __enter__(self):
+        self._start_cpu = self._cpu_time()
+        self._start_wall = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+        self.cpu_seconds = self._cpu_time() - self._start_cpu
+        self.wall_seconds = time.perf_counter() - self._start_wall
+
+    @property
+    def cpu_percent(self):
+        """Process CPU time over wall time; 400% means four cores busy on average."""
+        return self.cpu_seconds / self.wall_seconds * 100 if self.wall_seconds else 0.0
+
+
+class Trace:
+    """Timed spans of one transcription, plus the resources it used."""
+
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.spans = [] # (name, thread name, start, end, args), times from perf_counter
+        self.resources = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, end, thread_name=None, **args):
+        with self._lock:
+            self.spans.append((name, thread_name or threading.current_thread().name, start, end, args))
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter(), **args)
+
+    @contextlib.contextmanager
+    def sampling(self):
+        """Records peak RSS and CPU use of the process while the block runs.
+        Other jobs running at the same time are included in both."""
+        with ResourceSampler() as sampler:
+            yield
+        self.resources = {
+            "peak_rss_mb": sampler.peak_bytes / 1024 ** 2,
+            "cpu_seconds": sampler.cpu_seconds,
+            "cpu_percent": sampler.cpu_percent,
+            "cpu_count": os.cpu_count(),
+        }
+
+    def stage_seconds(self):
+        """{stage: seconds spent in the stage itself}, excluding the stages nested inside it."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: (span[1], span[2], -span[3]))
+        totals = {}
+        stack = [] # [name, end, child seconds, start] of the open spans on the current thread
+        thread_name = None
+
+        def close(entry):
+            name, end, child_seconds, start = entry
+            totals[name] = totals.get(name, 0.0) + (end - start) - child_seconds
+            if stack:
+                stack[-1][2] += end - start
+
+        for name, span_thread, start, end, _ in spans:
+            if span_thread != thread_name:
+                while stack:
+                    close(stack.pop())
+                thread_name = span_thread
+            while stack and stack[-1][1] <= start:
+                close(stack.pop())
+            stack.append([name, end, 0.0, start])
+        while stack:
+            close(stack.pop())
+        return {name: totals[name] for name in sorted(totals, key=lambda n: STAGES.index(n) if n in STAGES else len(STAGES))}
+
+    def summary(self):
+        return {"stages": self.stage_seconds(), **self.resources}
+
+    def to_chrome_trace(self):
+        """The trace in the Chrome trace event format (complete events, microseconds)."""
+        with self._lock:
+            spans = list(self.spans)
+        thread_ids = {}
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": self.name}}]
+        for name, thread_name, start, end, args in spans:
+            if thread_name not in thread_ids:
+                thread_ids[thread_name] = len(thread_ids) + 1
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": thread_ids[thread_name],
+                               "args": {"name": thread_name}})
+            events.append({
+                "name": name, "cat": "transcription", "ph": "X", "pid": 1, "tid": thread_ids[thread_name],
+                "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6, "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"name": self.name, **self.resources}}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+# --- Thread-local active trace ---
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+@contextlib.contextmanager
+def activate(trace):
+    """Makes trace the one the hooks record into on this thread (None: no tracing)."""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextlib.contextmanager
+def stage(name, **args):
+    """Times the block as a span of the active trace, if there is one."""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    with trace.span(name, **args):
+        yield
+
+
+# --- Hooks into Whisper ---
+
+def _timed(function, name_for_call):
+    """Wraps function so each call is a span of the active trace, named by name_for_call(args, kwargs)."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        trace = current_trace()
+        if trace is None:
+            return function(*args, **kwargs)
+        name = name_for_call(args, kwargs)
+        if name is None:
+            return function(*args, **kwargs)
+        with trace.span(name):
+            return function(*args, **kwargs)
+    wrapper.profiling_wrapped = True
+    return wrapper
+
+
+def _patch_whisper():
+    """Times whisper's log-mel computation (module-wide, once)."""
+    global _whisper_patched
+    with _patch_lock:
+        if _whisper_patched:
+            return
+        _whisper_patched = True
+        try:
+            transcribe_module = importlib.import_module("whisper.transcribe")
+        except ImportError:
+            return
+        mel_function = getattr(transcribe_module, "log_mel_spectrogram", None)
+        if mel_function is not None and not getattr(mel_function, "profiling_wrapped", False):
+            transcribe_module.log_mel_spectrogram = _timed(mel_function, lambda args, kwargs: MEL)
+
+
+def _timed_decode(decode):
+    """
+    Wraps model.decode(mel, options): the first temperature of the schedule is
+    the normal pass, every later one is a fallback re-decode. Fallbacks are
+    timed as their own stage and added to the count_fallbacks() block active
+    on this thread, one per window (a 3-D mel is a batch of windows).
+    """
+    @functools.wraps(decode)
+    def wrapper(*args, **kwargs):
+        mel = args[0] if args else kwargs.get("mel")
+        options = args[1] if len(args) > 1 else kwargs.get("options")
+        is_fallback = getattr(options, "temperature", 0.0) > getattr(_local, "first_temperature", 0.0)
+        counter = getattr(_local, "fallback_counter", None)
+        if is_fallback and counter is not None:
+            counter["fallbacks"] += mel.shape[0] if getattr(mel, "ndim", 2) == 3 else 1
+        trace = current_trace()
+        if trace is None:
+            return decode(*args, **kwargs)
+        with trace.span(FALLBACK if is_fallback else DECODER):
+            return decode(*args, **kwargs)
+    wrapper.profiling_wrapped = True
+    return wrapper
+
+
+def set_first_temperature(temperature):
+    """Tells the decode hook which temperature is the normal pass on this thread."""
+    schedule = temperature if isinstance(temperature, (list, tuple)) else [temperature]
+    _local.first_temperature = schedule[0] if schedule else 0.0
+
+
+@contextlib.contextmanager
+def count_fallbacks(temperature):
+    """
+    Counts the fallback re-decodes made on this thread inside the block, in
+    the yielded dict's "fallbacks": every decode of a window at a later
+    temperature of the schedule, whether or not the window kept any segments.
+    Needs a model passed to instrument_model(), as TranscriptionEngine does.
+    """
+    set_first_temperature(temperature)
+    counter = {"fallbacks": 0}
+    previous, _local.fallback_counter = getattr(_local, "fallback_counter", None), counter
+    try:
+        yield counter
+    finally:
+        _local.fallback_counter = previous
+
+
+def instrument_model(model):
+    """Installs the timing hooks on a loaded model (once per model)."""
+    _patch_whisper()
+    try:
+        if model in _instrumented_models:
+            return
+        _instrumented_models.add(model)
+    except TypeError:
+        return # Not weak-referenceable, so not a real model
+
+    encoder = getattr(model, "encoder", None)
+    if encoder is not None and hasattr(encoder, "register_forward_pre_hook"):
+        def before_encoder(module, inputs):
+            if current_trace() is not None:
+                _local.encoder_start = time.perf_counter()
+
+        def after_encoder(module, inputs, output):
+            trace = current_trace()
+            start = getattr(_local, "encoder_start", None)
+            if trace is not None and start is not None:
+                trace.add_span(ENCODER, start, time.perf_counter())
+                _local.encoder_start = None
+
+        encoder.register_forward_pre_hook(before_encoder)
+        encoder.register_forward_hook(after_encoder)
+
+    # Instance attributes shadow Whisper's class-level decode/detect_language functions
+    decode = getattr(model, "decode", None)
+    if decode is not None and not getattr(decode, "profiling_wrapped", False):
+        model.decode = _timed_decode(decode)
+    detect_language = getattr(model, "detect_language", None)
+    if detect_language is not None and not getattr(detect_language, "profiling_wrapped", False):
+        model.detect_language = _timed(detect_language, lambda args, kwargs: LANGUAGE_DETECTION)
+
+
+def format_summary(summary, stage_label=None):
+    """One line per trace: each stage's share of the time, peak RSS and CPU use."""
+    stages = summary.get("stages", {})
+    total = sum(stages.values())
+    parts = [f"{stage_label(name) if stage_label else name} {seconds:.2f}s"
+             f"{f' ({seconds / total * 100:.0f}%)' if total else ''}"
+             for name, seconds in stages.items()]
+    if "peak_rss_mb" in summary:
+        parts.append(f"RSS {summary['peak_rss_mb']:.0f} MB")
+    if "cpu_percent" in summary:
+        parts.append(f"CPU {summary['cpu_percent']:.0f}%")
+    return " | ".join(parts)
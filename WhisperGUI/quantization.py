@@ -0,0 +1,196 @@
+# quantization.py
+# Reduced-precision CPU inference: dynamic int8 quantisation of Whisper's linear layers.
+#
+# The linear layers (attention projections and MLPs) hold nearly all of the
+# weights and most of the decoding time. Dynamic quantisation stores their
+# weights as int8 and quantises the activations on the fly, which shrinks the
+# model and speeds up CPU decoding at a small cost in accuracy. Converting a
+# model takes a while, so the quantised model is saved in the cache directory
+# and later loads read it directly, skipping the fp32 checkpoint.
+#
+# Usage:
+#   python quantization.py --models tiny base          # speed and WER of int8 against fp32
+#   python quantization.py --models small --convert-only
+#   python quantization.py --fixtures my_clip.wav --output bench/int8.json
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+from app_paths import get_cache_dir
+
+# Precisions a model can be loaded in; fp32 is Whisper's own CPU path
+PRECISIONS = ("fp32", "int8")
+DEFAULT_PRECISION = "fp32"
+# Bumped whenever the way quantised models are built or saved changes
+QUANTIZED_FORMAT_VERSION = 1
+
+
+def check_precision(precision, device=None):
+    """Raises ValueError for an unknown precision, or int8 on a non-CPU device."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+    if precision == "int8" and device not in (None, "cpu"):
+        raise ValueError(f"int8 precision only runs on the CPU, not on '{device}'")
+
+
+def get_quantized_path(model_name):
+    """Where the int8 model is saved. Torch and Whisper versions are part of the
+    name, because a pickled quantised model only loads with the versions that wrote it."""
+    import torch
+    import whisper
+    whisper_version = getattr(whisper, "__version__", "unknown")
+    file_name = (f"{model_name}-int8-v{QUANTIZED_FORMAT_VERSION}"
+                 f"-torch{torch.__version__}-whisper{whisper_version}.pt")
+    return os.path.join(get_cache_dir("quantized"), file_name.replace("+", "_"))
+
+
+def quantize_model(model):
+    """Converts a loaded fp32 Whisper model to dynamic int8 in place and returns it."""
+    import torch
+    from torch import nn
+
+    # whisper.model.Linear only adds a cast of the weights to the input dtype,
+    # but quantize_dynamic matches layer types exactly, so it would skip them
+    for module in model.modules():
+        if isinstance(module, nn.Linear) and type(module) is not nn.Linear:
+            module.__class__ = nn.Linear
+    model.float().eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_int8_model(model_name, device="cpu"):
+    """
+    ModelCache loader for precision "int8": reads the saved quantised model,
+    or loads the fp32 checkpoint, quantises it and saves the result for next time.
+    """
+    check_precision("int8", device)
+    import torch
+    import whisper
+
+    path = get_quantized_path(model_name)
+    if os.path.exists(path):
+        try:
+            # A whole pickled module, written by save below into our own cache directory
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            print(f"Loaded int8 model from {path}")
+            return model
+        except Exception as e:
+            print(f"Could not read quantised model {path}, converting again: {e}")
+
+    start_time = time.time()
+    model = quantize_model(whisper.load_model(model_name, device="cpu"))
+    print(f"Quantised '{model_name}' to int8 in {time.time() - start_time:.1f}s")
+    try:
+        temp_path = path + ".tmp"
+        torch.save(model, temp_path)
+        os.replace(temp_path, path)
+    except (OSError, RuntimeError) as e:
+        print(f"Could not save quantised model: {e}")
+    return model
+
+
+def get_loader(precision):
+    """The ModelCache loader for a precision (None means whisper.load_model)."""
+    check_precision(precision)
+    return load_int8_model if precision == "int8" else None
+
+
+# --- Comparison against fp32 ---
+
+def convert(models):
+    """Builds the saved int8 model of each model that doesn't have one yet. Returns {model: seconds}."""
+    timings = {}
+    for model_name in models:
+        if os.path.exists(get_quantized_path(model_name)):
+            timings[model_name] = 0.0
+            continue
+        start_time = time.time()
+        load_int8_model(model_name)
+        timings[model_name] = time.time() - start_time
+        gc.collect() # The model is only needed on disk
+    return timings
+
+
+def compare_precisions(models, fixtures):
+    """
+    Benchmarks every model in fp32 and int8 on the fixtures and returns
+    {model: {"fp32": result, "int8": result, "speedup": ..., "wer": {fixture: ...}}}.
+    WER is measured against the fp32 transcript of the same fixture.
+    """
+    import benchmark # Not at the top: benchmark imports the engine, which imports this module
+
+    conversion = convert(models) # So the int8 load time below is the cached load, not the conversion
+    fp32_results = benchmark.run_benchmark(models, fixtures, device="cpu", precision="fp32")
+    int8_results = benchmark.run_benchmark(models, fixtures, device="cpu", precision="int8")
+
+    comparison = {}
+    for model_name in models:
+        fp32, int8 = fp32_results[model_name], int8_results[model_name]
+        entry = {"fp32": fp32, "int8": int8, "conversion_seconds": conversion.get(model_name)}
+        if "error" not in fp32 and "error" not in int8:
+            entry["speedup"] = fp32["rtf"] / int8["rtf"] if int8["rtf"] else None
+            entry["wer"] = {
+                name: benchmark.word_error_rate(fp32["fixtures"][name]["text"], int8["fixtures"][name]["text"])
+                for name in fixtures
+            }
+        comparison[model_name] = entry
+    return comparison
+
+
+def print_comparison(comparison):
+    print(f"{'model':>10} {'fp32 RTF':>9} {'int8 RTF':>9} {'speedup':>8} {'fp32 RSS':>9} {'int8 RSS':>9} {'WER':>6}")
+    for model_name, entry in comparison.items():
+        if "speedup" not in entry:
+            error = entry["fp32"].get("error") or entry["int8"].get("error")
+            print(f"{model_name:>10} FAILED: {error}")
+            continue
+        fp32, int8 = entry["fp32"], entry["int8"]
+        wer = max(entry["wer"].values(), default=0.0)
+        speedup = f"{entry['speedup']:.2f}x" if entry["speedup"] else "n/a"
+        print(f"{model_name:>10} {fp32['rtf']:9.3f} {int8['rtf']:9.3f} {speedup:>8} "
+              f"{fp32['peak_rss_mb']:7.0f}MB {int8['peak_rss_mb']:7.0f}MB {wer * 100:5.1f}%")
+    print("WER is the worst fixture's word error rate of the int8 transcript against the fp32 one.")
+
+
+def build_arg_parser():
+    from model_registry import get_sorted_models
+    parser = argparse.ArgumentParser(description="Quantise Whisper models to int8 and compare them with fp32.")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"],
+                        choices=get_sorted_models(), help="Models to compare (default: tiny base)")
+    parser.add_argument("--fixtures", nargs="+", default=None,
+                        help="Audio files to use instead of the generated benchmark fixtures")
+    parser.add_argument("--output", default=None, help="Where to write the JSON results (default: print only)")
+    parser.add_argument("--convert-only", action="store_true",
+                        help="Only build and save the int8 models, don't compare")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.convert_only:
+        for model_name, seconds in convert(args.models).items():
+            print(f"{model_name}: {get_quantized_path(model_name)}" + (f" ({seconds:.1f}s)" if seconds else " (already saved)"))
+        return 0
+
+    import benchmark
+    if args.fixtures:
+        fixtures = {os.path.basename(path): os.path.abspath(path) for path in args.fixtures}
+    else:
+        fixtures = benchmark.prepare_fixtures()
+
+    comparison = compare_precisions(args.models, fixtures)
+    print_comparison(comparison)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"machine": benchmark.machine_info(), "results": comparison}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0 if all("speedup" in entry for entry in comparison.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
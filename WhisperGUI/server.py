@@ -0,0 +1,465 @@
+# server.py
+# Local HTTP transcription service, without Tk.
+#
+# Requests go through the same JobScheduler and model cache as the GUI, so
+# concurrent requests queue up on the warm model instead of each loading their
+# own copy. Short clips (up to one 30 s window) that queue for the same model
+# with the same options are decoded together in one batch (see batched.py).
+# Segments can be streamed back as newline-delimited JSON while the file is
+# still being decoded; a batched clip's segments all arrive when its batch ends.
+#
+# Usage:
+#   python server.py --model small --port 8765
+#
+#   curl -X POST --data-binary @meeting.mp3 "http://127.0.0.1:8765/transcribe?stream=1"
+#   curl -X POST -H "Content-Type: application/json" -d '{"path": "/data/meeting.mp3"}' \
+#        http://127.0.0.1:8765/transcribe
+#   curl http://127.0.0.1:8765/status
+#
+# Endpoints:
+#   POST /transcribe   body: raw audio bytes, or JSON {"path": ..., "model": ..., "precision": ...}
+#                      query: model=<name>, precision=fp32|int8, stream=1, priority=<int>
+#                      decode options, in the query or the JSON body: preset=fastest|balanced|accurate,
+#                      language, task, beam_size, best_of, temperature (comma-separated in the query),
+#                      condition_on_previous_text
+#   POST /models/load  body: JSON {"model": ..., "precision": ..., "warm_up": true}; loads a model ahead of time
+#   GET  /status       queue depth, resident models and latency percentiles
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from app_paths import get_cache_dir
+from engine import TranscriptionEngine
+from model_registry import get_sorted_models
+from job_queue import JobScheduler, DONE, FAILED, CANCELLED, DEFAULT_MAX_CONCURRENT_JOBS
+from batched import DEFAULT_BATCH_SIZE, MAX_CLIP_SECONDS
+from audio_cache import probe_duration
+from model_cache import get_model_cache
+from calibration import recommend_for_this_machine, DEFAULT_TARGET_RTF
+from quantization import PRECISIONS, DEFAULT_PRECISION, check_precision
+from decode_presets import (DEFAULT_PRESET, DECODE_SETTINGS, add_decode_arguments, decode_settings_from_args,
+                            resolve_decode_options)
+
+DEFAULT_HOST = "127.0.0.1" # Local only: the server reads arbitrary paths on this machine
+DEFAULT_PORT = 8765
+# Uploads larger than this are rejected
+MAX_UPLOAD_BYTES = 4 * 1024 ** 3
+UPLOAD_BLOCK_SIZE = 1024 ** 2
+# How often a request checks its job for new segments
+JOB_POLL_SECONDS = 0.1
+# Latencies kept for the percentiles in /status
+LATENCY_WINDOW = 1000
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class TranscriptionServer:
+    """Serves transcription requests from a JobScheduler on an asyncio event loop."""
+
+    def __init__(self, default_model, device=None, max_concurrent_jobs=DEFAULT_MAX_CONCURRENT_JOBS,
+                 precision=DEFAULT_PRECISION, decode_settings=None, max_batch_size=DEFAULT_BATCH_SIZE):
+        self.default_model = default_model
+        self.device = device
+        self.precision = precision
+        # Preset and overrides used when a request doesn't give its own
+        self.decode_settings = decode_settings or {"preset": DEFAULT_PRESET}
+        self.scheduler = JobScheduler(max_concurrent_jobs=max_concurrent_jobs, device=device,
+                                      max_batch_size=max_batch_size)
+        self.upload_dir = get_cache_dir("uploads")
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.requests_failed = 0
+        # (total seconds, seconds waiting in the queue) of recently finished requests
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._cleanup_tasks = set()
+
+    # --- Model management (same path as the GUI's Load/Reload button) ---
+
+    async def load_model(self, model_name, warm_up=False, precision=None):
+        """
+        Loads a model into the shared cache on a worker thread, optionally
+        followed by a warm-up run. Returns (load seconds, warm-up seconds or None).
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self._load_model_blocking, model_name, warm_up,
+                                                                precision or self.precision)
+
+    def _load_model_blocking(self, model_name, warm_up, precision):
+        engine = TranscriptionEngine(device=self.device, precision=precision)
+        load_start = time.time()
+        engine.load_model(model_name)
+        load_seconds = time.time() - load_start
+        warmup_seconds = None
+        if warm_up:
+            with self.scheduler.using_model(model_name):
+                warmup_seconds = engine.warm_up()
+        return load_seconds, warmup_seconds
+
+    # --- HTTP plumbing ---
+
+    async def handle_connection(self, reader, writer):
+        """One request per connection; the response always ends with Connection: close."""
+        try:
+            method, target, headers = await self._read_request_head(reader)
+            url = urlsplit(target)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if url.path == "/transcribe" and method == "POST":
+                await self.handle_transcribe(reader, writer, headers, query)
+            elif url.path == "/models/load" and method == "POST":
+                body = await self._read_json_body(reader, headers)
+                model_name = body.get("model") or self.default_model
+                self._check_model(model_name)
+                precision = self._check_precision(body.get("precision") or self.precision)
+                load_seconds, warmup_seconds = await self.load_model(model_name, warm_up=bool(body.get("warm_up")),
+                                                                     precision=precision)
+                await self._send_json(writer, 200, {"model": model_name, "precision": precision, "loaded": True,
+                                                    "load_seconds": load_seconds, "warmup_seconds": warmup_seconds})
+            elif url.path == "/status" and method == "GET":
+                await self._send_json(writer, 200, self.status())
+            elif url.path in ("/transcribe", "/models/load", "/status"):
+                raise HTTPError(405, f"{method} not allowed on {url.path}")
+            else:
+                raise HTTPError(404, f"No such endpoint: {url.path}")
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # Client went away
+        except Exception as e:
+            print(f"Request failed: {e}")
+            await self._send_json(writer, 500, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def _read_request_head(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "Request head too large")
+        lines = head.decode("latin1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+
+    def _content_length(self, headers):
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_UPLOAD_BYTES:
+            raise HTTPError(413, f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+        return length
+
+    async def _read_json_body(self, reader, headers):
+        length = self._content_length(headers)
+        if not length:
+            return {}
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return body
+
+    async def _save_upload(self, reader, length):
+        """Streams the request body to a temp file in blocks; returns its path."""
+        fd, path = tempfile.mkstemp(dir=self.upload_dir, suffix=".upload")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                remaining = length
+                while remaining:
+                    block = await reader.readexactly(min(UPLOAD_BLOCK_SIZE, remaining))
+                    f.write(block)
+                    remaining -= len(block)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    async def _send_json(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode("latin1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _send_chunk(self, writer, payload):
+        """Writes one NDJSON line as an HTTP chunk (raises ConnectionError if the client left)."""
+        data = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await writer.drain()
+
+    def _check_model(self, model_name):
+        if model_name not in get_sorted_models():
+            raise HTTPError(400, f"Unknown model: {model_name}")
+
+    def _decode_options(self, body, query):
+        """The server's decode settings with the request's preset and overrides
+        (from the JSON body, else the query string) applied."""
+        settings = dict(self.decode_settings)
+        try:
+            for name in DECODE_SETTINGS:
+                value = body[name] if name in body else query.get(name)
+                if value is None:
+                    continue
+                if name in ("beam_size", "best_of"):
+                    value = int(value)
+                elif name == "temperature":
+                    if isinstance(value, str):
+                        value = value.split(",")
+                    elif not isinstance(value, (list, tuple)):
+                        value = [value] # A single temperature, e.g. 0.2 in JSON
+                    value = [float(t) for t in value]
+                elif name == "condition_on_previous_text" and isinstance(value, str):
+                    value = value not in ("0", "false", "")
+                settings[name] = value
+            return resolve_decode_options(**settings)
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, f"Bad decode options: {e}")
+
+    def _check_precision(self, precision):
+        try:
+            check_precision(precision, self.device)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return precision
+
+    # --- Endpoints ---
+
+    async def handle_transcribe(self, reader, writer, headers, query):
+        upload_path = None
+        if headers.get("content-type", "").startswith("application/json"):
+            body = await self._read_json_body(reader, headers)
+            file_path = body.get("path")
+            model_name = body.get("model") or query.get("model") or self.default_model
+            precision = body.get("precision") or query.get("precision") or self.precision
+            options = self._decode_options(body, query)
+            if not file_path or not os.path.isfile(file_path):
+                raise HTTPError(400, f"No such file: {file_path}")
+        else:
+            length = self._content_length(headers)
+            if not length:
+                raise HTTPError(400, "Send audio bytes or a JSON body with a path")
+            model_name = query.get("model") or self.default_model
+            precision = query.get("precision") or self.precision
+            self._check_model(model_name)
+            self._check_precision(precision)
+            options = self._decode_options({}, query) # Reject bad options before receiving the upload
+            upload_path = file_path = await self._save_upload(reader, length)
+        self._check_model(model_name)
+        self._check_precision(precision)
+
+        try:
+            priority = int(query.get("priority", "0"))
+        except ValueError:
+            raise HTTPError(400, "priority must be an integer")
+        stream = query.get("stream", "0") not in ("0", "false", "")
+
+        # Read from the container headers, so this doesn't decode the file
+        duration = await asyncio.get_running_loop().run_in_executor(None, probe_duration, file_path)
+        batchable = duration is not None and duration <= MAX_CLIP_SECONDS
+        job = self.scheduler.submit(file_path, model_name, priority=priority, options=options, precision=precision,
+                                    batchable=batchable)
+        try:
+            if stream:
+                await self._stream_job(writer, job)
+            else:
+                await self._wait_for_job(job)
+                await self._send_json(writer, *self._job_response(job))
+        except (ConnectionError, asyncio.CancelledError):
+            self.scheduler.cancel(job.id) # Nobody is waiting for the result any more
+            raise
+        finally:
+            # Also when the client left: a cancelled job would otherwise stay in the scheduler for good.
+            # Don't hold the connection open while it winds down.
+            task = asyncio.get_running_loop().create_task(self._remove_when_finished(job, upload_path))
+            self._cleanup_tasks.add(task)
+            task.add_done_callback(self._cleanup_tasks.discard)
+
+    async def _wait_for_job(self, job):
+        while not job.is_finished:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+        self._record(job)
+
+    async def _stream_job(self, writer, job):
+        """Sends each segment as it is decoded, then the final result, as chunked NDJSON."""
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\n"
+                     b"Connection: close\r\n\r\n")
+        await self._send_chunk(writer, {"job": job.id, "status": job.status})
+        sent = 0
+        while True:
+            finished = job.is_finished # Read before the segments so none are missed
+            for segment in job.segments[sent:]:
+                await self._send_chunk(writer, {"segment": segment, "progress": job.progress})
+                sent += 1
+            if finished:
+                break
+            await asyncio.sleep(JOB_POLL_SECONDS)
+        self._record(job)
+        _, payload = self._job_response(job)
+        payload.pop("segments", None) # Already sent one by one
+        await self._send_chunk(writer, payload)
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _remove_when_finished(self, job, upload_path=None):
+        """
+        Drops a job from the scheduler, and deletes its upload, once it has
+        finished (a cancelled job may still be running).
+        """
+        while not job.is_finished:
+            await asyncio.sleep(JOB_POLL_SECONDS)
+        self.scheduler.remove(job.id) # The request held the job; the scheduler needn't keep it
+        if upload_path is None:
+            return
+        try:
+            os.remove(upload_path)
+        except OSError:
+            pass
+
+    def _job_response(self, job):
+        if job.status == DONE:
+            result = job.result
+            return 200, {
+                "job": job.id,
+                "status": job.status,
+                "model": job.model_name,
+                "requested_model": job.requested_model,
+                "precision": job.precision,
+                "text": result["text"],
+                "segments": result["segments"],
+                "language": result.get("language"),
+                "audio_duration": result["audio_duration"],
+                "elapsed_time": result["elapsed_time"],
+                "fallbacks": result.get("fallbacks", 0),
+                "queue_seconds": job.started_at - job.submitted_at,
+                "cached": result["cached"],
+                "batch_size": job.batch_size,
+                "profile": job.trace.summary(),
+            }
+        status = 500 if job.status == FAILED else 200
+        return status, {"job": job.id, "status": job.status, "error": job.error}
+
+    def _record(self, job):
+        if job.status == DONE:
+            self.requests_served += 1
+            self.latencies.append((job.finished_at - job.submitted_at, job.started_at - job.submitted_at))
+        elif job.status in (FAILED, CANCELLED):
+            self.requests_failed += 1
+
+    def status(self):
+        running, queued = self.scheduler.counts()
+        totals = sorted(total for total, _ in self.latencies)
+        waits = sorted(wait for _, wait in self.latencies)
+        return {
+            "uptime_seconds": time.time() - self.started_at,
+            "default_model": self.default_model,
+            "default_precision": self.precision,
+            "resident_models": [name if dtype == DEFAULT_PRECISION else f"{name} ({dtype})"
+                                for name, _, dtype in get_model_cache().keys()],
+            "queue": {"running": running, "queued": queued},
+            "requests": {"served": self.requests_served, "failed": self.requests_failed},
+            "latency_seconds": {name: percentile(totals, fraction)
+                                for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+            "queue_wait_seconds": {name: percentile(waits, fraction)
+                                   for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))},
+            "governor": self.scheduler.governor.status() if self.scheduler.governor is not None else None,
+        }
+
+
+async def serve(host, port, default_model, device=None, max_concurrent_jobs=DEFAULT_MAX_CONCURRENT_JOBS,
+                preload=True, precision=DEFAULT_PRECISION, decode_settings=None, max_batch_size=DEFAULT_BATCH_SIZE):
+    server = TranscriptionServer(default_model, device=device, max_concurrent_jobs=max_concurrent_jobs,
+                                 precision=precision, decode_settings=decode_settings, max_batch_size=max_batch_size)
+    if preload:
+        print(f"Loading default model '{default_model}' ({precision})...")
+        load_seconds, warmup_seconds = await server.load_model(default_model, warm_up=True)
+        print(f"Loaded in {load_seconds:.2f}s, warmed up in {warmup_seconds:.2f}s")
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"Listening on http://{host}:{port} (default model '{default_model}')")
+    async with listener:
+        await listener.serve_forever()
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Serve Whisper transcriptions over local HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (default: 8765)")
+    parser.add_argument("--model", default="auto", choices=["auto"] + get_sorted_models(),
+                        help="Default model; 'auto' picks one for this machine (default: auto)")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help="Target real-time factor used by --model auto (default: 1.0)")
+    parser.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    parser.add_argument("--precision", default=DEFAULT_PRECISION, choices=PRECISIONS,
+                        help="Default inference precision; int8 is quantised and runs on the CPU (default: fp32)")
+    parser.add_argument("--max-concurrent-jobs", type=int, default=DEFAULT_MAX_CONCURRENT_JOBS,
+                        help="Transcriptions running at once, each on a different model (default: 2)")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Queued short clips for one model decoded together; 1 turns batching off "
+                             f"(default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--no-preload", action="store_true", help="Load the default model on the first request")
+    add_decode_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    decode_settings = decode_settings_from_args(args)
+    if args.max_batch_size < 1:
+        parser.error("--max-batch-size must be at least 1")
+    try:
+        check_precision(args.precision, args.device)
+        resolve_decode_options(**decode_settings)
+    except ValueError as e:
+        parser.error(str(e))
+    model_name = args.model
+    if model_name == "auto":
+        model_name, reason = recommend_for_this_machine(args.target_rtf)
+        print(f"Auto-selected model '{model_name}' ({reason})")
+    try:
+        asyncio.run(serve(args.host, args.port, model_name, args.device, args.max_concurrent_jobs,
+                          preload=not args.no_preload, precision=args.precision, decode_settings=decode_settings,
+                          max_batch_size=args.max_batch_size))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+# settings.py
+# Small JSON file of user preferences that survive restarts,
+# stored in ~/.config/whisper_gui/settings.json.
+
+import json
+import os
+
+from app_paths import get_config_dir
+
+DEFAULT_SETTINGS = {
+    "preload_on_startup": False, # Load and warm up a model as soon as the app starts
+    "last_model": None,          # Model loaded or used most recently
+    "precision": "fp32",         # Inference precision, see quantization.PRECISIONS
+    "decode_preset": "balanced", # Speed/accuracy preset, see decode_presets.PRESETS
+    "spoken_language": "auto",   # Language of the recordings; "auto" detects it
+    "translate": False,          # Translate to English instead of transcribing
+    "output_formats": ["txt"],   # Formats of saved transcripts, see writers.FORMATS
+}
+
+
+def get_settings_path():
+    return os.path.join(get_config_dir(), "settings.json")
+
+
+def load_settings(path=None):
+    """Returns the saved settings merged over the defaults."""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        with open(path or get_settings_path(), "r", encoding="utf-8") as f:
+            settings.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return settings
+
+
+def save_settings(settings, path=None):
+    path = path or get_settings_path()
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def update_setting(key, value):
+    """Changes one setting on disk and returns the full settings."""
+    settings = load_settings()
+    settings[key] = value
+    try:
+        save_settings(settings)
+    except OSError as e:
+        print(f"Could not save settings: {e}")
+    return settings
@@ -0,0 +1,431 @@
+# sharded.py
+# Sharded batch runs: several machines work through one backlog, coordinated
+# only through a shared directory (NFS, SMB, ...). No broker or server is needed.
+#
+# `init` splits the input files into chunks and writes each one to
+# <run>/todo. A node claims a chunk by renaming it into <run>/claimed under its
+# own name; a rename is atomic, so exactly one node wins each chunk. While it
+# works, the node touches its claim every HEARTBEAT_SECONDS. A claim that has not
+# been touched for --stale-seconds belongs to a node that crashed or lost the
+# share, and is claimed again (also by rename) by whichever node notices first.
+# A finished chunk's per-file summaries go to <run>/results. Times are read from
+# the shared filesystem rather than each node's clock, so clock skew between
+# hosts neither revives nor expires claims.
+#
+# Each node picks and loads its model like batch.py does (--model auto checks
+# that node's RAM and calibration) and runs batch.py's worker pool. When the last
+# chunk is done, the node that notices writes one merged report, <run>/report.json.
+#
+# Input paths are stored as given to `init`, so every node must see the files
+# (and --output-dir) under the same paths.
+#
+# Usage:
+#   python sharded.py init /shared/run1 "/shared/audio/**/*.wav" --chunk-size 16
+#   python sharded.py work /shared/run1 --model auto --workers 4 --output-dir /shared/transcripts
+#   python sharded.py report /shared/run1
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+from engine import audio_throughput
+from model_registry import get_sorted_models
+from batch import collect_input_files, report_file, report_aggregate, _init_worker, _transcribe_file
+from calibration import recommend_for_this_machine, DEFAULT_TARGET_RTF
+from quantization import PRECISIONS, DEFAULT_PRECISION, check_precision
+from mmap_weights import prepare_shared_weights
+from decode_presets import add_decode_arguments, decode_options_from_args
+from writers import FORMATS, DEFAULT_FORMATS
+from thread_plan import plan_for_this_machine, describe_plan, make_slot_counter
+
+# Bumped whenever the layout of a run directory changes
+RUN_FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 8
+# How often a working node touches its claim (more often if --stale-seconds is short)
+HEARTBEAT_SECONDS = 30
+# A claim untouched for this long is taken over by another node
+DEFAULT_STALE_SECONDS = 300
+# How often an idle node checks whether another node's claim went stale
+IDLE_POLL_SECONDS = 15
+
+
+def _write_json(path, data):
+    """Writes data to path atomically: other nodes see the old file or the complete new one."""
+    temp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _chunk_name(index):
+    return f"chunk-{index:05d}"
+
+
+class ShardedRun:
+    """One run directory: the manifest, chunks waiting/claimed/done, and the results."""
+
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+        self.manifest_path = os.path.join(run_dir, "manifest.json")
+        self.report_path = os.path.join(run_dir, "report.json")
+        self.todo_dir = os.path.join(run_dir, "todo")
+        self.claimed_dir = os.path.join(run_dir, "claimed")
+        self.results_dir = os.path.join(run_dir, "results")
+        self.nodes_dir = os.path.join(run_dir, "nodes")
+
+    def create(self, files, chunk_size=DEFAULT_CHUNK_SIZE, source=None):
+        """Writes the chunks, then the manifest; a run is only visible to nodes once it is complete."""
+        if os.path.exists(self.manifest_path):
+            raise ValueError(f"{self.run_dir} already holds a run")
+        for directory in (self.todo_dir, self.claimed_dir, self.results_dir, self.nodes_dir):
+            os.makedirs(directory, exist_ok=True)
+        chunks = [files[start:start + chunk_size] for start in range(0, len(files), chunk_size)]
+        for index, chunk in enumerate(chunks):
+            _write_json(os.path.join(self.todo_dir, _chunk_name(index) + ".json"), {"files": chunk})
+        _write_json(self.manifest_path, {
+            "version": RUN_FORMAT_VERSION,
+            "source": source,
+            "files": len(files),
+            "chunks": len(chunks),
+            "chunk_size": chunk_size,
+            "created_at": time.time(),
+        })
+        return len(chunks)
+
+    def load_manifest(self):
+        try:
+            manifest = _read_json(self.manifest_path)
+        except OSError:
+            raise ValueError(f"No run in {self.run_dir}; create one with 'sharded.py init'")
+        if manifest.get("version") != RUN_FORMAT_VERSION:
+            raise ValueError(f"{self.run_dir} was created by an incompatible version")
+        return manifest
+
+    def chunk_names(self):
+        return [_chunk_name(index) for index in range(self.load_manifest()["chunks"])]
+
+    def result_path(self, chunk):
+        return os.path.join(self.results_dir, chunk + ".json")
+
+    def is_done(self, chunk):
+        return os.path.exists(self.result_path(chunk))
+
+    def pending_chunks(self):
+        return [chunk for chunk in self.chunk_names() if not self.is_done(chunk)]
+
+    def waiting_chunks(self):
+        return sorted(name[:-len(".json")] for name in os.listdir(self.todo_dir) if name.endswith(".json"))
+
+    def claims(self):
+        """{claim file name: (chunk, node)} for every chunk some node is working on."""
+        claims = {}
+        for name in os.listdir(self.claimed_dir):
+            if name.endswith(".json") and "@" in name:
+                chunk, node = name[:-len(".json")].split("@", 1)
+                claims[name] = (chunk, node)
+        return claims
+
+    def load_results(self):
+        results = []
+        for name in sorted(os.listdir(self.results_dir)):
+            if name.endswith(".json"):
+                try:
+                    results.append(_read_json(os.path.join(self.results_dir, name)))
+                except (OSError, ValueError):
+                    pass # Being replaced right now; the complete file follows
+        return results
+
+
+class ShardNode:
+    """One worker machine's side of a run: claims chunks, keeps its claims alive, records results."""
+
+    def __init__(self, run, stale_seconds=DEFAULT_STALE_SECONDS):
+        self.run = run
+        self.stale_seconds = stale_seconds
+        self.heartbeat_seconds = min(HEARTBEAT_SECONDS, stale_seconds / 3)
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.node_path = os.path.join(run.nodes_dir, self.node_id + ".json")
+        self.claim_path = None
+        self.claim_lost = False
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def shared_now(self):
+        """The shared filesystem's current time: touching a file stamps it with the file server's clock."""
+        os.utime(self.node_path)
+        return os.stat(self.node_path).st_mtime
+
+    def register(self, info):
+        _write_json(self.node_path, dict(info, node=self.node_id, host=socket.gethostname(), pid=os.getpid()))
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            claim_path = self.claim_path
+            try:
+                os.utime(self.node_path)
+                if claim_path is not None:
+                    os.utime(claim_path)
+            except FileNotFoundError:
+                if claim_path is not None and claim_path == self.claim_path:
+                    # Another node took the chunk over: this one was too slow to touch it
+                    print(f"Lost the claim on {os.path.basename(claim_path)}; another node is redoing it")
+                    self.claim_lost = True
+            except OSError as e:
+                print(f"Heartbeat failed: {e}")
+
+    def _claim_path_for(self, chunk):
+        return os.path.join(self.run.claimed_dir, f"{chunk}@{self.node_id}.json")
+
+    def claim(self):
+        """Claims a waiting chunk, or else a stale claim. Returns (chunk, files) or None."""
+        waiting = self.run.waiting_chunks()
+        random.shuffle(waiting) # Nodes starting together don't all race for the same chunk
+        for chunk in waiting:
+            claimed = self._take(chunk, os.path.join(self.run.todo_dir, chunk + ".json"))
+            if claimed is not None:
+                return claimed
+
+        now = self.shared_now()
+        for name, (chunk, node) in self.run.claims().items():
+            old_path = os.path.join(self.run.claimed_dir, name)
+            try:
+                age = now - os.stat(old_path).st_mtime
+            except FileNotFoundError:
+                continue
+            if age < self.stale_seconds:
+                continue
+            if self.run.is_done(chunk):
+                # The node finished but died before releasing its claim
+                self._remove(old_path)
+                continue
+            claimed = self._take(chunk, old_path)
+            if claimed is not None:
+                print(f"Reclaimed {chunk} from {node} (no heartbeat for {age:.0f}s)")
+                return claimed
+        return None
+
+    def _take(self, chunk, source_path):
+        """
+        Moves a chunk file into a claim of this node's. Returns (chunk, files),
+        or None if another node got there first (or took it straight back).
+        """
+        claim_path = self._claim_path_for(chunk)
+        try:
+            files = _read_json(source_path)["files"]
+            # rename keeps the mtime, and an init-time or stale mtime would let other nodes reclaim it at once
+            os.utime(source_path)
+            os.rename(source_path, claim_path)
+            os.utime(claim_path) # Fails if another node already took it over
+        except FileNotFoundError:
+            return None # Another node was faster
+        self.claim_path = claim_path
+        self.claim_lost = False
+        return chunk, files
+
+    def finish(self, chunk, result):
+        """Records a chunk's results, then releases the claim."""
+        _write_json(self.run.result_path(chunk), dict(result, chunk=chunk, node=self.node_id))
+        claim_path, self.claim_path = self.claim_path, None
+        if not self.claim_lost:
+            self._remove(claim_path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stop(self):
+        self._stop.set()
+        self._remove(self.node_path)
+
+
+def merge_results(results, manifest):
+    """One report over all chunks: per-file summaries, per-node throughput and the run's wall time."""
+    summaries = [summary for result in results for summary in result["summaries"]]
+    nodes = {}
+    for result in results:
+        node = nodes.setdefault(result["node"], {"model": result.get("model"), "chunks": 0, "files": 0,
+                                                 "audio_duration": 0.0, "busy_seconds": 0.0})
+        node["chunks"] += 1
+        node["files"] += len(result["summaries"])
+        node["audio_duration"] += sum(s["audio_duration"] for s in result["summaries"] if "error" not in s)
+        node["busy_seconds"] += result["finished_at"] - result["started_at"]
+    for node in nodes.values():
+        node["throughput"] = audio_throughput(node["audio_duration"], node["busy_seconds"])
+    started = min((result["started_at"] for result in results), default=0.0)
+    finished = max((result["finished_at"] for result in results), default=0.0)
+    succeeded = [s for s in summaries if "error" not in s]
+    total_audio = sum(s["audio_duration"] for s in succeeded)
+    return {
+        "files": manifest["files"],
+        "succeeded": len(succeeded),
+        "failed": [s["file"] for s in summaries if "error" in s],
+        "audio_duration": total_audio,
+        "wall_seconds": finished - started,
+        "throughput": audio_throughput(total_audio, finished - started),
+        "nodes": nodes,
+        "summaries": summaries,
+    }
+
+
+def print_report(report):
+    for node_id, node in sorted(report["nodes"].items()):
+        print(f"  {node_id}: {node['files']} file(s) in {node['chunks']} chunk(s) with '{node['model']}', "
+              f"{node['audio_duration']:.1f}s audio in {node['busy_seconds']:.1f}s "
+              f"({node['throughput']:.2f} audio-s/s)")
+    report_aggregate(report["summaries"], report["files"], report["wall_seconds"])
+    for file_path in report["failed"]:
+        print(f"  FAILED: {file_path}")
+
+
+def write_report(run):
+    """Merges every chunk's results into <run>/report.json and prints it."""
+    report = merge_results(run.load_results(), run.load_manifest())
+    _write_json(run.report_path, report)
+    print(f"Run {run.run_dir}: {len(report['nodes'])} node(s)")
+    print_report(report)
+    return report
+
+
+def work(run, model_name, workers=1, device=None, output_dir=None, use_cache=True, options=None,
+         precision=DEFAULT_PRECISION, output_formats=DEFAULT_FORMATS, stale_seconds=DEFAULT_STALE_SECONDS):
+    """Claims and transcribes chunks until every chunk of the run has results. Returns this node's summaries."""
+    manifest = run.load_manifest()
+    node = ShardNode(run, stale_seconds)
+    node.register({"model": model_name, "precision": precision, "workers": workers})
+    print(f"Node {node.node_id}: model '{model_name}' ({precision}) on {workers} worker(s), "
+          f"{manifest['files']} file(s) in {manifest['chunks']} chunk(s)")
+    if workers > 1 and precision == DEFAULT_PRECISION:
+        prepare_shared_weights(model_name, device)
+
+    thread_plan = plan_for_this_machine(workers)
+    print(f"Threads: {describe_plan(thread_plan)}")
+
+    summaries = []
+    context = multiprocessing.get_context("spawn")
+    initargs = (model_name, device, use_cache, precision, thread_plan, make_slot_counter(context))
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            while True:
+                claimed = node.claim()
+                if claimed is None:
+                    if not run.pending_chunks():
+                        break
+                    # Other nodes are still working; take over if one of them dies
+                    time.sleep(min(IDLE_POLL_SECONDS, stale_seconds))
+                    continue
+                chunk, files = claimed
+                print(f"Claimed {chunk} ({len(files)} file(s))")
+                started_at = node.shared_now()
+                tasks = [(path, output_dir, tuple(output_formats), dict(options or {}), None) for path in files]
+                chunk_summaries = []
+                for summary in pool.imap_unordered(_transcribe_file, tasks):
+                    chunk_summaries.append(summary)
+                    summaries.append(summary)
+                    report_file(len(chunk_summaries), len(files), summary)
+                node.finish(chunk, {"model": model_name, "precision": precision, "started_at": started_at,
+                                    "finished_at": node.shared_now(), "summaries": chunk_summaries})
+    finally:
+        node.stop()
+
+    # Every node that sees the run complete writes the same report; the last write wins
+    write_report(run)
+    return summaries
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Split a batch transcription across machines sharing a directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="Create a run: split the input files into chunks")
+    init.add_argument("run_dir", help="Shared directory for the run's chunks, claims and results")
+    init.add_argument("source", help="Directory (searched recursively) or glob pattern of input files")
+    init.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                      help=f"Files per chunk; a node claims one chunk at a time (default: {DEFAULT_CHUNK_SIZE})")
+    init.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+
+    node = commands.add_parser("work", help="Claim and transcribe chunks until the run is done (start one per machine)")
+    node.add_argument("run_dir", help="Shared directory created by 'init'")
+    node.add_argument("--model", default="base", choices=["auto"] + get_sorted_models(),
+                      help="Whisper model to load in each worker; 'auto' uses this machine's recommendation")
+    node.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                      help="With --model auto: required real-time factor, processing time / audio time")
+    node.add_argument("--workers", type=int, default=1, help="Worker processes on this machine")
+    node.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    node.add_argument("--precision", default=DEFAULT_PRECISION, choices=PRECISIONS,
+                      help="Inference precision; int8 is quantised and runs on the CPU (default: fp32)")
+    node.add_argument("--output-dir", default=None,
+                      help="Directory for the transcripts (default: next to each input file)")
+    node.add_argument("--output-format", nargs="+", default=list(DEFAULT_FORMATS), choices=FORMATS,
+                      help="Transcript formats to write, e.g. 'srt vtt' (default: txt)")
+    node.add_argument("--no-output", action="store_true", help="Only report throughput, do not write transcripts")
+    node.add_argument("--no-cache", action="store_true",
+                      help="Ignore and don't update the transcript cache or resume checkpoints")
+    node.add_argument("--vad", action="store_true",
+                      help="Skip silence: only decode the speech regions found by an energy pre-pass")
+    node.add_argument("--stale-seconds", type=float, default=DEFAULT_STALE_SECONDS,
+                      help="Take over another node's chunk after this long without a heartbeat "
+                           f"(default: {DEFAULT_STALE_SECONDS})")
+    add_decode_arguments(node)
+
+    report = commands.add_parser("report", help="Print and save the merged report of a run")
+    report.add_argument("run_dir", help="Shared directory created by 'init'")
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    run = ShardedRun(args.run_dir)
+    try:
+        if args.command == "init":
+            files = [os.path.abspath(path) for path in collect_input_files(args.source, not args.no_recursive)]
+            if not files:
+                print(f"No audio or video files found for: {args.source}")
+                return 1
+            chunks = run.create(files, max(1, args.chunk_size), source=args.source)
+            print(f"Created run {args.run_dir}: {len(files)} file(s) in {chunks} chunk(s)")
+            return 0
+
+        if args.command == "report":
+            report = write_report(run)
+            pending = run.pending_chunks()
+            if pending:
+                print(f"{len(pending)} chunk(s) not finished yet")
+            return 0 if not pending and not report["failed"] else 2
+
+        check_precision(args.precision, args.device)
+        decode_options = decode_options_from_args(args)
+        if args.stale_seconds <= 0:
+            raise ValueError("--stale-seconds must be positive")
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.model == "auto":
+        args.model, reason = recommend_for_this_machine(args.target_rtf, workers=args.workers)
+        print(f"Selected model '{args.model}' ({reason})")
+    output_dir = None if args.no_output else (args.output_dir or "")
+    summaries = work(run, args.model, workers=max(1, args.workers), device=args.device, output_dir=output_dir,
+                     use_cache=not args.no_cache, options=dict(decode_options, vad=True) if args.vad else decode_options,
+                     precision=args.precision, output_formats=args.output_format, stale_seconds=args.stale_seconds)
+    return 0 if all("error" not in s for s in summaries) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
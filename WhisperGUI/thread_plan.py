@@ -0,0 +1,324 @@
+# thread_plan.py
+# CPU thread and affinity planning for worker processes.
+#
+# Left alone, torch starts one intra-op thread per core in every process, so
+# four workers on an 8-core machine run 32 busy threads that keep evicting each
+# other from the cores and caches. The planner gives each worker its own set of
+# physical cores (kept within one NUMA node where it can), pins the worker to
+# them and sets torch's intra-op thread count to match. Whisper's graph runs
+# one operator at a time, so the inter-op pool gets a single thread.
+#
+# What suits a machine is measured rather than guessed: the sweep runs the
+# same workload with each configuration, and the best one per worker count is
+# saved in the calibration profile (~/.config/whisper_gui/calibration.json).
+# batch.py, sharded.py and long-file mode then use it.
+#
+# Usage:
+#   python thread_plan.py show --workers 4
+#   python thread_plan.py sweep --model base --workers 1 2 4
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import psutil
+
+import benchmark
+from calibration import load_profile, save_profile
+from engine import TranscriptionEngine
+from model_registry import get_sorted_models
+from quantization import PRECISIONS, DEFAULT_PRECISION, check_precision
+
+# Inter-op threads per worker; whisper's modules run sequentially
+INTEROP_THREADS = 1
+# Length of the clip transcribed by each sweep job
+SWEEP_SECONDS = 30
+# Jobs per worker in one sweep measurement; more evens out scheduling noise
+SWEEP_JOBS_PER_WORKER = 2
+
+_SYSFS_CPU = "/sys/devices/system/cpu"
+_SYSFS_NODE = "/sys/devices/system/node"
+
+# Each sweep worker keeps its own engine for its whole lifetime
+_sweep_engine = None
+
+
+def _parse_cpulist(text):
+    """'0-3,8-11' -> [0, 1, 2, 3, 8, 9, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def _read_sysfs(path):
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def get_usable_cpus():
+    """CPUs this process may run on (its affinity mask where the OS has one)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def get_numa_nodes(cpus):
+    """Usable CPUs grouped by NUMA node; a single group where the layout is unknown (non-Linux)."""
+    nodes = []
+    if os.path.isdir(_SYSFS_NODE):
+        usable = set(cpus)
+        for name in sorted(os.listdir(_SYSFS_NODE)):
+            if name.startswith("node") and name[4:].isdigit():
+                cpulist = _read_sysfs(os.path.join(_SYSFS_NODE, name, "cpulist"))
+                node_cpus = [cpu for cpu in _parse_cpulist(cpulist or "") if cpu in usable]
+                if node_cpus:
+                    nodes.append(node_cpus)
+    return nodes or [list(cpus)]
+
+
+def get_physical_cores(cpus):
+    """
+    Groups CPUs into physical cores (hyperthread siblings together), in CPU
+    order. Without topology information every CPU counts as its own core.
+    """
+    cores = {}
+    for cpu in cpus:
+        core_id = _read_sysfs(os.path.join(_SYSFS_CPU, f"cpu{cpu}", "topology", "core_id"))
+        package_id = _read_sysfs(os.path.join(_SYSFS_CPU, f"cpu{cpu}", "topology", "physical_package_id"))
+        key = (package_id, core_id) if core_id is not None else ("cpu", cpu)
+        cores.setdefault(key, []).append(cpu)
+    return sorted(cores.values())
+
+
+def plan_threads(workers, threads_per_worker=None, pin=True, cpus=None):
+    """
+    Returns one {"cpus", "threads", "interop_threads", "nodes"} dict per worker.
+    Workers are spread over the NUMA nodes in proportion to their size, and
+    each gets a contiguous share of its node's physical cores; threads
+    defaults to that number of cores. With fewer workers than nodes, each
+    worker spans whole nodes instead. With pin=False the CPU sets are left out.
+    """
+    workers = max(1, workers)
+    nodes = [get_physical_cores(node) for node in get_numa_nodes(cpus or get_usable_cpus())]
+    node_ids = [[index] for index in range(len(nodes))]
+    if workers < len(nodes):
+        node_ids = [list(range(len(nodes)))[worker::workers] for worker in range(workers)]
+        nodes = [[core for index in ids for core in nodes[index]] for ids in node_ids]
+
+    # Each worker goes to the node that would then have the most cores per worker
+    workers_per_node = [0] * len(nodes)
+    for _ in range(workers):
+        index = max(range(len(nodes)), key=lambda i: len(nodes[i]) / (workers_per_node[i] + 1))
+        workers_per_node[index] += 1
+
+    plan = []
+    for ids, cores, count in zip(node_ids, nodes, workers_per_node):
+        for worker in range(count):
+            if count <= len(cores):
+                # Contiguous slices; the first len(cores) % count workers get one core more
+                start = worker * (len(cores) // count) + min(worker, len(cores) % count)
+                size = len(cores) // count + (1 if worker < len(cores) % count else 0)
+                worker_cores = cores[start:start + size]
+            else:
+                worker_cores = [cores[worker % len(cores)]] # More workers than cores: they share
+            plan.append({
+                "cpus": sorted(cpu for core in worker_cores for cpu in core) if pin else None,
+                "threads": threads_per_worker or len(worker_cores),
+                "interop_threads": INTEROP_THREADS,
+                "nodes": ids,
+            })
+    return plan
+
+
+def describe_plan(plan):
+    if not plan:
+        return "torch defaults, not pinned"
+    threads = sorted({worker["threads"] for worker in plan})
+    nodes = sorted({index for worker in plan for index in worker["nodes"]})
+    pinned = "pinned" if plan[0]["cpus"] is not None else "not pinned"
+    return (f"{len(plan)} worker(s) x {'/'.join(map(str, threads))} thread(s), {pinned}, "
+            f"NUMA node(s) {','.join(map(str, nodes))}")
+
+
+def apply_worker_plan(worker_plan):
+    """Pins the calling process and sets its torch thread counts. Call before the model is used."""
+    threads = str(worker_plan["threads"])
+    # Read by OpenMP/MKL when torch first starts its pools
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ["MKL_NUM_THREADS"] = threads
+    if worker_plan["cpus"] and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, worker_plan["cpus"])
+    import torch
+    torch.set_num_threads(worker_plan["threads"])
+    try:
+        torch.set_num_interop_threads(worker_plan["interop_threads"])
+    except RuntimeError:
+        pass # Only possible before torch ran any parallel work in this process
+
+
+def make_slot_counter(context):
+    """Shared counter through which each new worker process takes the next entry of the plan."""
+    return context.Value("i", 0)
+
+
+def init_worker_threads(plan, slot_counter):
+    """Pool initializer helper: applies the next unused entry of plan to this worker."""
+    if not plan:
+        return
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    apply_worker_plan(plan[slot % len(plan)]) # Workers started later, e.g. replacements, wrap around
+
+
+def plan_for_this_machine(workers):
+    """
+    The plan for this many workers: the best swept configuration if one was
+    saved for this machine's CPUs, else cores split evenly. None means the sweep
+    found torch's own defaults fastest.
+    """
+    saved = ((load_profile() or {}).get("threads") or {})
+    setting = saved.get("by_workers", {}).get(str(workers)) if saved.get("cpus") == get_usable_cpus() else None
+    if setting is None:
+        return plan_threads(workers)
+    if not setting["planned"]:
+        return None
+    return plan_threads(workers, setting.get("threads_per_worker"), setting.get("pin", True))
+
+
+# --- Sweep ---
+
+def candidate_configs(worker_counts):
+    """(label, worker count, plan, setting saved if it wins) for every configuration the sweep measures."""
+    cores = len(get_physical_cores(get_usable_cpus()))
+    logical = len(get_usable_cpus())
+    configs = []
+    for workers in worker_counts:
+        configs.append(("default", workers, None, {"planned": False}))
+        configs.append(("planned", workers, plan_threads(workers), {"planned": True}))
+        if logical > cores:
+            # Hyperthreads as extra torch threads; sometimes faster for the decoder
+            threads = max(1, logical // workers)
+            configs.append(("planned+smt", workers, plan_threads(workers, threads),
+                            {"planned": True, "threads_per_worker": threads}))
+        if workers > 1:
+            configs.append(("planned, unpinned", workers, plan_threads(workers, pin=False),
+                            {"planned": True, "pin": False}))
+    return configs
+
+
+def _sweep_init(model_name, device, precision, plan, slot_counter):
+    global _sweep_engine
+    init_worker_threads(plan, slot_counter)
+    _sweep_engine = TranscriptionEngine(model_name, device=device, use_transcript_cache=False, precision=precision,
+                                        use_checkpoints=False)
+    _sweep_engine.warm_up()
+
+
+def _sweep_transcribe(file_path):
+    return _sweep_engine.transcribe(file_path)["audio_duration"]
+
+
+def measure_config(model_name, workers, plan, fixture, jobs_per_worker=SWEEP_JOBS_PER_WORKER, device=None,
+                   precision=DEFAULT_PRECISION):
+    """Aggregate real-time factor (wall time / audio time) of workers processes transcribing in parallel."""
+    context = multiprocessing.get_context("spawn")
+    slot_counter = make_slot_counter(context)
+    with context.Pool(workers, initializer=_sweep_init,
+                      initargs=(model_name, device, precision, plan, slot_counter)) as pool:
+        pool.map(_sweep_transcribe, [fixture] * workers, chunksize=1) # Every worker loaded and warmed up
+        start_time = time.time()
+        durations = pool.map(_sweep_transcribe, [fixture] * (workers * jobs_per_worker), chunksize=1)
+        wall_seconds = time.time() - start_time
+    return wall_seconds / sum(durations)
+
+
+def sweep(model_name, worker_counts, seconds=SWEEP_SECONDS, device=None, precision=DEFAULT_PRECISION):
+    """Measures every candidate configuration and saves the best one per worker count in the calibration profile."""
+    fixture = benchmark.prepare_fixtures(specs=[("threads", seconds)])["threads"]
+    best = {}
+    for label, workers, plan, setting in candidate_configs(worker_counts):
+        print(f"Measuring {label}: {describe_plan(plan) if plan else f'{workers} worker(s), torch defaults'}")
+        try:
+            rtf = measure_config(model_name, workers, plan, fixture, device=device, precision=precision)
+        except Exception as e:
+            print(f"  failed: {e}")
+            continue
+        print(f"  aggregate RTF {rtf:.3f} ({1 / rtf:.2f} audio-s/s)")
+        if str(workers) not in best or rtf < best[str(workers)]["rtf"]:
+            best[str(workers)] = dict(setting, rtf=rtf, label=label)
+
+    if not best:
+        return None
+    profile = load_profile() or {}
+    profile["threads"] = {
+        "cpus": get_usable_cpus(),
+        "model": model_name,
+        "swept_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "by_workers": best,
+    }
+    save_profile(profile)
+    for workers, setting in sorted(best.items(), key=lambda item: int(item[0])):
+        print(f"Best for {workers} worker(s): {setting['label']} (aggregate RTF {setting['rtf']:.3f})")
+    fastest = min(best.items(), key=lambda item: item[1]["rtf"])
+    print(f"Fastest overall: {fastest[0]} worker(s), {fastest[1]['label']}")
+    return best
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Plan and measure CPU threads and affinity for worker processes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    show = commands.add_parser("show", help="Show the CPU layout and the plan used for a number of workers")
+    show.add_argument("--workers", type=int, default=1, help="Concurrent worker processes")
+
+    run = commands.add_parser("sweep", help="Measure each configuration and save the best per worker count")
+    run.add_argument("--model", default="base", choices=get_sorted_models(), help="Whisper model to measure with")
+    run.add_argument("--workers", type=int, nargs="+", default=None,
+                     help="Worker counts to try (default: 1, 2, 4, ... up to the number of physical cores)")
+    run.add_argument("--seconds", type=int, default=SWEEP_SECONDS, help="Length of the clip each job transcribes")
+    run.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    run.add_argument("--precision", default=DEFAULT_PRECISION, choices=PRECISIONS,
+                     help="Inference precision; int8 is quantised and runs on the CPU (default: fp32)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    cpus = get_usable_cpus()
+    cores = get_physical_cores(cpus)
+    if args.command == "show":
+        nodes = get_numa_nodes(cpus)
+        print(f"{len(cpus)} usable CPU(s), {len(cores)} physical core(s), {len(nodes)} NUMA node(s), "
+              f"{psutil.cpu_count()} CPU(s) in total")
+        plan = plan_for_this_machine(args.workers)
+        print(f"Plan: {describe_plan(plan)}")
+        for index, worker in enumerate(plan or []):
+            print(f"  worker {index}: {worker['threads']} thread(s) on CPUs {worker['cpus'] or 'any'}")
+        return 0
+
+    try:
+        check_precision(args.precision, args.device)
+    except ValueError as e:
+        parser.error(str(e))
+    worker_counts = args.workers
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= len(cores):
+            worker_counts.append(worker_counts[-1] * 2)
+    return 0 if sweep(args.model, worker_counts, args.seconds, args.device, args.precision) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
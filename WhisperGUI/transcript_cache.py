@@ -0,0 +1,137 @@
+# transcript_cache.py
+# Persistent, content-addressed cache of finished transcripts.
+# Entries are keyed by a hash of the audio bytes plus the model name and the
+# decode options, so renaming or copying a file still hits, while changing the
+# model or an option does not return a stale result.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from app_paths import get_cache_dir
+
+# Default size cap for the whole cache directory
+DEFAULT_MAX_BYTES = 200 * 1024 ** 2
+# Read size when hashing audio files
+HASH_BLOCK_SIZE = 1024 ** 2
+# Bump when the stored entry layout changes so old entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+# (path, size, mtime) -> digest, so the same unchanged file is hashed only once per process
+_hash_memo = {}
+_hash_memo_lock = threading.Lock()
+
+
+def hash_file(file_path):
+    """SHA-256 of a file's contents, memoised on (path, size, mtime)."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_memo_lock:
+        if memo_key in _hash_memo:
+            return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    file_hash = digest.hexdigest()
+
+    with _hash_memo_lock:
+        _hash_memo[memo_key] = file_hash
+    return file_hash
+
+
+def make_cache_key(audio_hash, model_name, options):
+    """Combines the audio hash, model and decode options into one cache key."""
+    payload = json.dumps(
+        {"version": CACHE_FORMAT_VERSION, "audio": audio_hash, "model": model_name, "options": options},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """On-disk JSON entries with a total size cap, evicting least recently used first."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or get_cache_dir("transcripts")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key):
+        """Returns the stored result for key, or None. Counts the hit or miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path) # Mark as recently used for eviction
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Stores the text, segments and language of a result, then enforces the size cap."""
+        entry = {
+            "text": result["text"],
+            "segments": result.get("segments", []),
+            "language": result.get("language"),
+            "audio_duration": result.get("audio_duration"),
+        }
+        # Write to a temp file first so a crash never leaves a truncated entry behind
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._entry_path(key))
+        except OSError as e:
+            print(f"Could not write transcript cache entry: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        """Deletes the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+# --- Process-wide instance ---
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_transcript_cache():
+    """Returns the transcript cache shared by everything in this process."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TranscriptCache()
+        return _shared_cache
@@ -0,0 +1,227 @@
+# transcript_view.py
+# Transcript display that stays responsive for multi-hour recordings.
+#
+# The segments live in an in-memory SegmentIndex; the Tk text widget only ever
+# holds a bounded window of them. Scrolling to the edge of that window loads
+# the next page and drops one from the other end, and the scrollbar is driven
+# by the position in the whole transcript, not in the widget. Search and
+# jump-to-timestamp work on the index, so they never touch off-screen text.
+
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+from engine import format_timestamp
+
+# Segments added to (or dropped from) the widget at a time
+PAGE_SEGMENTS = 100
+# Most segments the text widget holds at once
+MAX_RENDERED_SEGMENTS = 3 * PAGE_SEGMENTS
+
+
+class SegmentIndex:
+    """Segment texts and start times, searchable without rendering them."""
+
+    def __init__(self):
+        self.texts = []
+        self.starts = []
+        self._search_text = None # Lower-cased texts joined by newlines, built on first search
+        self._search_offsets = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, segments):
+        self.texts.extend(segment["text"].strip() for segment in segments)
+        self.starts.extend(segment["start"] for segment in segments)
+        self._search_text = None
+
+    def line(self, i, timestamps=True):
+        if timestamps:
+            return f"[{format_timestamp(self.starts[i])}] {self.texts[i]}"
+        return self.texts[i]
+
+    def index_at_time(self, seconds):
+        """Index of the segment playing at the given time (the last one starting before it)."""
+        return max(0, bisect.bisect_right(self.starts, seconds) - 1)
+
+    def find(self, query, start=0):
+        """Index of the first segment at or after start containing query (case-insensitive),
+        wrapping around to the beginning; None if there is none."""
+        query = query.lower()
+        if not query or not self.texts:
+            return None
+        if self._search_text is None:
+            self._search_offsets = []
+            offset = 0
+            for text in self.texts:
+                self._search_offsets.append(offset)
+                offset += len(text) + 1
+            self._search_text = "\n".join(text.lower() for text in self.texts)
+        start = min(start, len(self.texts) - 1)
+        position = self._search_text.find(query, self._search_offsets[start])
+        if position == -1:
+            position = self._search_text.find(query)
+        if position == -1:
+            return None
+        return bisect.bisect_right(self._search_offsets, position) - 1
+
+
+class TranscriptView(ttk.Frame):
+    """
+    Read-only transcript widget that renders at most MAX_RENDERED_SEGMENTS
+    segments, so appending, scrolling and searching cost the same for a
+    five-minute clip and a five-hour recording.
+    """
+
+    def __init__(self, master, height=15, width=75, **kwargs):
+        super().__init__(master, **kwargs)
+        self.index = SegmentIndex()
+        self.timestamps = True
+        self.first = 0 # Index of the first rendered segment
+        self.last = 0  # One past the last rendered segment
+        self.following = True # Keep the newest segment in view as segments arrive
+        self.last_match = None
+        self._load_pending = False
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self, wrap=tk.WORD, height=height, width=width, yscrollcommand=self._on_text_scrolled)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.tag_configure("match", background="yellow")
+        self.text.configure(state="disabled")
+
+    # --- Content ---
+
+    def show_message(self, message):
+        """Replaces the transcript with a plain message (placeholder or error)."""
+        self.clear()
+        self._edit(lambda: self.text.insert(tk.END, message))
+
+    def clear(self, timestamps=True):
+        self.index = SegmentIndex()
+        self.timestamps = timestamps
+        self.first = self.last = 0
+        self.following = True
+        self.last_match = None
+        self._edit(lambda: self.text.delete("1.0", tk.END))
+
+    def set_segments(self, segments, timestamps=True):
+        """Shows a finished transcript from the top."""
+        self.clear(timestamps)
+        self.index.add(segments)
+        self.following = False
+        self._render(0, min(len(self.index), MAX_RENDERED_SEGMENTS))
+
+    def append_segments(self, segments):
+        """Adds newly decoded segments; they are only rendered if the end of the transcript is in view."""
+        previous_total = len(self.index)
+        self.index.add(segments)
+        total = len(self.index)
+        if not self.following or self.last != previous_total:
+            self._update_scrollbar()
+            return
+        if total - self.first > MAX_RENDERED_SEGMENTS:
+            self._render(max(0, total - PAGE_SEGMENTS), total)
+        else:
+            lines = self._lines(previous_total, total)
+            self._edit(lambda: self.text.insert(tk.END, ("\n" if previous_total > self.first else "") + lines))
+            self.last = total
+        self.text.see(tk.END)
+
+    # --- Navigation ---
+
+    def jump_to_segment(self, i):
+        """Renders the page around segment i and scrolls it to the top of the view."""
+        total = len(self.index)
+        if total == 0:
+            return
+        first = max(0, i - PAGE_SEGMENTS)
+        self._render(first, min(total, first + 2 * PAGE_SEGMENTS))
+        self.following = False
+        self.text.yview(f"{i - self.first + 1}.0")
+
+    def jump_to_time(self, seconds):
+        self.jump_to_segment(self.index.index_at_time(seconds))
+
+    def find_next(self, query):
+        """Jumps to the next segment containing query and highlights it. Returns False if there is none."""
+        start = self.last_match + 1 if self.last_match is not None else self._top_segment()
+        i = self.index.find(query, start % max(1, len(self.index)))
+        if i is None:
+            return False
+        self.last_match = i
+        self.jump_to_segment(i)
+        line = i - self.first + 1
+        self.text.tag_remove("match", "1.0", tk.END)
+        position = self.text.search(query, f"{line}.0", stopindex=f"{line}.end", nocase=True)
+        if position:
+            self.text.tag_add("match", position, f"{position}+{len(query)}c")
+        return True
+
+    # --- Rendering ---
+
+    def _lines(self, first, last):
+        return "\n".join(self.index.line(i, self.timestamps) for i in range(first, last))
+
+    def _edit(self, change):
+        self.text.configure(state="normal")
+        change()
+        self.text.configure(state="disabled")
+
+    def _render(self, first, last):
+        def replace():
+            self.text.delete("1.0", tk.END)
+            self.text.insert(tk.END, self._lines(first, last))
+        self.first, self.last = first, last
+        self._edit(replace)
+
+    def _top_segment(self):
+        """Index of the segment at the top of the view."""
+        line = int(self.text.index("@0,0").split(".")[0])
+        return self.first + line - 1
+
+    def _on_text_scrolled(self, low, high):
+        """Text widget scrolled: update the scrollbar and load a page if an edge was reached."""
+        low, high = float(low), float(high)
+        total = len(self.index)
+        self.following = self.last == total and high >= 1.0
+        self._update_scrollbar(low, high)
+        at_edge = (high >= 1.0 and self.last < total) or (low <= 0.0 and self.first > 0)
+        if at_edge and not self._load_pending:
+            # Not from inside the widget's own callback
+            self._load_pending = True
+            self.after_idle(self._load_page, high >= 1.0)
+
+    def _load_page(self, forward):
+        """Renders the next (or previous) page, dropping one from the other end, keeping the view still."""
+        self._load_pending = False
+        anchor = self._top_segment()
+        total = len(self.index)
+        if forward:
+            last = min(total, self.last + PAGE_SEGMENTS)
+            first = max(self.first, last - MAX_RENDERED_SEGMENTS)
+        else:
+            first = max(0, self.first - PAGE_SEGMENTS)
+            last = min(self.last, first + MAX_RENDERED_SEGMENTS)
+        if (first, last) == (self.first, self.last):
+            return
+        self._render(first, last)
+        self.text.yview(f"{anchor - first + 1}.0")
+
+    def _update_scrollbar(self, low=None, high=None):
+        """Scrollbar position within the whole transcript rather than the rendered window."""
+        if low is None:
+            low, high = (float(f) for f in self.text.yview())
+        total = len(self.index)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        rendered = self.last - self.first
+        self.scrollbar.set((self.first + low * rendered) / total, (self.first + high * rendered) / total)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto" and len(self.index) > 0:
+            self.jump_to_segment(min(len(self.index) - 1, int(float(args[1]) * len(self.index))))
+        else:
+            self.text.yview(*args) # Arrows and paging scroll the rendered window; its edges load more
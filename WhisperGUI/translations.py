@@ -17,8 +17,12 @@ TRANSLATIONS = {
         # Model selection
         "select_model": "Select Whisper Model:",
         "ram_info": "System RAM: {ram_gb:.1f} GB",
-        "ram_info_with_recommendation": "System RAM: {ram_gb:.1f} GB (Recommended: {model})",
-        "ram_info_no_recommendation": "System RAM: {ram_gb:.1f} GB (Could not recommend model)",
+        "ram_info_with_recommendation": "System RAM: {ram_gb:.1f} GB, {available_gb:.1f} GB free (Recommended: {model})",
+        "ram_info_no_recommendation": "System RAM: {ram_gb:.1f} GB, {available_gb:.1f} GB free (Could not recommend model)",
+        "ram_info_loading_models": "System RAM: {ram_gb:.1f} GB, {available_gb:.1f} GB free (loading model list...)",
+        "target_rtf": "Target speed (processing time / audio time):",
+        "calibrate": "Calibrate",
+        "calibrating": "Calibrating...",
         
         # File selection
         "select_audio_file": "Select Audio File",
@@ -26,24 +30,92 @@ TRANSLATIONS = {
         
         # Action buttons
         "load_reload_model": "Load/Reload Model",
+        "preload_on_startup": "Load and warm up model at startup",
         "loading": "Loading...",
         "transcribe": "Transcribe",
         "transcribing": "Transcribing...",
         
+        # Output options
+        "stream_output": "Show segments as they are decoded",
+        "save_transcript_next_to_file": "Save transcript next to the audio file as",
+        "skip_silence": "Skip silence",
+        "find_next": "Find next",
+        "go_to_time": "Go to time",
+        "status_not_found": "Status: '{query}' not found in the transcript",
+        "status_invalid_time": "Status: Enter a time as [HH:]MM:SS or seconds",
+        "decode_preset": "Preset:",
+        "preset_fastest": "Fastest",
+        "preset_balanced": "Balanced",
+        "preset_accurate": "Most accurate",
+        "spoken_language": "Spoken language:",
+        "beam_size": "Beam size:",
+        "translate_to_english": "Translate to English",
+        "dialog_invalid_decode_option": "Invalid decoding option",
+        "status_fallbacks": " | {count} window(s) decoded again",
+        "status_resumed": " | resumed from a checkpoint at {time}",
+        "profile": "Profile:",
+        "profile_none": "Profile: shown when the selected job has finished",
+        "export_trace": "Export trace",
+        "export_trace_title": "Save the trace of the selected job",
+        "file_type_trace": "Chrome trace (JSON)",
+        "status_trace_saved": "Status: Trace saved to {path}",
+        "dialog_trace_error": "Could not save the trace:\n{error}",
+        "stage_audio_decode": "audio",
+        "stage_vad": "VAD",
+        "stage_mel": "mel",
+        "stage_language_detection": "language",
+        "stage_encoder": "encoder",
+        "stage_decoder": "decoder",
+        "stage_fallback_re-decode": "fallbacks",
+        "stage_window": "other",
+        "stage_gui_update": "GUI",
+        "precision": "Precision:",
+        
+        # Job queue
+        "files_selected": "{count} files selected",
+        "column_file": "File",
+        "column_model": "Model",
+        "column_status": "Status",
+        "column_progress": "Progress",
+        "job_move_up": "Move Up",
+        "job_move_down": "Move Down",
+        "job_run_next": "Run Next",
+        "job_cancel": "Cancel Job",
+        "clear_finished": "Clear Finished",
+        "job_status_queued": "Queued",
+        "job_status_running": "Running",
+        "job_status_done": "Done",
+        "job_status_failed": "Failed",
+        "job_status_cancelled": "Cancelled",
+        "job_waiting": "Waiting in the queue for model '{model}'...\n",
+        "job_model_downgraded": "{model} (instead of {requested}, low memory)",
+        
         # Status messages
         "status_select_model": "Status: Select a model and click Load/Reload",
+        "status_loading_whisper": "Status: Loading Whisper...",
+        "status_whisper_load_failed": "Status: Could not load Whisper: {error}",
         "status_recommended_model": "Status: Recommended model '{model}'. Click 'Load/Reload Model'.",
         "status_ram_detection_failed": "Status: Could not detect RAM. Select model manually and load.",
         "status_model_changed": "Status: Model changed to '{model}'. Click 'Load/Reload Model'.",
         "status_loading_model": "Status: Loading model '{model}'...",
         "status_model_loaded": "Status: Model '{model}' loaded. Ready.",
+        "status_model_loaded_timed": "Status: Model '{model}' loaded in {load:.1f}s, warmed up in {warmup:.1f}s. Ready.",
+        "status_warming_up": "Status: Warming up model '{model}'...",
         "status_model_loaded_select_file": "Status: Model '{model}' loaded. Select file.",
         "status_load_model_or_select_file": "Status: Load model or select file.",
         "status_file_selected": "Status: File selected. Ready to transcribe.",
         "status_transcribing": "Status: Transcribing...",
         "status_transcription_complete": "Status: Transcription Complete ({time:.2f}s)",
+        "status_transcription_complete_streamed": "Status: Transcription Complete ({time:.2f}s, first text after {first:.2f}s)",
+        "status_cache_stats": " | Cache: {hits} hit(s), {misses} miss(es)",
+        "status_vad_stats": " | Skipped {skipped} of silence ({percent:.0f}%), {speedup:.1f}x less audio decoded",
         "status_transcription_failed": "Status: Transcription Failed!",
+        "status_queue": "Status: {running} running, {queued} queued",
+        "status_job_cancelled": "Status: Job cancelled ({file})",
         "status_error_loading_model": "Status: Error loading model '{model}'!",
+        "status_calibrating": "Status: Measuring models on this machine...",
+        "status_calibration_done": "Status: Calibration finished. Recommended model '{model}'.",
+        "status_calibration_failed": "Status: Calibration failed: {error}",
         
         # Dialog messages
         "dialog_ram_detection_error": "Could not automatically detect system RAM.\n{error}\nPlease select a model manually.",
@@ -81,8 +153,12 @@ TRANSLATIONS = {
         # Model selection
         "select_model": "Seleziona Modello Whisper:",
         "ram_info": "RAM di Sistema: {ram_gb:.1f} GB",
-        "ram_info_with_recommendation": "RAM di Sistema: {ram_gb:.1f} GB (Consigliato: {model})",
-        "ram_info_no_recommendation": "RAM di Sistema: {ram_gb:.1f} GB (Impossibile consigliare un modello)",
+        "ram_info_with_recommendation": "RAM di Sistema: {ram_gb:.1f} GB, {available_gb:.1f} GB liberi (Consigliato: {model})",
+        "ram_info_no_recommendation": "RAM di Sistema: {ram_gb:.1f} GB, {available_gb:.1f} GB liberi (Impossibile consigliare un modello)",
+        "ram_info_loading_models": "RAM di Sistema: {ram_gb:.1f} GB, {available_gb:.1f} GB liberi (caricamento elenco modelli...)",
+        "target_rtf": "Velocità obiettivo (tempo di elaborazione / durata audio):",
+        "calibrate": "Calibra",
+        "calibrating": "Calibrazione...",
         
         # File selection
         "select_audio_file": "Seleziona File Audio",
@@ -90,24 +166,92 @@ TRANSLATIONS = {
         
         # Action buttons
         "load_reload_model": "Carica/Ricarica Modello",
+        "preload_on_startup": "Carica e prepara il modello all'avvio",
         "loading": "Caricamento...",
         "transcribe": "Trascrivi",
         "transcribing": "Trascrivendo...",
         
+        # Output options
+        "stream_output": "Mostra i segmenti man mano che vengono decodificati",
+        "save_transcript_next_to_file": "Salva la trascrizione accanto al file audio come",
+        "skip_silence": "Salta il silenzio",
+        "find_next": "Trova successivo",
+        "go_to_time": "Vai al tempo",
+        "status_not_found": "Stato: '{query}' non trovato nella trascrizione",
+        "status_invalid_time": "Stato: Inserisci un tempo come [HH:]MM:SS o in secondi",
+        "decode_preset": "Preset:",
+        "preset_fastest": "Più veloce",
+        "preset_balanced": "Bilanciato",
+        "preset_accurate": "Più accurato",
+        "spoken_language": "Lingua parlata:",
+        "beam_size": "Beam size:",
+        "translate_to_english": "Traduci in inglese",
+        "dialog_invalid_decode_option": "Opzione di decodifica non valida",
+        "status_fallbacks": " | {count} finestra/e decodificate di nuovo",
+        "status_resumed": " | ripresa da un checkpoint a {time}",
+        "profile": "Profilo:",
+        "profile_none": "Profilo: mostrato al termine del lavoro selezionato",
+        "export_trace": "Esporta traccia",
+        "export_trace_title": "Salva la traccia del lavoro selezionato",
+        "file_type_trace": "Traccia Chrome (JSON)",
+        "status_trace_saved": "Stato: Traccia salvata in {path}",
+        "dialog_trace_error": "Impossibile salvare la traccia:\n{error}",
+        "stage_audio_decode": "audio",
+        "stage_vad": "VAD",
+        "stage_mel": "mel",
+        "stage_language_detection": "lingua",
+        "stage_encoder": "encoder",
+        "stage_decoder": "decoder",
+        "stage_fallback_re-decode": "fallback",
+        "stage_window": "altro",
+        "stage_gui_update": "GUI",
+        "precision": "Precisione:",
+        
+        # Job queue
+        "files_selected": "{count} file selezionati",
+        "column_file": "File",
+        "column_model": "Modello",
+        "column_status": "Stato",
+        "column_progress": "Avanzamento",
+        "job_move_up": "Sposta Su",
+        "job_move_down": "Sposta Giù",
+        "job_run_next": "Esegui Per Primo",
+        "job_cancel": "Annulla Lavoro",
+        "clear_finished": "Rimuovi Completati",
+        "job_status_queued": "In coda",
+        "job_status_running": "In corso",
+        "job_status_done": "Completato",
+        "job_status_failed": "Fallito",
+        "job_status_cancelled": "Annullato",
+        "job_waiting": "In attesa in coda per il modello '{model}'...\n",
+        "job_model_downgraded": "{model} (invece di {requested}, memoria insufficiente)",
+        
         # Status messages
         "status_select_model": "Stato: Seleziona un modello e clicca Carica/Ricarica",
+        "status_loading_whisper": "Stato: Caricamento di Whisper...",
+        "status_whisper_load_failed": "Stato: Impossibile caricare Whisper: {error}",
         "status_recommended_model": "Stato: Modello consigliato '{model}'. Clicca 'Carica/Ricarica Modello'.",
         "status_ram_detection_failed": "Stato: Impossibile rilevare la RAM. Seleziona manualmente un modello e caricalo.",
         "status_model_changed": "Stato: Modello cambiato a '{model}'. Clicca 'Carica/Ricarica Modello'.",
         "status_loading_model": "Stato: Caricamento modello '{model}'...",
         "status_model_loaded": "Stato: Modello '{model}' caricato. Pronto.",
+        "status_model_loaded_timed": "Stato: Modello '{model}' caricato in {load:.1f}s, preparato in {warmup:.1f}s. Pronto.",
+        "status_warming_up": "Stato: Preparazione del modello '{model}'...",
         "status_model_loaded_select_file": "Stato: Modello '{model}' caricato. Seleziona file.",
         "status_load_model_or_select_file": "Stato: Carica modello o seleziona file.",
         "status_file_selected": "Stato: File selezionato. Pronto per trascrivere.",
         "status_transcribing": "Stato: Trascrivendo...",
         "status_transcription_complete": "Stato: Trascrizione Completata ({time:.2f}s)",
+        "status_transcription_complete_streamed": "Stato: Trascrizione Completata ({time:.2f}s, primo testo dopo {first:.2f}s)",
+        "status_cache_stats": " | Cache: {hits} trovati, {misses} mancati",
+        "status_vad_stats": " | Saltati {skipped} di silenzio ({percent:.0f}%), {speedup:.1f}x meno audio decodificato",
         "status_transcription_failed": "Stato: Trascrizione Fallita!",
+        "status_queue": "Stato: {running} in corso, {queued} in coda",
+        "status_job_cancelled": "Stato: Lavoro annullato ({file})",
         "status_error_loading_model": "Stato: Errore nel caricamento del modello '{model}'!",
+        "status_calibrating": "Stato: Misurazione dei modelli su questo computer...",
+        "status_calibration_done": "Stato: Calibrazione completata. Modello consigliato '{model}'.",
+        "status_calibration_failed": "Stato: Calibrazione fallita: {error}",
         
         # Dialog messages
         "dialog_ram_detection_error": "Impossibile rilevare automaticamente la RAM di sistema.\n{error}\nSeleziona manualmente un modello.",
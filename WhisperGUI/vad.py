@@ -0,0 +1,199 @@
+# vad.py
+# Cheap, CPU-only energy analysis of 16 kHz mono audio, vectorised with NumPy.
+# Used to find quiet places where long recordings can be cut without splitting words,
+# and to find the speech regions so silence is never sent to the model.
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# Analysis frame length; short enough to land between words
+FRAME_SECONDS = 0.03
+# Floor for the log energy of digital silence
+SILENCE_FLOOR_DB = -100.0
+
+
+def frame_energy_db(audio, frame_seconds=FRAME_SECONDS, sample_rate=SAMPLE_RATE):
+    """RMS energy in dB of consecutive non-overlapping frames (trailing partial frame dropped)."""
+    frame_samples = max(1, int(frame_seconds * sample_rate))
+    n_frames = len(audio) // frame_samples
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    # A reshaped view, so memory-mapped audio is not copied as a whole
+    frames = np.asarray(audio[:n_frames * frame_samples], dtype=np.float32).reshape(n_frames, frame_samples)
+    # einsum avoids allocating a squared copy of the whole signal
+    mean_square = np.einsum("ij,ij->i", frames, frames) / frame_samples
+    return np.maximum(10.0 * np.log10(mean_square + 1e-12), SILENCE_FLOOR_DB).astype(np.float32)
+
+
+def find_split_points(audio, chunk_seconds, search_seconds=10.0, sample_rate=SAMPLE_RATE):
+    """
+    Picks cut points roughly every chunk_seconds, each moved to the quietest
+    frame within +/- search_seconds of the nominal position.
+    Returns sample offsets, not including 0 and len(audio).
+    """
+    duration = len(audio) / sample_rate
+    if chunk_seconds <= 0 or duration <= chunk_seconds:
+        return []
+
+    energy = frame_energy_db(audio, sample_rate=sample_rate)
+    frame_samples = int(FRAME_SECONDS * sample_rate)
+    # Smooth over ~0.3 s so a single quiet frame inside a word doesn't win
+    kernel = np.ones(10, dtype=np.float32) / 10
+    smoothed = np.convolve(energy, kernel, mode="same")
+
+    search_frames = int(search_seconds / FRAME_SECONDS)
+    split_points = []
+    previous_frame = 0
+    n_chunks = int(round(duration / chunk_seconds))
+    for index in range(1, n_chunks):
+        nominal_frame = int(index * chunk_seconds / FRAME_SECONDS)
+        low = max(previous_frame + 1, nominal_frame - search_frames)
+        high = min(len(smoothed), nominal_frame + search_frames)
+        if low >= high:
+            continue
+        quietest_frame = low + int(np.argmin(smoothed[low:high]))
+        split_points.append(quietest_frame * frame_samples + frame_samples // 2)
+        previous_frame = quietest_frame
+    return split_points
+
+
+# --- Speech detection ---
+
+# A frame counts as speech when it is this much louder than the noise floor
+SPEECH_MARGIN_DB = 12.0
+# ...but never below this level, so faint hiss in a quiet room is not "speech"
+MIN_SPEECH_THRESHOLD_DB = -55.0
+# Percentile of frame energies taken as the recording's noise floor
+NOISE_FLOOR_PERCENTILE = 10
+# Percentile taken as the recording's peak level; speech is never required to be
+# closer to it than PEAK_RANGE_DB. Without this cap, audio with hardly any pauses
+# (continuous speech, music) has its "noise floor" at speech level and no frame passes.
+PEAK_PERCENTILE = 99
+PEAK_RANGE_DB = 25.0
+# Below this share of the audio the detection is not trusted and the whole file is decoded
+MIN_SPEECH_FRACTION = 0.02
+# Pauses shorter than this stay inside the surrounding speech region
+MIN_SILENCE_SECONDS = 0.6
+# Speech bursts shorter than this (clicks, bumps) are dropped
+MIN_SPEECH_SECONDS = 0.25
+# Kept around each region so word onsets and endings are not clipped
+SPEECH_PADDING_SECONDS = 0.2
+
+
+def find_speech_regions(audio, sample_rate=SAMPLE_RATE, margin_db=SPEECH_MARGIN_DB,
+                        min_silence_seconds=MIN_SILENCE_SECONDS, min_speech_seconds=MIN_SPEECH_SECONDS,
+                        padding_seconds=SPEECH_PADDING_SECONDS):
+    """
+    Finds the parts of the audio that contain speech, using an energy threshold
+    relative to the recording's own noise floor and peak level. Returns an (n, 2) int64 array
+    of [start, end) sample offsets, sorted and non-overlapping.
+    """
+    energy = frame_energy_db(audio, sample_rate=sample_rate)
+    if len(energy) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    frame_samples = max(1, int(FRAME_SECONDS * sample_rate))
+
+    noise_floor, peak = np.percentile(energy, [NOISE_FLOOR_PERCENTILE, PEAK_PERCENTILE])
+    threshold = max(min(noise_floor + margin_db, peak - PEAK_RANGE_DB), MIN_SPEECH_THRESHOLD_DB)
+    # Smooth over ~0.1 s so the gaps between syllables don't flicker
+    kernel = np.ones(3, dtype=np.float32) / 3
+    is_speech = np.convolve(energy, kernel, mode="same") > threshold
+
+    # Run boundaries: +1 where speech starts, -1 where it stops
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # Merge regions separated by short pauses
+    min_gap_frames = int(min_silence_seconds / FRAME_SECONDS)
+    keep_break = (starts[1:] - ends[:-1]) >= min_gap_frames
+    starts = starts[np.concatenate(([True], keep_break))]
+    ends = ends[np.concatenate((keep_break, [True]))]
+
+    # Drop bursts that are too short to be words
+    long_enough = (ends - starts) >= int(min_speech_seconds / FRAME_SECONDS)
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    padding = int(padding_seconds * sample_rate)
+    regions = np.stack((starts * frame_samples - padding, ends * frame_samples + padding), axis=1)
+    regions = np.clip(regions, 0, len(audio)).astype(np.int64)
+    # Padding can make neighbours overlap; merge those
+    if len(regions) > 1:
+        overlaps = regions[1:, 0] <= regions[:-1, 1]
+        if overlaps.any():
+            new_region = np.concatenate(([True], ~overlaps))
+            group = np.cumsum(new_region) - 1
+            merged_starts = regions[new_region, 0]
+            merged_ends = np.zeros(len(merged_starts), dtype=np.int64)
+            np.maximum.at(merged_ends, group, regions[:, 1])
+            regions = np.stack((merged_starts, merged_ends), axis=1)
+    return regions
+
+
+def is_plausible_speech(regions, n_samples, min_fraction=MIN_SPEECH_FRACTION):
+    """False if the regions cover so little of the audio that the detection itself is suspect."""
+    if n_samples == 0:
+        return True
+    return int((regions[:, 1] - regions[:, 0]).sum()) >= min_fraction * n_samples
+
+
+class CompactAudio:
+    """
+    The speech regions of an audio array, presented as one contiguous array.
+    Slices are gathered on demand, so memory-mapped audio is never copied as a whole.
+    """
+
+    def __init__(self, audio, regions):
+        self.audio = audio
+        self.regions = regions
+        lengths = regions[:, 1] - regions[:, 0]
+        # Offset of each region inside the compacted audio
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError("CompactAudio only supports slicing")
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            raise ValueError("CompactAudio only supports contiguous slices")
+        parts = []
+        first = max(0, int(np.searchsorted(self.offsets, start, side="right")) - 1)
+        for region in range(first, len(self.regions)):
+            if self.offsets[region] >= stop:
+                break
+            region_start, _ = self.regions[region]
+            low = max(start, self.offsets[region]) - self.offsets[region]
+            high = min(stop, self.offsets[region + 1]) - self.offsets[region]
+            parts.append(self.audio[region_start + low:region_start + high])
+        if not parts:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(parts).astype(np.float32, copy=False)
+
+    def __array__(self, dtype=None):
+        return np.asarray(self[:], dtype=dtype)
+
+    def to_original_seconds(self, seconds, sample_rate=SAMPLE_RATE, is_end=False):
+        """
+        Maps a time on the compacted timeline back to the original recording.
+        A time exactly on a region boundary maps to the end of the earlier region
+        if is_end, otherwise to the start of the later one.
+        """
+        sample = int(round(seconds * sample_rate))
+        side = "left" if is_end else "right"
+        region = min(len(self.regions) - 1, max(0, int(np.searchsorted(self.offsets, sample, side=side)) - 1))
+        return float(self.regions[region, 0] + sample - self.offsets[region]) / sample_rate
+
+    def remap_segment(self, segment, sample_rate=SAMPLE_RATE):
+        """Returns a copy of a segment (and its words) with original-timeline timestamps."""
+        segment = dict(segment, start=self.to_original_seconds(segment["start"], sample_rate),
+                       end=self.to_original_seconds(segment["end"], sample_rate, is_end=True))
+        if "words" in segment:
+            segment["words"] = [dict(word, start=self.to_original_seconds(word["start"], sample_rate),
+                                     end=self.to_original_seconds(word["end"], sample_rate, is_end=True))
+                                for word in segment["words"]]
+        return segment
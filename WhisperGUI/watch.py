@@ -0,0 +1,325 @@
+# watch.py
+# Watch-folder mode: transcribes audio files as they appear in a directory tree.
+#
+# The model is loaded and warmed up once, then new or changed files are fed to
+# it through the same JobScheduler the GUI and the server use. A file is only
+# picked up once its size and modification time have stopped changing for a
+# few seconds, so recordings that are still being copied in are not read half
+# written. What has been done is kept in a small SQLite database keyed by path,
+# size, mtime and content hash: restarting the watcher, touching a file or
+# copying it over with identical content does not transcribe it again.
+#
+# Polling is cheap on large trees: a directory is only listed again when its
+# own mtime changed (which happens when entries are added, removed or renamed),
+# and only the files waiting to settle are stat'ed on every poll. A full
+# rescan, which also catches files rewritten in place, runs every few minutes.
+#
+# Usage:
+#   python watch.py /srv/recorders --model small --output-format txt srt
+#   python watch.py /srv/recorders --output-dir /srv/transcripts --preset fastest --language en
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from app_paths import get_cache_dir
+from engine import TranscriptionEngine
+from model_registry import get_sorted_models
+from job_queue import JobScheduler, DONE, FAILED, CANCELLED
+from transcript_cache import hash_file
+from batch import MEDIA_EXTENSIONS
+from calibration import recommend_for_this_machine, DEFAULT_TARGET_RTF
+from quantization import PRECISIONS, DEFAULT_PRECISION, check_precision
+from decode_presets import add_decode_arguments, decode_options_from_args
+from writers import FORMATS, DEFAULT_FORMATS, get_output_base
+
+# How often the tree is polled
+DEFAULT_POLL_SECONDS = 2.0
+# A file must keep the same size and mtime this long before it is transcribed
+DEFAULT_SETTLE_SECONDS = 5.0
+# How often every directory is listed again, changed or not
+FULL_SCAN_SECONDS = 300
+# Jobs handed to the scheduler at once; the rest wait, so a burst of arrivals
+# doesn't turn into thousands of queued jobs
+MAX_QUEUED_JOBS = 4
+
+# Database row states
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+
+class WatchState:
+    """SQLite record of the files already handled, so a restart doesn't redo them."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir("watch"), "state.sqlite")
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT,"
+                " state TEXT, error TEXT, updated_at REAL)"
+            )
+
+    def get(self, path):
+        """(size, mtime_ns, hash, state) of a file handled before, or None."""
+        with self._lock:
+            return self._db.execute("SELECT size, mtime_ns, hash, state FROM files WHERE path = ?",
+                                    (path,)).fetchone()
+
+    def is_unchanged(self, path, size, mtime_ns):
+        """True if the file was handled (successfully or not) in exactly this version."""
+        row = self.get(path)
+        return row is not None and row[0] == size and row[1] == mtime_ns
+
+    def record(self, path, size, mtime_ns, file_hash, state, error=None):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (path, size, mtime_ns, file_hash, state, error, time.time()))
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM files GROUP BY state").fetchall())
+
+    def close(self):
+        self._db.close()
+
+
+class FolderScanner:
+    """
+    Finds media files that are new or changed since the last scan. Directories
+    whose mtime hasn't changed are not listed again; their subdirectories are
+    still visited from the remembered list.
+    """
+
+    def __init__(self, root, recursive=True):
+        self.root = os.path.abspath(root)
+        self.recursive = recursive
+        self._dirs = {}  # dir -> (mtime_ns, [subdirs], {file: (size, mtime_ns)})
+
+    def scan(self, full=False):
+        """Returns {path: (size, mtime_ns)} of the files not seen in that version before."""
+        changed = {}
+        seen_dirs = set()
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            seen_dirs.add(directory)
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue # Removed since it was listed
+            cached = self._dirs.get(directory)
+            if cached is not None and cached[0] == mtime_ns and not full:
+                stack.extend(cached[1])
+                continue
+
+            subdirs, files = [], {}
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive:
+                                    subdirs.append(entry.path)
+                            elif entry.name.lower().endswith(MEDIA_EXTENSIONS) and entry.is_file():
+                                stat = entry.stat()
+                                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue # Vanished between listing and stat
+            except OSError as e:
+                print(f"Cannot list {directory}: {e}")
+                continue
+            previous_files = cached[2] if cached is not None else {}
+            for path, version in files.items():
+                if previous_files.get(path) != version:
+                    changed[path] = version
+            self._dirs[directory] = (mtime_ns, subdirs, files)
+            stack.extend(subdirs)
+
+        for directory in set(self._dirs) - seen_dirs:
+            del self._dirs[directory] # Removed directories
+        return changed
+
+
+class FolderWatcher:
+    """Polls a folder and transcribes every settled, not yet handled media file with a warm model."""
+
+    def __init__(self, root, model_name, device=None, precision=DEFAULT_PRECISION, options=None, output_dir=None,
+                 output_formats=DEFAULT_FORMATS, poll_seconds=DEFAULT_POLL_SECONDS,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, recursive=True, state=None):
+        self.scanner = FolderScanner(root, recursive)
+        self.model_name = model_name
+        self.precision = precision
+        self.options = dict(options or {})
+        self.output_dir = output_dir
+        self.output_formats = tuple(output_formats)
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.state = state or WatchState()
+        self.scheduler = JobScheduler(max_concurrent_jobs=1, device=device)
+        # Holding the model keeps it resident in the model cache between files
+        self.engine = TranscriptionEngine(model_name, device=device, precision=precision)
+        self.pending = {}   # path -> [size, mtime_ns, time the version was first seen]
+        self.in_flight = {} # job id -> (path, size, mtime_ns, hash)
+        self._last_full_scan = 0.0
+        self._stop = threading.Event()
+
+    def warm_up(self):
+        with self.scheduler.using_model(self.model_name):
+            seconds = self.engine.warm_up()
+        print(f"Model '{self.model_name}' ({self.precision}) warmed up in {seconds:.2f}s")
+
+    def poll(self):
+        """One round: find new files, check the waiting ones, submit the settled ones, record finished jobs."""
+        now = time.time()
+        full = now - self._last_full_scan >= FULL_SCAN_SECONDS
+        if full:
+            self._last_full_scan = now
+        for path, (size, mtime_ns) in self.scanner.scan(full=full).items():
+            # A file rewritten while its job runs is kept pending too: the scanner
+            # won't report this version again, so it must not be dropped here
+            if self.state.is_unchanged(path, size, mtime_ns):
+                continue
+            if path not in self.pending or self.pending[path][:2] != [size, mtime_ns]:
+                self.pending[path] = [size, mtime_ns, now]
+
+        self._check_pending(now)
+        self._collect_finished()
+
+    def _check_pending(self, now):
+        """Submits files whose size and mtime have not changed for settle_seconds and that are not in a job already."""
+        busy_paths = {entry[0] for entry in self.in_flight.values()}
+        for path in sorted(self.pending, key=lambda p: self.pending[p][2]): # Oldest arrivals first
+            if len(self.in_flight) >= MAX_QUEUED_JOBS:
+                return
+            size, mtime_ns, since = self.pending[path]
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path] # Deleted or moved away before it settled
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = [stat.st_size, stat.st_mtime_ns, now] # Still being written
+                continue
+            if now - since < self.settle_seconds or path in busy_paths:
+                continue # A new version of a busy file is submitted after the current job
+            del self.pending[path]
+            self._submit(path, size, mtime_ns)
+
+    def _submit(self, path, size, mtime_ns):
+        try:
+            file_hash = hash_file(path)
+        except OSError as e:
+            print(f"Cannot read {path}: {e}")
+            return
+        row = self.state.get(path)
+        if row is not None and row[2] == file_hash and row[3] == STATE_DONE:
+            # Touched or copied over with the same content: nothing new to transcribe
+            self.state.record(path, size, mtime_ns, file_hash, STATE_DONE)
+            return
+        output_base = get_output_base(path, self.output_dir)
+        job = self.scheduler.submit(path, self.model_name, options=self.options, output_base=output_base,
+                                    precision=self.precision, output_formats=self.output_formats)
+        self.in_flight[job.id] = (path, size, mtime_ns, file_hash)
+        print(f"Queued: {path}")
+
+    def _collect_finished(self):
+        for job_id, (path, size, mtime_ns, file_hash) in list(self.in_flight.items()):
+            job = self.scheduler.get(job_id)
+            if not job.is_finished:
+                continue
+            del self.in_flight[job_id]
+            self.scheduler.remove(job_id)
+            if job.status == DONE:
+                result = job.result
+                self.state.record(path, size, mtime_ns, file_hash, STATE_DONE)
+                print(f"Done: {path} ({result['audio_duration']:.1f}s audio in {result['elapsed_time']:.1f}s"
+                      f"{', cached' if result['cached'] else ''})")
+            elif job.status == FAILED:
+                # Recorded so it isn't retried every poll; a new version of the file is tried again
+                self.state.record(path, size, mtime_ns, file_hash, STATE_FAILED, job.error)
+                print(f"Failed: {path} ({job.error})")
+            elif job.status == CANCELLED:
+                pass # Shutting down; picked up again (and resumed from its checkpoint) next time
+
+    def run(self):
+        """Polls until stop() is called or the process is interrupted."""
+        print(f"Watching {self.scanner.root} (poll every {self.poll_seconds:g}s, "
+              f"files settle after {self.settle_seconds:g}s)")
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                self._stop.wait(self.poll_seconds)
+        finally:
+            self.scheduler.shutdown()
+            self.state.close()
+
+    def stop(self):
+        self._stop.set()
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Transcribe audio files as they arrive in a folder.")
+    parser.add_argument("folder", help="Directory to watch (subdirectories included)")
+    parser.add_argument("--model", default="auto", choices=["auto"] + get_sorted_models(),
+                        help="Whisper model; 'auto' picks one for this machine (default: auto)")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help="With --model auto: required real-time factor, processing time / audio time")
+    parser.add_argument("--device", default=None, help="Torch device, e.g. 'cpu' or 'cuda' (default: auto)")
+    parser.add_argument("--precision", default=DEFAULT_PRECISION, choices=PRECISIONS,
+                        help="Inference precision; int8 is quantised and runs on the CPU (default: fp32)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for the transcripts (default: next to each input file)")
+    parser.add_argument("--output-format", nargs="+", default=list(DEFAULT_FORMATS), choices=FORMATS,
+                        help="Transcript formats to write, e.g. 'txt srt' (default: txt)")
+    parser.add_argument("--vad", action="store_true",
+                        help="Skip silence: only decode the speech regions found by an energy pre-pass")
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f"How often to look for new files (default: {DEFAULT_POLL_SECONDS:g})")
+    parser.add_argument("--settle-seconds", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="How long a file must stay unchanged before it is transcribed "
+                             f"(default: {DEFAULT_SETTLE_SECONDS:g})")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not watch subdirectories")
+    parser.add_argument("--state", default=None,
+                        help="SQLite file recording handled files (default: ~/.cache/whisper_gui/watch/state.sqlite)")
+    add_decode_arguments(parser)
+    return parser
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    try:
+        check_precision(args.precision, args.device)
+        options = decode_options_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if not os.path.isdir(args.folder):
+        parser.error(f"Not a directory: {args.folder}")
+    if args.vad:
+        options["vad"] = True
+
+    model_name = args.model
+    if model_name == "auto":
+        model_name, reason = recommend_for_this_machine(args.target_rtf)
+        print(f"Auto-selected model '{model_name}' ({reason})")
+
+    watcher = FolderWatcher(args.folder, model_name, device=args.device, precision=args.precision, options=options,
+                            output_dir=args.output_dir, output_formats=args.output_format,
+                            poll_seconds=args.poll_seconds, settle_seconds=args.settle_seconds,
+                            recursive=not args.no_recursive, state=WatchState(args.state))
+    watcher.warm_up()
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
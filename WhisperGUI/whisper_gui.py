@@ -1,484 +1,1068 @@
-import tkinter as tk
-from tkinter import ttk # Using themed widgets for a slightly nicer look
-from tkinter import filedialog, scrolledtext, messagebox
-import whisper
-import threading
-import os
-import time
-import psutil # Import psutil to check system resources
-
-# Import translations
-from translations import get_text, AVAILABLE_LANGUAGES
-
-# --- Model RAM Requirements (Approximate Guide) ---
-# These are rough estimates, actual usage can vary.
-# We leave some headroom for the OS and other apps.
-MODEL_RAM_REQUIREMENTS = {
-    # model_name: min_system_ram_gb_required
-    "tiny": 2,
-    "base": 2.5,
-    "small": 4,
-    "medium": 8,
-    "large": 12, # large-v2/v3 might need slightly more
-    # Add .en models if desired, they often use slightly less RAM
-    "tiny.en": 1.8,
-    "base.en": 2.2,
-    "small.en": 3.5,
-    "medium.en": 7,
-}
-# Get all available models from Whisper itself
-ALL_AVAILABLE_MODELS = whisper.available_models()
-# Prioritize standard models in the dropdown list if they exist
-PRIORITY_MODELS = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"]
-SORTED_MODELS = sorted(
-    ALL_AVAILABLE_MODELS,
-    key=lambda x: (PRIORITY_MODELS.index(x) if x in PRIORITY_MODELS else float('inf'), x)
-)
-
-
-class WhisperGUI:
-    def __init__(self, root):
-        self.root = root
-        self.language = tk.StringVar(root, value="en") # Default language is English
-        self.root.title(get_text(self.language.get(), "app_title"))
-        self.root.geometry("650x550") # Adjusted size slightly
-
-        self.model = None
-        self.selected_file_path = None
-        self.is_transcribing = False
-        self.is_loading_model = False
-
-        # --- System Info & Model Recommendation ---
-        self.system_ram_gb = self.get_system_ram_gb()
-        self.recommended_model = self.recommend_model(self.system_ram_gb)
-        self.selected_model_var = tk.StringVar(root)
-
-        # --- GUI Elements ---
-        # Language Selection Frame
-        self.lang_frame = ttk.Frame(root, padding="5")
-        self.lang_frame.pack(fill=tk.X)
-        
-        ttk.Label(self.lang_frame, text=get_text(self.language.get(), "select_language")).pack(side=tk.LEFT, padx=(0, 5))
-        
-        # Create language dropdown
-        self.lang_menu = ttk.OptionMenu(
-            self.lang_frame,
-            self.language,
-            self.language.get(),
-            *AVAILABLE_LANGUAGES.keys(),
-            command=self.on_language_change
-        )
-        self.lang_menu.pack(side=tk.LEFT, padx=5)
-        
-        # Display language names instead of codes
-        self.lang_menu.config(width=10)
-        
-        # Model Selection Frame
-        self.model_frame = ttk.Frame(root, padding="10")
-        self.model_frame.pack(fill=tk.X)
-
-        ttk.Label(self.model_frame, text=get_text(self.language.get(), "select_model")).pack(side=tk.LEFT, padx=(0, 5))
-
-        self.model_option_menu = ttk.OptionMenu(
-            self.model_frame,
-            self.selected_model_var,
-            self.recommended_model, # Default selection
-            *SORTED_MODELS,         # Populate with available models
-            command=self.on_model_selection_change # Trigger reload on change
-        )
-        self.model_option_menu.pack(side=tk.LEFT, padx=5)
-        self.model_option_menu.config(width=15)
-
-        # Display system RAM and recommendation
-        if self.recommended_model:
-            ram_info_text = get_text(self.language.get(), "ram_info_with_recommendation", ram_gb=self.system_ram_gb, model=self.recommended_model)
-        else:
-            ram_info_text = get_text(self.language.get(), "ram_info_no_recommendation", ram_gb=self.system_ram_gb)
-
-        self.ram_label = ttk.Label(self.model_frame, text=ram_info_text, foreground="gray")
-        self.ram_label.pack(side=tk.LEFT, padx=10)
-
-
-        # File Selection Frame
-        self.file_frame = ttk.Frame(root, padding="5 10 5 10") # top right bottom left
-        self.file_frame.pack(fill=tk.X)
-
-        self.select_button = ttk.Button(self.file_frame, text=get_text(self.language.get(), "select_audio_file"), command=self.select_file, width=18)
-        self.select_button.pack(side=tk.LEFT, padx=(0, 10))
-
-        self.file_label = ttk.Label(self.file_frame, text=get_text(self.language.get(), "no_file_selected"), foreground="grey", anchor="w", width=40, wraplength=350) # Limit width
-        self.file_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-
-        # Action Buttons Frame
-        self.action_frame = ttk.Frame(root, padding="5 10")
-        self.action_frame.pack(fill=tk.X)
-
-        self.load_button = ttk.Button(self.action_frame, text=get_text(self.language.get(), "load_reload_model"), command=self.load_model, width=18)
-        self.load_button.pack(side=tk.LEFT, padx=(0,10))
-
-        self.transcribe_button = ttk.Button(self.action_frame, text=get_text(self.language.get(), "transcribe"), command=self.start_transcription_thread, state=tk.DISABLED, width=18)
-        self.transcribe_button.pack(side=tk.LEFT)
-
-        # Status Label
-        self.status_label = ttk.Label(root, text=get_text(self.language.get(), "status_select_model"), foreground="blue", padding="0 5 0 10", anchor='w') # Pad left
-        self.status_label.pack(fill=tk.X)
-
-        # Output Text Area
-        self.output_text = scrolledtext.ScrolledText(root, wrap=tk.WORD, height=15, width=75)
-        self.output_text.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
-        self.output_text.configure(state='disabled') # Make it read-only initially
-
-        # --- Initial State ---
-        self.update_widget_states() # Set initial button states
-        if self.recommended_model:
-            self.status_label.config(text=get_text(self.language.get(), "status_recommended_model", model=self.recommended_model))
-        else:
-            self.status_label.config(text=get_text(self.language.get(), "status_ram_detection_failed"), foreground="orange")
-
-
-    def on_language_change(self, *args):
-        """Called when the user changes the language."""
-        # Update all UI text elements with the new language
-        self.update_ui_texts()
-    
-    def update_ui_texts(self):
-        """Updates all UI text elements with the current language."""
-        lang = self.language.get()
-        
-        # Update window title
-        if self.model:
-            self.root.title(get_text(lang, "app_title_with_model", model_name=self.selected_model_var.get()))
-        else:
-            self.root.title(get_text(lang, "app_title"))
-        
-        # Update labels and buttons
-        self.lang_frame.winfo_children()[0].config(text=get_text(lang, "select_language"))
-        self.model_frame.winfo_children()[0].config(text=get_text(lang, "select_model"))
-        
-        # Update RAM info text
-        if self.recommended_model:
-            ram_info_text = get_text(lang, "ram_info_with_recommendation", ram_gb=self.system_ram_gb, model=self.recommended_model)
-        else:
-            ram_info_text = get_text(lang, "ram_info_no_recommendation", ram_gb=self.system_ram_gb)
-        self.ram_label.config(text=ram_info_text)
-        
-        # Update file selection elements
-        self.select_button.config(text=get_text(lang, "select_audio_file"))
-        if not self.selected_file_path:
-            self.file_label.config(text=get_text(lang, "no_file_selected"))
-        
-        # Update action buttons
-        if self.is_loading_model:
-            self.load_button.config(text=get_text(lang, "loading"))
-        else:
-            self.load_button.config(text=get_text(lang, "load_reload_model"))
-            
-        if self.is_transcribing:
-            self.transcribe_button.config(text=get_text(lang, "transcribing"))
-        else:
-            self.transcribe_button.config(text=get_text(lang, "transcribe"))
-        
-        # Update status label - preserve the current status message by reconstructing it
-        current_text = self.status_label.cget("text")
-        if "Recommended model" in current_text and self.recommended_model:
-            self.status_label.config(text=get_text(lang, "status_recommended_model", model=self.recommended_model))
-        elif "Could not detect RAM" in current_text:
-            self.status_label.config(text=get_text(lang, "status_ram_detection_failed"))
-        elif "Model changed to" in current_text and self.selected_model_var.get():
-            self.status_label.config(text=get_text(lang, "status_model_changed", model=self.selected_model_var.get()))
-        elif "Loading model" in current_text and self.selected_model_var.get():
-            self.status_label.config(text=get_text(lang, "status_loading_model", model=self.selected_model_var.get()))
-        elif "Model" in current_text and "loaded" in current_text and self.selected_model_var.get():
-            self.status_label.config(text=get_text(lang, "status_model_loaded", model=self.selected_model_var.get()))
-        elif "File selected" in current_text:
-            self.status_label.config(text=get_text(lang, "status_file_selected"))
-        elif "Transcribing" in current_text:
-            self.status_label.config(text=get_text(lang, "status_transcribing"))
-        elif "Transcription Complete" in current_text:
-            # Extract time from the status message if possible
-            import re
-            time_match = re.search(r"\((\d+\.\d+)s\)", current_text)
-            time_value = float(time_match.group(1)) if time_match else 0.0
-            self.status_label.config(text=get_text(lang, "status_transcription_complete", time=time_value))
-        elif "Transcription Failed" in current_text:
-            self.status_label.config(text=get_text(lang, "status_transcription_failed"))
-        elif "Error loading model" in current_text and self.selected_model_var.get():
-            self.status_label.config(text=get_text(lang, "status_error_loading_model", model=self.selected_model_var.get()))
-        else:
-            # Default status message
-            self.status_label.config(text=get_text(lang, "status_select_model"))
-    
-    def get_system_ram_gb(self):
-        """Gets total system physical RAM in Gigabytes."""
-        try:
-            ram_bytes = psutil.virtual_memory().total
-            ram_gb = ram_bytes / (1024**3)
-            return ram_gb
-        except Exception as e:
-            print(f"Error getting system RAM: {e}")
-            messagebox.showwarning(get_text(self.language.get(), "dialog_ram_detection_error").split("\n")[0], 
-                                  get_text(self.language.get(), "dialog_ram_detection_error", error=str(e)))
-            return 0 # Indicate failure
-
-    def recommend_model(self, ram_gb):
-        """Recommends a Whisper model based on available RAM."""
-        if ram_gb <= 0:
-            return "tiny" # Default fallback if RAM detection failed
-
-        # Try to find the largest model that fits within RAM constraints
-        # Iterate from largest requirement downwards
-        sorted_requirements = sorted(MODEL_RAM_REQUIREMENTS.items(), key=lambda item: item[1], reverse=True)
-
-        # Add some buffer (e.g., 1-2 GB) for OS and other apps
-        available_ram_for_model = ram_gb - 1.5 # Adjust buffer as needed
-
-        recommended = "tiny" # Default to smallest
-        for model, req_ram in sorted_requirements:
-            if available_ram_for_model >= req_ram and model in ALL_AVAILABLE_MODELS:
-                 recommended = model
-                 break # Found the best fit
-
-        # If even tiny doesn't fit (low RAM system), still recommend tiny
-        if available_ram_for_model < MODEL_RAM_REQUIREMENTS.get("tiny", 2) and "tiny" in ALL_AVAILABLE_MODELS:
-             recommended = "tiny"
-        elif recommended not in ALL_AVAILABLE_MODELS and "tiny" in ALL_AVAILABLE_MODELS:
-             # Fallback if calculated recommendation isn't actually available
-             recommended = "tiny"
-        elif not ALL_AVAILABLE_MODELS:
-             messagebox.showerror(get_text(self.language.get(), "dialog_model_error"), 
-                                get_text(self.language.get(), "dialog_no_whisper_models"))
-             return None
-
-        print(f"System RAM: {ram_gb:.1f} GB, Available for model (estimated): {available_ram_for_model:.1f} GB -> Recommended: {recommended}")
-        return recommended
-
-
-    def update_widget_states(self):
-        """Central function to enable/disable widgets based on current state."""
-        lang = self.language.get()
-        
-        # Model loading state
-        if self.is_loading_model:
-            self.load_button.config(state=tk.DISABLED, text=get_text(lang, "loading"))
-            self.model_option_menu.config(state=tk.DISABLED)
-            self.select_button.config(state=tk.DISABLED)
-            self.transcribe_button.config(state=tk.DISABLED)
-            return # Loading overrides other states
-
-        # Reset load button text if not loading
-        self.load_button.config(text=get_text(lang, "load_reload_model"), state=tk.NORMAL)
-        self.model_option_menu.config(state=tk.NORMAL)
-
-        # Transcription state
-        if self.is_transcribing:
-            self.select_button.config(state=tk.DISABLED)
-            self.transcribe_button.config(state=tk.DISABLED, text=get_text(lang, "transcribing"))
-            self.load_button.config(state=tk.DISABLED) # Don't reload model during transcription
-            self.model_option_menu.config(state=tk.DISABLED)
-            return # Transcribing overrides other states
-
-        # Reset transcribe button text if not transcribing
-        self.transcribe_button.config(text=get_text(lang, "transcribe"))
-
-        # Default states (not loading, not transcribing)
-        self.select_button.config(state=tk.NORMAL)
-
-        # Transcribe button requires model loaded AND file selected
-        if self.model and self.selected_file_path:
-            self.transcribe_button.config(state=tk.NORMAL)
-        else:
-            self.transcribe_button.config(state=tk.DISABLED)
-
-
-    def on_model_selection_change(self, selected_model):
-        """Called when the user selects a different model in the OptionMenu."""
-        print(f"Model selection changed to: {selected_model}")
-        # Simple approach: Just update status, require user to click "Load/Reload"
-        self.status_label.config(text=get_text(self.language.get(), "status_model_changed", model=selected_model), fg="blue")
-        self.model = None # Invalidate the currently loaded model
-        self.update_widget_states() # Disable transcribe button until reloaded
-
-        # Optional: Automatically trigger reload (might be slow/unexpected for user)
-        # self.load_model()
-
-
-    def load_model(self):
-        """Loads the Whisper model selected in the OptionMenu."""
-        if self.is_loading_model or self.is_transcribing:
-            return # Avoid concurrent loads/actions
-
-        selected_model_name = self.selected_model_var.get()
-        if not selected_model_name:
-             messagebox.showerror(get_text(self.language.get(), "dialog_model_error"), 
-                                get_text(self.language.get(), "dialog_model_error"))
-             return
-
-        self.is_loading_model = True
-        self.model = None # Clear previous model
-        self.update_widget_states()
-        self.status_label.config(text=get_text(self.language.get(), "status_loading_model", model=selected_model_name), fg="orange")
-        self.root.update_idletasks()
-
-        threading.Thread(target=self._load_model_task, args=(selected_model_name,), daemon=True).start()
-
-    def _load_model_task(self, model_name):
-        """The actual model loading task."""
-        try:
-            print(f"Attempting to load model: {model_name}")
-            loaded_model = whisper.load_model(model_name)
-            # Schedule GUI update back on the main thread
-            self.root.after(0, self._on_model_loaded, loaded_model, model_name)
-        except Exception as e:
-            # Schedule error message display back on the main thread
-            print(f"Error loading model {model_name}: {e}")
-            self.root.after(0, self._on_model_load_error, str(e), model_name)
-
-    def _on_model_loaded(self, loaded_model, model_name):
-        """Callback run in the main thread after model is loaded."""
-        self.model = loaded_model
-        self.is_loading_model = False
-        self.status_label.config(text=get_text(self.language.get(), "status_model_loaded", model=model_name), fg="green")
-        self.root.title(get_text(self.language.get(), "app_title_with_model", model_name=model_name)) # Update window title
-        self.update_widget_states()
-        print(f"Whisper model '{model_name}' loaded successfully.")
-
-    def _on_model_load_error(self, error_message, model_name):
-        """Callback run in the main thread if model loading fails."""
-        self.model = None
-        self.is_loading_model = False
-        self.status_label.config(text=get_text(self.language.get(), "status_error_loading_model", model=model_name), fg="red")
-        self.update_widget_states() # Re-enable widgets
-        messagebox.showerror(get_text(self.language.get(), "dialog_model_load_error").split("\n")[0], 
-                             get_text(self.language.get(), "dialog_model_load_error", model=model_name, error=error_message))
-
-
-    def select_file(self):
-        """Opens a file dialog to select an audio file."""
-        if self.is_transcribing or self.is_loading_model:
-            messagebox.showwarning(get_text(self.language.get(), "dialog_busy").split(".")[0], 
-                                  get_text(self.language.get(), "dialog_busy"))
-            return
-
-        filetypes = (
-            (get_text(self.language.get(), "file_type_audio"), '*.mp3 *.wav *.m4a *.flac *.ogg *.aac *.opus *.mpga'), # Added mpga
-            (get_text(self.language.get(), "file_type_video"), '*.mp4 *.mov *.avi *.mkv'), # Whisper can often handle video too
-            (get_text(self.language.get(), "file_type_all"), '*.*')
-        )
-        filepath = filedialog.askopenfilename(
-            title=get_text(self.language.get(), "file_dialog_title"),
-            filetypes=filetypes
-        )
-        if filepath:
-            self.selected_file_path = filepath
-            filename = os.path.basename(filepath)
-            self.file_label.config(text=filename, foreground="black")
-            self.output_text.configure(state='normal')
-            self.output_text.delete(1.0, tk.END)
-            self.output_text.configure(state='disabled')
-            self.status_label.config(text=get_text(self.language.get(), "status_file_selected"), fg="blue")
-        else:
-            if not self.selected_file_path: # Only reset if no file was previously selected
-                 self.file_label.config(text=get_text(self.language.get(), "no_file_selected"), foreground="grey")
-                 if self.model:
-                     self.status_label.config(text=get_text(self.language.get(), "status_model_loaded_select_file", model=self.selected_model_var.get()), fg="blue")
-                 else:
-                     self.status_label.config(text=get_text(self.language.get(), "status_load_model_or_select_file"), fg="blue")
-
-        self.update_widget_states() # Update button states based on file selection
-
-
-    def start_transcription_thread(self):
-        """Starts the transcription process in a separate thread."""
-        if not self.selected_file_path:
-            messagebox.showwarning(get_text(self.language.get(), "dialog_no_file").split(".")[0], 
-                                  get_text(self.language.get(), "dialog_no_file"))
-            return
-        if not self.model:
-             messagebox.showerror(get_text(self.language.get(), "dialog_model_not_loaded").split(".")[0], 
-                                get_text(self.language.get(), "dialog_model_not_loaded"))
-             return
-        if self.is_transcribing or self.is_loading_model:
-             messagebox.showwarning(get_text(self.language.get(), "dialog_operation_in_progress").split(".")[0], 
-                                  get_text(self.language.get(), "dialog_operation_in_progress"))
-             return
-
-        self.is_transcribing = True
-        self.update_widget_states() # Disable buttons etc.
-        self.status_label.config(text=get_text(self.language.get(), "status_transcribing"), fg="orange")
-        self.output_text.configure(state='normal')
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, get_text(self.language.get(), "transcription_in_progress", model=self.selected_model_var.get()))
-        self.output_text.configure(state='disabled')
-        self.root.update_idletasks()
-
-        threading.Thread(target=self._perform_transcription, daemon=True).start()
-
-    def _perform_transcription(self):
-        """The actual transcription work done in the background thread."""
-        try:
-            start_time = time.time()
-            current_model = self.model # Use the model stored in the instance
-            file_to_transcribe = self.selected_file_path
-            print(f"Starting transcription for: {file_to_transcribe}")
-
-            # --- Perform Transcription ---
-            # fp16=False is generally safer for CPU and potentially Apple Silicon MPS
-            # You might expose options like language detection later
-            result = current_model.transcribe(file_to_transcribe, fp16=False)
-            # ---------------------------
-
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            transcription_text = result["text"]
-
-            # Schedule GUI update back on the main thread
-            self.root.after(0, self._update_gui_with_result, transcription_text, elapsed_time)
-
-        except Exception as e:
-            # Schedule error display back on the main thread
-            error_message = f"Transcription Error: {e}"
-            print(error_message) # Also print to console for debugging
-            self.root.after(0, self._update_gui_with_error, error_message)
-        finally:
-            # Ensure state is reset even if errors occur (scheduled for main thread)
-             self.root.after(0, self._reset_transcription_state)
-
-
-    def _update_gui_with_result(self, text, elapsed_time):
-        """Updates the GUI text area with the result (runs in main thread)."""
-        self.output_text.configure(state='normal')
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, text)
-        self.output_text.configure(state='disabled')
-        self.status_label.config(text=get_text(self.language.get(), "status_transcription_complete", time=elapsed_time), fg="green")
-
-    def _update_gui_with_error(self, error_message):
-        """Updates the GUI with an error message (runs in main thread)."""
-        self.output_text.configure(state='normal')
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(tk.END, get_text(self.language.get(), "transcription_error", error=error_message))
-        self.output_text.configure(state='disabled')
-        self.status_label.config(text=get_text(self.language.get(), "status_transcription_failed"), fg="red")
-        messagebox.showerror(get_text(self.language.get(), "dialog_transcription_error").split(":")[0], error_message)
-
-
-    def _reset_transcription_state(self):
-        """Resets buttons and status after transcription (runs in main thread)."""
-        self.is_transcribing = False
-        self.update_widget_states() # Re-enable relevant widgets
-
-
-# --- Main Execution ---
-if __name__ == "__main__":
-    root = tk.Tk()
-    # Optional: Apply a theme for a slightly more modern look on macOS
-    style = ttk.Style(root)
-    try:
-        # 'aqua' is the default macOS theme and usually works well
-        style.theme_use('aqua')
-    except tk.TclError:
-        print(get_text("en", "theme_not_available")) # Use English for console messages
-
-    app = WhisperGUI(root)
+import time
+_import_started = time.perf_counter() # For --measure-startup
+
+import tkinter as tk
+from tkinter import ttk # Using themed widgets for a slightly nicer look
+from tkinter import filedialog, messagebox
+import argparse
+import threading
+import os
+import sys
+import psutil # Import psutil to check system resources
+
+# Import translations
+from translations import get_text, AVAILABLE_LANGUAGES
+# Model loading/transcription lives in the engine so it can also run headless
+# (none of these import whisper/torch; that happens on a background thread after the window is up)
+from engine import TranscriptionEngine, format_timestamp
+from model_registry import get_sorted_models
+from transcript_cache import get_transcript_cache
+from job_queue import JobScheduler, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from settings import load_settings, update_setting
+from quantization import PRECISIONS, DEFAULT_PRECISION
+from decode_presets import PRESETS, DEFAULT_PRESET, resolve_decode_options, get_language_codes
+from transcript_view import TranscriptView
+from profiling import GUI_UPDATE, format_summary
+from writers import FORMATS, DEFAULT_FORMATS, get_output_base
+import calibration
+
+# How often the queue panel and the shown job's streamed segments are refreshed
+QUEUE_POLL_MS = 150
+# Most new segments handed to the transcript view per refresh; the rest wait for the next one
+MAX_SEGMENTS_PER_POLL = 2000
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
+class WhisperGUI:
+    def __init__(self, root):
+        self.root = root
+        self.language = tk.StringVar(root, value="en") # Default language is English
+        self.root.title(get_text(self.language.get(), "app_title"))
+        self.root.geometry("700x720") # Room for the job queue
+
+        self.engine = TranscriptionEngine()
+        self.model = None
+        self.selected_file_paths = []
+        self.is_loading_model = False
+        # Transcriptions run as queued jobs; the GUI only polls their state
+        self.scheduler = JobScheduler()
+        self.job_streams = {} # job id -> whether its segments are shown as they arrive
+        self.shown_job_id = None # Job whose transcript is in the text area
+        self.shown_segment_count = 0
+        self.shown_job_final = False # The shown job's final text/error is already on screen
+        self.started_job_ids = set()
+        self.reported_job_ids = set()
+        self.last_job_counts = (0, 0)
+        self.last_cancelled_file = ""
+        self.last_elapsed_time = 0.0
+        self.last_time_to_first_text = None
+        self.last_vad_stats = None
+        self.last_fallbacks = 0
+        self.last_resumed_seconds = None
+        self.is_calibrating = False
+        # Filled in by a background thread once whisper has been imported
+        self.available_models = []
+        self.models_ready_at = None
+        self.whisper_load_error = None
+        self.settings = load_settings()
+        if self.settings["precision"] in PRECISIONS:
+            self.engine.precision = self.settings["precision"]
+        self.last_load_seconds = None
+        self.last_warmup_seconds = None
+
+        # --- System Info & Model Recommendation ---
+        self.target_rtf_var = tk.DoubleVar(root, value=calibration.DEFAULT_TARGET_RTF)
+        self.system_ram_gb = self.get_system_ram_gb()
+        self.available_ram_gb = self.get_available_ram_gb()
+        self.recommended_model = None # Needs the model list
+        self.selected_model_var = tk.StringVar(root)
+
+        # --- GUI Elements ---
+        # Language Selection Frame
+        self.lang_frame = ttk.Frame(root, padding="5")
+        self.lang_frame.pack(fill=tk.X)
+        
+        ttk.Label(self.lang_frame, text=get_text(self.language.get(), "select_language")).pack(side=tk.LEFT, padx=(0, 5))
+        
+        # Create language dropdown
+        self.lang_menu = ttk.OptionMenu(
+            self.lang_frame,
+            self.language,
+            self.language.get(),
+            *AVAILABLE_LANGUAGES.keys(),
+            command=self.on_language_change
+        )
+        self.lang_menu.pack(side=tk.LEFT, padx=5)
+        
+        # Display language names instead of codes
+        self.lang_menu.config(width=10)
+        
+        # Model Selection Frame
+        self.model_frame = ttk.Frame(root, padding="10")
+        self.model_frame.pack(fill=tk.X)
+
+        ttk.Label(self.model_frame, text=get_text(self.language.get(), "select_model")).pack(side=tk.LEFT, padx=(0, 5))
+
+        # Empty until the model list is ready, see _on_model_list_ready
+        self.model_option_menu = ttk.OptionMenu(
+            self.model_frame,
+            self.selected_model_var,
+            None,
+            command=self.on_model_selection_change # Trigger reload on change
+        )
+        self.model_option_menu.pack(side=tk.LEFT, padx=5)
+        self.model_option_menu.config(width=15)
+
+        # Display system RAM and recommendation
+        self.ram_label = ttk.Label(self.model_frame, text=self._ram_info_text(self.language.get()), foreground="gray")
+        self.ram_label.pack(side=tk.LEFT, padx=10)
+
+        # Calibration Frame: target speed for the recommendation and on-device measurement
+        self.calibration_frame = ttk.Frame(root, padding="10 0 10 5")
+        self.calibration_frame.pack(fill=tk.X)
+
+        self.target_rtf_label = ttk.Label(self.calibration_frame, text=get_text(self.language.get(), "target_rtf"))
+        self.target_rtf_label.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.target_rtf_spinbox = ttk.Spinbox(self.calibration_frame, from_=0.1, to=3.0, increment=0.1, width=5,
+                                              textvariable=self.target_rtf_var, command=self.refresh_recommendation)
+        self.target_rtf_spinbox.bind("<Return>", lambda event: self.refresh_recommendation())
+        self.target_rtf_spinbox.pack(side=tk.LEFT, padx=5)
+
+        self.calibrate_button = ttk.Button(self.calibration_frame, text=get_text(self.language.get(), "calibrate"), command=self.start_calibration, width=18)
+        self.calibrate_button.pack(side=tk.LEFT, padx=10)
+
+        # Precision: int8 runs a quantised copy of the model, faster on the CPU and about half the RAM
+        self.precision_label = ttk.Label(self.calibration_frame, text=get_text(self.language.get(), "precision"))
+        self.precision_label.pack(side=tk.LEFT, padx=(10, 5))
+
+        self.precision_var = tk.StringVar(root, value=self.engine.precision)
+        self.precision_menu = ttk.OptionMenu(self.calibration_frame, self.precision_var, self.engine.precision,
+                                             *PRECISIONS, command=self.on_precision_change)
+        self.precision_menu.pack(side=tk.LEFT)
+
+
+        # File Selection Frame
+        self.file_frame = ttk.Frame(root, padding="5 10 5 10") # top right bottom left
+        self.file_frame.pack(fill=tk.X)
+
+        self.select_button = ttk.Button(self.file_frame, text=get_text(self.language.get(), "select_audio_file"), command=self.select_file, width=18)
+        self.select_button.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.file_label = ttk.Label(self.file_frame, text=get_text(self.language.get(), "no_file_selected"), foreground="grey", anchor="w", width=40, wraplength=350) # Limit width
+        self.file_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+
+        # Action Buttons Frame
+        self.action_frame = ttk.Frame(root, padding="5 10")
+        self.action_frame.pack(fill=tk.X)
+
+        self.load_button = ttk.Button(self.action_frame, text=get_text(self.language.get(), "load_reload_model"), command=self.load_model, width=18)
+        self.load_button.pack(side=tk.LEFT, padx=(0,10))
+
+        self.transcribe_button = ttk.Button(self.action_frame, text=get_text(self.language.get(), "transcribe"), command=self.start_transcription_thread, state=tk.DISABLED, width=18)
+        self.transcribe_button.pack(side=tk.LEFT)
+
+        self.preload_var = tk.BooleanVar(root, value=self.settings["preload_on_startup"])
+        self.preload_check = ttk.Checkbutton(self.action_frame, text=get_text(self.language.get(), "preload_on_startup"), variable=self.preload_var, command=self.on_preload_toggle)
+        self.preload_check.pack(side=tk.LEFT, padx=10)
+
+        # Output Options Frame
+        self.options_frame = ttk.Frame(root, padding="5 0 10 0")
+        self.options_frame.pack(fill=tk.X)
+
+        self.stream_var = tk.BooleanVar(root, value=True)
+        self.stream_check = ttk.Checkbutton(self.options_frame, text=get_text(self.language.get(), "stream_output"), variable=self.stream_var)
+        self.stream_check.pack(side=tk.LEFT, padx=(0, 10))
+
+        self.save_output_var = tk.BooleanVar(root, value=False)
+        self.save_output_check = ttk.Checkbutton(self.options_frame, text=get_text(self.language.get(), "save_transcript_next_to_file"), variable=self.save_output_var)
+        self.save_output_check.pack(side=tk.LEFT)
+
+        # Formats the saved transcript is written in; any combination can be ticked
+        saved_formats = [name for name in self.settings["output_formats"] if name in FORMATS] or list(DEFAULT_FORMATS)
+        self.output_format_vars = {name: tk.BooleanVar(root, value=name in saved_formats) for name in FORMATS}
+        self.output_format_button = ttk.Menubutton(self.options_frame, width=14)
+        self.output_format_menu = tk.Menu(self.output_format_button, tearoff=False)
+        for name in FORMATS:
+            self.output_format_menu.add_checkbutton(label=name.upper(), variable=self.output_format_vars[name],
+                                                    command=self.on_output_formats_change)
+        self.output_format_button.config(menu=self.output_format_menu)
+        self.output_format_button.pack(side=tk.LEFT, padx=(5, 0))
+        self._update_output_format_button()
+
+        self.vad_var = tk.BooleanVar(root, value=False)
+        self.vad_check = ttk.Checkbutton(self.options_frame, text=get_text(self.language.get(), "skip_silence"), variable=self.vad_var)
+        self.vad_check.pack(side=tk.LEFT, padx=10)
+
+        # Decoding Frame: speed/accuracy preset and the options worth overriding per run
+        self.decode_frame = ttk.Frame(root, padding="5 5 10 0")
+        self.decode_frame.pack(fill=tk.X)
+
+        self.decode_preset = self.settings["decode_preset"] if self.settings["decode_preset"] in PRESETS else DEFAULT_PRESET
+        self.preset_label = ttk.Label(self.decode_frame, text=get_text(self.language.get(), "decode_preset"))
+        self.preset_label.pack(side=tk.LEFT, padx=(0, 5))
+        self.preset_var = tk.StringVar(root)
+        self.preset_menu = ttk.OptionMenu(self.decode_frame, self.preset_var, None, command=self.on_preset_change)
+        self.preset_menu.pack(side=tk.LEFT)
+        self._update_preset_menu(self.language.get())
+
+        self.spoken_language_label = ttk.Label(self.decode_frame, text=get_text(self.language.get(), "spoken_language"))
+        self.spoken_language_label.pack(side=tk.LEFT, padx=(10, 5))
+        # Filled with Whisper's languages once it is imported; any code can be typed meanwhile
+        self.spoken_language_var = tk.StringVar(root, value=self.settings["spoken_language"])
+        self.spoken_language_combo = ttk.Combobox(self.decode_frame, textvariable=self.spoken_language_var,
+                                                  values=["auto"], width=6)
+        self.spoken_language_combo.pack(side=tk.LEFT)
+
+        self.beam_size_label = ttk.Label(self.decode_frame, text=get_text(self.language.get(), "beam_size"))
+        self.beam_size_label.pack(side=tk.LEFT, padx=(10, 5))
+        self.beam_size_var = tk.StringVar(root, value="") # Empty: as the preset says
+        self.beam_size_spinbox = ttk.Spinbox(self.decode_frame, from_=1, to=10, width=4, textvariable=self.beam_size_var)
+        self.beam_size_spinbox.pack(side=tk.LEFT)
+
+        self.translate_var = tk.BooleanVar(root, value=self.settings["translate"])
+        self.translate_check = ttk.Checkbutton(self.decode_frame, text=get_text(self.language.get(), "translate_to_english"), variable=self.translate_var)
+        self.translate_check.pack(side=tk.LEFT, padx=10)
+
+        # Job Queue Frame: every submitted file with its status and progress
+        self.queue_frame = ttk.Frame(root, padding="10 5 10 0")
+        self.queue_frame.pack(fill=tk.X)
+
+        self.job_tree = ttk.Treeview(self.queue_frame, columns=("file", "model", "status", "progress"),
+                                     show="headings", height=5, selectmode="browse")
+        self.job_tree.column("file", width=260)
+        self.job_tree.column("model", width=80)
+        self.job_tree.column("status", width=90)
+        self.job_tree.column("progress", width=70, anchor="e")
+        self.job_tree.bind("<<TreeviewSelect>>", self.on_job_selected)
+        self.job_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self.queue_buttons_frame = ttk.Frame(self.queue_frame, padding="5 0 0 0")
+        self.queue_buttons_frame.pack(side=tk.LEFT, fill=tk.Y)
+        self.move_up_button = ttk.Button(self.queue_buttons_frame, command=lambda: self.move_selected_job(-1), width=16)
+        self.move_down_button = ttk.Button(self.queue_buttons_frame, command=lambda: self.move_selected_job(1), width=16)
+        self.run_next_button = ttk.Button(self.queue_buttons_frame, command=self.run_selected_job_next, width=16)
+        self.cancel_job_button = ttk.Button(self.queue_buttons_frame, command=self.cancel_selected_job, width=16)
+        self.clear_finished_button = ttk.Button(self.queue_buttons_frame, command=self.clear_finished_jobs, width=16)
+        for button in (self.move_up_button, self.move_down_button, self.run_next_button,
+                       self.cancel_job_button, self.clear_finished_button):
+            button.pack(fill=tk.X)
+        self._update_queue_texts(self.language.get())
+
+        # Status Label
+        self.status_label = ttk.Label(root, text=get_text(self.language.get(), "status_select_model"), foreground="blue", padding="0 5 0 10", anchor='w') # Pad left
+        self.status_label.pack(fill=tk.X)
+
+        # Search Frame: find text and jump to a time in the shown transcript
+        self.search_frame = ttk.Frame(root, padding="10 0 10 0")
+        self.search_frame.pack(fill=tk.X)
+
+        self.find_var = tk.StringVar(root)
+        self.find_entry = ttk.Entry(self.search_frame, textvariable=self.find_var, width=25)
+        self.find_entry.bind("<Return>", lambda event: self.find_in_transcript())
+        self.find_entry.pack(side=tk.LEFT)
+        self.find_button = ttk.Button(self.search_frame, text=get_text(self.language.get(), "find_next"), command=self.find_in_transcript)
+        self.find_button.pack(side=tk.LEFT, padx=5)
+
+        self.go_to_time_var = tk.StringVar(root)
+        self.go_to_time_entry = ttk.Entry(self.search_frame, textvariable=self.go_to_time_var, width=9)
+        self.go_to_time_entry.bind("<Return>", lambda event: self.go_to_time())
+        self.go_to_time_entry.pack(side=tk.LEFT, padx=(15, 0))
+        self.go_to_time_button = ttk.Button(self.search_frame, text=get_text(self.language.get(), "go_to_time"), command=self.go_to_time)
+        self.go_to_time_button.pack(side=tk.LEFT, padx=5)
+
+        # Profile Frame: time per stage of the shown job, exportable as a Chrome trace
+        self.profile_frame = ttk.Frame(root, padding="10 5 10 0")
+        self.profile_frame.pack(fill=tk.X)
+        self.export_trace_button = ttk.Button(self.profile_frame, text=get_text(self.language.get(), "export_trace"), command=self.export_trace, state=tk.DISABLED)
+        self.export_trace_button.pack(side=tk.RIGHT)
+        self.profile_label = ttk.Label(self.profile_frame, text=get_text(self.language.get(), "profile_none"), anchor='w')
+        self.profile_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        # Output Text Area: renders only a window of segments, however long the transcript
+        self.transcript_view = TranscriptView(root, height=15, width=75)
+        self.transcript_view.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+
+        # --- Initial State ---
+        self.update_widget_states() # Set initial button states
+        self.root.after(QUEUE_POLL_MS, self._poll_jobs)
+        self.status_label.config(text=get_text(self.language.get(), "status_loading_whisper"), foreground="orange")
+        # Importing whisper pulls in torch and takes seconds; do it once the window is drawn
+        self.root.after_idle(lambda: threading.Thread(target=self._load_model_list_task, daemon=True).start())
+
+
+    def _load_model_list_task(self):
+        """Imports whisper and enumerates its models (background thread)."""
+        try:
+            models = get_sorted_models()
+            languages = get_language_codes()
+            self.root.after(0, self._on_model_list_ready, models, languages)
+        except Exception as e:
+            print(f"Error loading Whisper: {e}")
+            self.root.after(0, self._on_model_list_error, str(e))
+
+    def _on_model_list_ready(self, models, languages=()):
+        """Callback run in the main thread once whisper is imported: fills in the model and language menus."""
+        self.available_models = models
+        self.spoken_language_combo.config(values=["auto"] + list(languages))
+        self.models_ready_at = time.time()
+        self.recommended_model = self.recommend_model(self.available_ram_gb)
+        self.model_option_menu.set_menu(self.recommended_model, *models)
+        self.ram_label.config(text=self._ram_info_text(self.language.get()))
+        if self.recommended_model:
+            self.status_label.config(text=get_text(self.language.get(), "status_recommended_model", model=self.recommended_model), foreground="blue")
+        else:
+            self.status_label.config(text=get_text(self.language.get(), "status_ram_detection_failed"), foreground="orange")
+        self.update_widget_states()
+
+        if self.preload_var.get():
+            # Opt-in: load the last used model (or the recommended one) and warm it up right away
+            preload_model = self.settings["last_model"] if self.settings["last_model"] in models else self.recommended_model
+            if preload_model:
+                self.selected_model_var.set(preload_model)
+                self.load_model(warm_up=True)
+
+    def _on_model_list_error(self, error_message):
+        self.models_ready_at = time.time()
+        self.whisper_load_error = error_message
+        self.status_label.config(text=get_text(self.language.get(), "status_whisper_load_failed", error=error_message), foreground="red")
+
+
+    @property
+    def is_transcribing(self):
+        """True while any job is running or waiting in the queue."""
+        running, queued = self.scheduler.counts()
+        return running + queued > 0
+
+    def on_language_change(self, *args):
+        """Called when the user changes the language."""
+        # Update all UI text elements with the new language
+        self.update_ui_texts()
+    
+    def update_ui_texts(self):
+        """Updates all UI text elements with the current language."""
+        lang = self.language.get()
+        
+        # Update window title
+        if self.model:
+            self.root.title(get_text(lang, "app_title_with_model", model_name=self.selected_model_var.get()))
+        else:
+            self.root.title(get_text(lang, "app_title"))
+        
+        # Update labels and buttons
+        self.lang_frame.winfo_children()[0].config(text=get_text(lang, "select_language"))
+        self.model_frame.winfo_children()[0].config(text=get_text(lang, "select_model"))
+        
+        # Update RAM info text
+        self.ram_label.config(text=self._ram_info_text(lang))
+
+        # Update calibration elements
+        self.target_rtf_label.config(text=get_text(lang, "target_rtf"))
+        self.calibrate_button.config(text=get_text(lang, "calibrating" if self.is_calibrating else "calibrate"))
+        self.precision_label.config(text=get_text(lang, "precision"))
+        
+        # Update file selection elements
+        self.select_button.config(text=get_text(lang, "select_audio_file"))
+        if not self.selected_file_paths:
+            self.file_label.config(text=get_text(lang, "no_file_selected"))
+        elif len(self.selected_file_paths) > 1:
+            self.file_label.config(text=get_text(lang, "files_selected", count=len(self.selected_file_paths)))
+        
+        # Update action buttons
+        if self.is_loading_model:
+            self.load_button.config(text=get_text(lang, "loading"))
+        else:
+            self.load_button.config(text=get_text(lang, "load_reload_model"))
+        self.transcribe_button.config(text=get_text(lang, "transcribe"))
+        self.preload_check.config(text=get_text(lang, "preload_on_startup"))
+
+        # Update output options
+        self.stream_check.config(text=get_text(lang, "stream_output"))
+        self.save_output_check.config(text=get_text(lang, "save_transcript_next_to_file"))
+        self.vad_check.config(text=get_text(lang, "skip_silence"))
+
+        # Update decoding options
+        self.preset_label.config(text=get_text(lang, "decode_preset"))
+        self._update_preset_menu(lang)
+        self.spoken_language_label.config(text=get_text(lang, "spoken_language"))
+        self.beam_size_label.config(text=get_text(lang, "beam_size"))
+        self.translate_check.config(text=get_text(lang, "translate_to_english"))
+
+        # Update search
+        self.find_button.config(text=get_text(lang, "find_next"))
+        self.go_to_time_button.config(text=get_text(lang, "go_to_time"))
+
+        # Update profile panel
+        self.export_trace_button.config(text=get_text(lang, "export_trace"))
+        self._update_profile_panel()
+
+        # Update job queue
+        self._update_queue_texts(lang)
+        self._refresh_job_tree(self.scheduler.jobs())
+        
+        # Update status label - preserve the current status message by reconstructing it
+        current_text = self.status_label.cget("text")
+        if "Recommended model" in current_text and self.recommended_model:
+            self.status_label.config(text=get_text(lang, "status_recommended_model", model=self.recommended_model))
+        elif "Could not detect RAM" in current_text:
+            self.status_label.config(text=get_text(lang, "status_ram_detection_failed"))
+        elif "Model changed to" in current_text and self.selected_model_var.get():
+            self.status_label.config(text=get_text(lang, "status_model_changed", model=self.selected_model_var.get()))
+        elif "Loading Whisper" in current_text:
+            self.status_label.config(text=get_text(lang, "status_loading_whisper"))
+        elif "Could not load Whisper" in current_text:
+            self.status_label.config(text=get_text(lang, "status_whisper_load_failed", error=self.whisper_load_error))
+        elif "Loading model" in current_text and self.selected_model_var.get():
+            self.status_label.config(text=get_text(lang, "status_loading_model", model=self.selected_model_var.get()))
+        elif "Warming up model" in current_text and self.selected_model_var.get():
+            self.status_label.config(text=get_text(lang, "status_warming_up", model=self.selected_model_var.get()))
+        elif "Model" in current_text and "warmed up" in current_text and self.selected_model_var.get():
+            self.status_label.config(text=get_text(lang, "status_model_loaded_timed", model=self.selected_model_var.get(),
+                                                   load=self.last_load_seconds, warmup=self.last_warmup_seconds))
+        elif "Model" in current_text and "loaded" in current_text and self.selected_model_var.get():
+            self.status_label.config(text=get_text(lang, "status_model_loaded", model=self.selected_model_var.get()))
+        elif "File selected" in current_text:
+            self.status_label.config(text=get_text(lang, "status_file_selected"))
+        elif "running," in current_text:
+            self.status_label.config(text=get_text(lang, "status_queue", running=self.last_job_counts[0], queued=self.last_job_counts[1]))
+        elif "Job cancelled" in current_text:
+            self.status_label.config(text=get_text(lang, "status_job_cancelled", file=self.last_cancelled_file))
+        elif "Transcription Complete" in current_text:
+            self.status_label.config(text=self._completion_status_text(lang))
+        elif "Transcription Failed" in current_text:
+            self.status_label.config(text=get_text(lang, "status_transcription_failed"))
+        elif "Error loading model" in current_text and self.selected_model_var.get():
+            self.status_label.config(text=get_text(lang, "status_error_loading_model", model=self.selected_model_var.get()))
+        else:
+            # Default status message
+            self.status_label.config(text=get_text(lang, "status_select_model"))
+    
+    def get_system_ram_gb(self):
+        """Gets total system physical RAM in Gigabytes."""
+        try:
+            ram_bytes = psutil.virtual_memory().total
+            ram_gb = ram_bytes / (1024**3)
+            return ram_gb
+        except Exception as e:
+            print(f"Error getting system RAM: {e}")
+            messagebox.showwarning(get_text(self.language.get(), "dialog_ram_detection_error").split("\n")[0], 
+                                  get_text(self.language.get(), "dialog_ram_detection_error", error=str(e)))
+            return 0 # Indicate failure
+
+    def get_available_ram_gb(self):
+        """Gets the RAM that is free right now in Gigabytes (0 if unknown)."""
+        try:
+            return calibration.get_available_ram_gb()
+        except Exception as e:
+            print(f"Error getting available RAM: {e}")
+            return 0
+
+    def get_target_rtf(self):
+        """The user's target real-time factor, falling back to the default on bad input."""
+        try:
+            target_rtf = float(self.target_rtf_var.get())
+        except (tk.TclError, ValueError):
+            return calibration.DEFAULT_TARGET_RTF
+        return target_rtf if target_rtf > 0 else calibration.DEFAULT_TARGET_RTF
+
+    def recommend_model(self, available_ram_gb):
+        """
+        Recommends the most accurate model that fits in the currently available RAM
+        and meets the target real-time factor, using the calibration profile if present.
+        """
+        if not self.available_models:
+             messagebox.showerror(get_text(self.language.get(), "dialog_model_error"), 
+                                get_text(self.language.get(), "dialog_no_whisper_models"))
+             return None
+        if available_ram_gb <= 0:
+            return "tiny" # Default fallback if RAM detection failed
+
+        recommended, reason = calibration.recommend_model(
+            available_ram_gb, os.cpu_count() or 1, self.get_target_rtf(), calibration.load_profile())
+        if recommended not in self.available_models and "tiny" in self.available_models:
+             # Fallback if calculated recommendation isn't actually available
+             recommended = "tiny"
+
+        print(f"Available RAM: {available_ram_gb:.1f} GB, target RTF {self.get_target_rtf():.2f} -> Recommended: {recommended} ({reason})")
+        return recommended
+
+    def _ram_info_text(self, lang):
+        """RAM label text: installed and free RAM plus the current recommendation."""
+        if not self.available_models:
+            return get_text(lang, "ram_info_loading_models", ram_gb=self.system_ram_gb, available_gb=self.available_ram_gb)
+        if self.recommended_model:
+            return get_text(lang, "ram_info_with_recommendation", ram_gb=self.system_ram_gb,
+                            available_gb=self.available_ram_gb, model=self.recommended_model)
+        return get_text(lang, "ram_info_no_recommendation", ram_gb=self.system_ram_gb, available_gb=self.available_ram_gb)
+
+    def refresh_recommendation(self):
+        """Re-reads free RAM and recomputes the recommendation (e.g. after the target RTF changed)."""
+        if not self.available_models:
+            return # _on_model_list_ready makes the first recommendation
+        self.available_ram_gb = self.get_available_ram_gb()
+        self.recommended_model = self.recommend_model(self.available_ram_gb)
+        self.ram_label.config(text=self._ram_info_text(self.language.get()))
+        if self.recommended_model and not (self.is_loading_model or self.is_transcribing):
+            self.status_label.config(text=get_text(self.language.get(), "status_recommended_model", model=self.recommended_model), foreground="blue")
+
+
+    def start_calibration(self):
+        """Measures each model's RSS and speed on this machine in the background."""
+        if self.is_transcribing or self.is_loading_model or self.is_calibrating:
+            messagebox.showwarning(get_text(self.language.get(), "dialog_busy").split(".")[0], 
+                                  get_text(self.language.get(), "dialog_busy"))
+            return
+
+        self.is_calibrating = True
+        self.update_widget_states()
+        self.status_label.config(text=get_text(self.language.get(), "status_calibrating"), foreground="orange")
+        threading.Thread(target=self._calibration_task, daemon=True).start()
+
+    def _calibration_task(self):
+        """Runs the probe in worker processes (background thread)."""
+        try:
+            calibration.calibrate()
+            self.root.after(0, self._on_calibration_done, None)
+        except Exception as e:
+            print(f"Calibration failed: {e}")
+            self.root.after(0, self._on_calibration_done, str(e))
+
+    def _on_calibration_done(self, error_message):
+        """Callback run in the main thread after calibration."""
+        self.is_calibrating = False
+        self.update_widget_states()
+        if error_message:
+            self.status_label.config(text=get_text(self.language.get(), "status_calibration_failed", error=error_message), foreground="red")
+            return
+        self.refresh_recommendation()
+        self.status_label.config(text=get_text(self.language.get(), "status_calibration_done", model=self.recommended_model), foreground="green")
+
+
+    def update_widget_states(self):
+        """Central function to enable/disable widgets based on current state."""
+        lang = self.language.get()
+        
+        # Calibration runs its own processes; keep it exclusive with other work
+        busy = self.is_loading_model or self.is_transcribing or self.is_calibrating or not self.available_models
+        self.calibrate_button.config(state=tk.DISABLED if busy else tk.NORMAL,
+                                     text=get_text(lang, "calibrating" if self.is_calibrating else "calibrate"))
+
+        # Model loading state; the model menu waits so the loaded model matches the selection
+        if not self.available_models:
+            self.load_button.config(state=tk.DISABLED)
+            self.model_option_menu.config(state=tk.DISABLED)
+            self.precision_menu.config(state=tk.DISABLED)
+        elif self.is_loading_model:
+            self.load_button.config(state=tk.DISABLED, text=get_text(lang, "loading"))
+            self.model_option_menu.config(state=tk.DISABLED)
+            self.precision_menu.config(state=tk.DISABLED)
+        else:
+            self.load_button.config(text=get_text(lang, "load_reload_model"), state=tk.NORMAL)
+            self.model_option_menu.config(state=tk.NORMAL)
+            self.precision_menu.config(state=tk.NORMAL)
+
+        # Files can be queued at any time; jobs load their model themselves if needed
+        if self.selected_file_paths and self.selected_model_var.get():
+            self.transcribe_button.config(state=tk.NORMAL)
+        else:
+            self.transcribe_button.config(state=tk.DISABLED)
+
+        self._update_queue_buttons()
+
+
+    def on_model_selection_change(self, selected_model):
+        """Called when the user selects a different model in the OptionMenu."""
+        print(f"Model selection changed to: {selected_model}")
+        # Models still in the cache can be switched to instantly, no reload needed
+        cached_model = self.engine.use_cached_model(selected_model)
+        if cached_model is not None:
+            self._on_model_loaded(cached_model, selected_model)
+            return
+
+        # Otherwise just update status, require user to click "Load/Reload"
+        self.status_label.config(text=get_text(self.language.get(), "status_model_changed", model=selected_model), foreground="blue")
+        self.model = None # Invalidate the currently loaded model (it stays in the cache)
+        self.update_widget_states()
+
+        # Optional: Automatically trigger reload (might be slow/unexpected for user)
+        # self.load_model()
+
+
+    def on_precision_change(self, precision):
+        """Switches the engine's precision; the selected model then needs loading in it, unless cached."""
+        print(f"Precision changed to: {precision}")
+        self.engine.precision = precision
+        self.settings = update_setting("precision", precision)
+        if self.selected_model_var.get():
+            self.on_model_selection_change(self.selected_model_var.get())
+
+    def _update_preset_menu(self, lang):
+        """Preset menu entries in the given language, keeping the chosen preset."""
+        labels = [get_text(lang, f"preset_{name}") for name in PRESETS]
+        self.preset_menu.set_menu(get_text(lang, f"preset_{self.decode_preset}"), *labels)
+
+    def on_preset_change(self, label):
+        lang = self.language.get()
+        self.decode_preset = next(name for name in PRESETS if get_text(lang, f"preset_{name}") == label)
+        self.settings = update_setting("decode_preset", self.decode_preset)
+
+    def _decode_options(self):
+        """Whisper decode options from the preset and the overrides; ValueError if one is invalid."""
+        beam_size = self.beam_size_var.get().strip()
+        language = self.spoken_language_var.get().strip().lower() or "auto"
+        return resolve_decode_options(self.decode_preset, language=language,
+                                      task="translate" if self.translate_var.get() else None,
+                                      beam_size=int(beam_size) if beam_size else None)
+
+    def _selected_output_formats(self):
+        return [name for name in FORMATS if self.output_format_vars[name].get()]
+
+    def _update_output_format_button(self):
+        formats = self._selected_output_formats()
+        self.output_format_button.config(text=", ".join(name.upper() for name in formats) or "-")
+
+    def on_output_formats_change(self):
+        self._update_output_format_button()
+        self.settings = update_setting("output_formats", self._selected_output_formats())
+
+    def on_preload_toggle(self):
+        self.settings = update_setting("preload_on_startup", self.preload_var.get())
+
+    def load_model(self, warm_up=False):
+        """Loads the Whisper model selected in the OptionMenu, optionally followed by a warm-up run."""
+        if self.is_loading_model:
+            return # One interactive load at a time; queued jobs load their own models
+
+        selected_model_name = self.selected_model_var.get()
+        if not selected_model_name:
+             messagebox.showerror(get_text(self.language.get(), "dialog_model_error"), 
+                                get_text(self.language.get(), "dialog_model_error"))
+             return
+
+        self.is_loading_model = True
+        self.model = None # Clear previous model (cached models are reused by the engine)
+        self.update_widget_states()
+        self.status_label.config(text=get_text(self.language.get(), "status_loading_model", model=selected_model_name), foreground="orange")
+        self.root.update_idletasks()
+
+        threading.Thread(target=self._load_model_task, args=(selected_model_name, warm_up), daemon=True).start()
+
+    def _load_model_task(self, model_name, warm_up=False):
+        """The actual model loading task, timing the load and the warm-up separately."""
+        try:
+            load_start = time.time()
+            loaded_model = self.engine.load_model(model_name)
+            load_seconds = time.time() - load_start
+            warmup_seconds = None
+            if warm_up:
+                self.root.after(0, lambda: self.status_label.config(text=get_text(self.language.get(), "status_warming_up", model=model_name)))
+                # A queued job may be decoding with this very model; wait for it rather than share it
+                with self.scheduler.using_model(model_name):
+                    warmup_seconds = self.engine.warm_up()
+                print(f"Model '{model_name}': load {load_seconds:.2f}s, warm-up {warmup_seconds:.2f}s")
+            # Schedule GUI update back on the main thread
+            self.root.after(0, self._on_model_loaded, loaded_model, model_name, load_seconds, warmup_seconds)
+        except Exception as e:
+            # Schedule error message display back on the main thread
+            print(f"Error loading model {model_name}: {e}")
+            self.root.after(0, self._on_model_load_error, str(e), model_name)
+
+    def _on_model_loaded(self, loaded_model, model_name, load_seconds=None, warmup_seconds=None):
+        """Callback run in the main thread after model is loaded."""
+        self.model = loaded_model
+        self.is_loading_model = False
+        if warmup_seconds is not None:
+            self.last_load_seconds = load_seconds
+            self.last_warmup_seconds = warmup_seconds
+            self.status_label.config(text=get_text(self.language.get(), "status_model_loaded_timed", model=model_name,
+                                                   load=load_seconds, warmup=warmup_seconds), foreground="green")
+        else:
+            self.status_label.config(text=get_text(self.language.get(), "status_model_loaded", model=model_name), foreground="green")
+        self.settings = update_setting("last_model", model_name)
+        self.root.title(get_text(self.language.get(), "app_title_with_model", model_name=model_name)) # Update window title
+        self.update_widget_states()
+        print(f"Whisper model '{model_name}' loaded successfully.")
+
+    def _on_model_load_error(self, error_message, model_name):
+        """Callback run in the main thread if model loading fails."""
+        self.model = None
+        self.is_loading_model = False
+        self.status_label.config(text=get_text(self.language.get(), "status_error_loading_model", model=model_name), foreground="red")
+        self.update_widget_states() # Re-enable widgets
+        messagebox.showerror(get_text(self.language.get(), "dialog_model_load_error").split("\n")[0], 
+                             get_text(self.language.get(), "dialog_model_load_error", model=model_name, error=error_message))
+
+
+    def select_file(self):
+        """Opens a file dialog to select one or more audio files."""
+        filetypes = (
+            (get_text(self.language.get(), "file_type_audio"), '*.mp3 *.wav *.m4a *.flac *.ogg *.aac *.opus *.mpga'), # Added mpga
+            (get_text(self.language.get(), "file_type_video"), '*.mp4 *.mov *.avi *.mkv'), # Whisper can often handle video too
+            (get_text(self.language.get(), "file_type_all"), '*.*')
+        )
+        filepaths = filedialog.askopenfilenames(
+            title=get_text(self.language.get(), "file_dialog_title"),
+            filetypes=filetypes
+        )
+        if filepaths:
+            self.selected_file_paths = list(filepaths)
+            if len(filepaths) == 1:
+                self.file_label.config(text=os.path.basename(filepaths[0]), foreground="black")
+            else:
+                self.file_label.config(text=get_text(self.language.get(), "files_selected", count=len(filepaths)), foreground="black")
+            self.status_label.config(text=get_text(self.language.get(), "status_file_selected"), foreground="blue")
+        else:
+            if not self.selected_file_paths: # Only reset if no file was previously selected
+                 self.file_label.config(text=get_text(self.language.get(), "no_file_selected"), foreground="grey")
+                 if self.model:
+                     self.status_label.config(text=get_text(self.language.get(), "status_model_loaded_select_file", model=self.selected_model_var.get()), foreground="blue")
+                 else:
+                     self.status_label.config(text=get_text(self.language.get(), "status_load_model_or_select_file"), foreground="blue")
+
+        self.update_widget_states() # Update button states based on file selection
+
+
+    def start_transcription_thread(self):
+        """Adds every selected file to the job queue with the selected model."""
+        if not self.selected_file_paths:
+            messagebox.showwarning(get_text(self.language.get(), "dialog_no_file").split(".")[0],
+                                  get_text(self.language.get(), "dialog_no_file"))
+            return
+        model_name = self.selected_model_var.get()
+        if not model_name:
+             messagebox.showerror(get_text(self.language.get(), "dialog_model_error"),
+                                get_text(self.language.get(), "dialog_model_error"))
+             return
+
+        self.settings = update_setting("last_model", model_name)
+
+        # Read Tk variables here, the worker threads must not touch them
+        stream = self.stream_var.get()
+        try:
+            options = self._decode_options()
+        except ValueError as e:
+            messagebox.showerror(get_text(self.language.get(), "dialog_invalid_decode_option"), str(e))
+            return
+        if self.vad_var.get():
+            options["vad"] = True
+        self.settings = update_setting("spoken_language", options.get("language", "auto"))
+        self.settings = update_setting("translate", self.translate_var.get())
+        output_formats = self._selected_output_formats()
+        for file_path in self.selected_file_paths:
+            output_base = None
+            if self.save_output_var.get() and output_formats:
+                output_base = get_output_base(file_path) # Next to the audio file
+            print(f"Queueing transcription for: {file_path}")
+            job = self.scheduler.submit(file_path, model_name, options=options, output_base=output_base,
+                                        precision=self.engine.precision, output_formats=output_formats)
+            self.job_streams[job.id] = stream
+        self._poll_jobs(reschedule=False) # Show the new jobs right away
+
+    # --- Job queue (all of this runs in the main thread) ---
+
+    def _update_queue_texts(self, lang):
+        """Queue panel headings and buttons in the given language."""
+        for column in ("file", "model", "status", "progress"):
+            self.job_tree.heading(column, text=get_text(lang, f"column_{column}"))
+        self.move_up_button.config(text=get_text(lang, "job_move_up"))
+        self.move_down_button.config(text=get_text(lang, "job_move_down"))
+        self.run_next_button.config(text=get_text(lang, "job_run_next"))
+        self.cancel_job_button.config(text=get_text(lang, "job_cancel"))
+        self.clear_finished_button.config(text=get_text(lang, "clear_finished"))
+
+    def _selected_job(self):
+        selection = self.job_tree.selection()
+        return self.scheduler.get(int(selection[0])) if selection else None
+
+    def _update_queue_buttons(self):
+        """Reorder buttons need a queued job, cancel needs an unfinished one."""
+        job = self._selected_job()
+        queued_state = tk.NORMAL if job is not None and job.status == QUEUED else tk.DISABLED
+        for button in (self.move_up_button, self.move_down_button, self.run_next_button):
+            button.config(state=queued_state)
+        self.cancel_job_button.config(state=tk.NORMAL if job is not None and not job.is_finished else tk.DISABLED)
+
+    def move_selected_job(self, offset):
+        job = self._selected_job()
+        if job is not None and self.scheduler.move(job.id, offset):
+            self._refresh_job_tree(self.scheduler.jobs())
+
+    def run_selected_job_next(self):
+        job = self._selected_job()
+        if job is not None and self.scheduler.prioritise(job.id):
+            self._refresh_job_tree(self.scheduler.jobs())
+
+    def cancel_selected_job(self):
+        job = self._selected_job()
+        if job is not None:
+            self.scheduler.cancel(job.id)
+            self._poll_jobs(reschedule=False)
+
+    def clear_finished_jobs(self):
+        self.scheduler.clear_finished()
+        self._refresh_job_tree(self.scheduler.jobs())
+
+    def on_job_selected(self, event=None):
+        """Shows the transcript of the job selected in the queue panel."""
+        job = self._selected_job()
+        if job is not None:
+            self._show_job(job)
+        self._update_queue_buttons()
+
+    def _refresh_job_tree(self, jobs):
+        """Brings the queue panel in line with the scheduler's jobs, in display order."""
+        lang = self.language.get()
+        wanted = {str(job.id) for job in jobs}
+        for iid in self.job_tree.get_children():
+            if iid not in wanted:
+                self.job_tree.delete(iid)
+        for index, job in enumerate(jobs):
+            model_text = job.model_name if job.precision == DEFAULT_PRECISION else f"{job.model_name} ({job.precision})"
+            if job.model_name != job.requested_model:
+                model_text = get_text(lang, "job_model_downgraded", model=model_text, requested=job.requested_model)
+            values = (os.path.basename(job.file_path), model_text,
+                      get_text(lang, f"job_status_{job.status}"), f"{job.progress * 100:.0f}%")
+            iid = str(job.id)
+            if self.job_tree.exists(iid):
+                if tuple(self.job_tree.item(iid, "values")) != values:
+                    self.job_tree.item(iid, values=values)
+                self.job_tree.move(iid, "", index)
+            else:
+                self.job_tree.insert("", index, iid=iid, values=values)
+
+    def _poll_jobs(self, reschedule=True):
+        """Refreshes the queue panel, the shown transcript and the status line."""
+        jobs = self.scheduler.jobs()
+        self._refresh_job_tree(jobs)
+
+        for job in jobs:
+            # Follow a newly started job unless the user is watching another running one
+            if job.started_at is not None and job.id not in self.started_job_ids:
+                self.started_job_ids.add(job.id)
+                shown_job = self.scheduler.get(self.shown_job_id) if self.shown_job_id else None
+                if shown_job is None or shown_job.status != RUNNING:
+                    self.job_tree.selection_set(str(job.id))
+                    self._show_job(job)
+        self._update_shown_job()
+
+        counts = self.scheduler.counts()
+        if counts != self.last_job_counts:
+            if sum(counts) > 0:
+                self.status_label.config(text=get_text(self.language.get(), "status_queue", running=counts[0], queued=counts[1]), foreground="orange")
+            self.last_job_counts = counts
+            self.update_widget_states() # Calibration is only allowed while the queue is idle
+
+        for job in jobs:
+            if job.is_finished and job.id not in self.reported_job_ids:
+                self.reported_job_ids.add(job.id)
+                self._report_finished_job(job)
+
+        self._update_queue_buttons()
+        if reschedule:
+            self.root.after(QUEUE_POLL_MS, self._poll_jobs)
+
+    def _show_job(self, job):
+        """Puts a job's transcript (so far) in the text area and keeps following it."""
+        if job.id == self.shown_job_id:
+            return
+        self.shown_job_id = job.id
+        self.shown_segment_count = 0
+        self.shown_job_final = False
+        self._set_output_text(get_text(self.language.get(), "job_waiting" if job.status == QUEUED else "transcription_in_progress", model=job.model_name))
+        self._update_shown_job()
+        self._update_profile_panel()
+
+    def _update_shown_job(self):
+        """Appends newly decoded segments of the shown job, or its final text or error."""
+        job = self.scheduler.get(self.shown_job_id) if self.shown_job_id else None
+        if job is None or self.shown_job_final:
+            return
+        start = time.perf_counter()
+        shown_before = self.shown_segment_count
+        self._render_shown_job(job)
+        if self.shown_segment_count != shown_before or self.shown_job_final:
+            # Only refreshes that rendered something, so idle polls don't grow the trace
+            job.trace.add_span(GUI_UPDATE, start, time.perf_counter())
+        if self.shown_job_final:
+            self._update_profile_panel()
+
+    def _render_shown_job(self, job):
+        if job.status == FAILED:
+            self._set_output_text(get_text(self.language.get(), "transcription_error", error=job.error))
+            self.shown_job_final = True
+            return
+        if job.status == DONE and not self.job_streams.get(job.id, True):
+            if job.result["segments"]:
+                self.transcript_view.set_segments(job.result["segments"], timestamps=False)
+            else:
+                self._set_output_text(job.result["text"])
+            self.shown_job_final = True
+            return
+        if not self.job_streams.get(job.id, True):
+            return
+
+        # Segments are only ever appended by the worker, so a slice is a consistent snapshot.
+        # Read the status first so segments added just before the job finished are not missed.
+        finished = job.is_finished
+        new_segments = job.segments[self.shown_segment_count:self.shown_segment_count + MAX_SEGMENTS_PER_POLL]
+        if new_segments:
+            if self.shown_segment_count == 0:
+                # Replace the "in progress" placeholder with the first batch
+                self.transcript_view.clear(timestamps=True)
+            self.transcript_view.append_segments(new_segments)
+            self.shown_segment_count += len(new_segments)
+        # A cached job may have more segments than one refresh hands over
+        self.shown_job_final = finished and self.shown_segment_count == len(job.segments)
+
+    def _set_output_text(self, text):
+        self.transcript_view.show_message(text)
+
+    def _update_profile_panel(self):
+        """Shows the time per stage, peak RSS and CPU use of the shown job once it is done."""
+        lang = self.language.get()
+        job = self.scheduler.get(self.shown_job_id) if self.shown_job_id else None
+        if job is None or job.status != DONE:
+            self.profile_label.config(text=get_text(lang, "profile_none"))
+            self.export_trace_button.config(state=tk.DISABLED)
+            return
+        summary = format_summary(job.trace.summary(),
+                                 stage_label=lambda name: get_text(lang, "stage_" + name.replace(" ", "_")))
+        self.profile_label.config(text=f"{get_text(lang, 'profile')} {summary}")
+        self.export_trace_button.config(state=tk.NORMAL)
+
+    def export_trace(self):
+        """Saves the shown job's trace as Chrome trace JSON (chrome://tracing, ui.perfetto.dev)."""
+        lang = self.language.get()
+        job = self.scheduler.get(self.shown_job_id) if self.shown_job_id else None
+        if job is None:
+            return
+        path = filedialog.asksaveasfilename(
+            title=get_text(lang, "export_trace_title"),
+            defaultextension=".json",
+            initialfile=os.path.splitext(os.path.basename(job.file_path))[0] + ".trace.json",
+            filetypes=((get_text(lang, "file_type_trace"), '*.json'), (get_text(lang, "file_type_all"), '*.*'))
+        )
+        if not path:
+            return
+        try:
+            job.trace.save(path)
+        except OSError as e:
+            messagebox.showerror(get_text(lang, "export_trace"), get_text(lang, "dialog_trace_error", error=e))
+            return
+        self.status_label.config(text=get_text(lang, "status_trace_saved", path=path), foreground="green")
+
+    def find_in_transcript(self):
+        query = self.find_var.get().strip()
+        if query and not self.transcript_view.find_next(query):
+            self.status_label.config(text=get_text(self.language.get(), "status_not_found", query=query), foreground="orange")
+
+    def go_to_time(self):
+        """Scrolls the transcript to the segment playing at the entered time ([HH:]MM:SS or seconds)."""
+        try:
+            seconds = 0.0
+            for part in self.go_to_time_var.get().strip().split(":"):
+                seconds = seconds * 60 + float(part)
+        except ValueError:
+            self.status_label.config(text=get_text(self.language.get(), "status_invalid_time"), foreground="orange")
+            return
+        self.transcript_view.jump_to_time(seconds)
+
+    def _report_finished_job(self, job):
+        """Status line update for a job that just finished."""
+        lang = self.language.get()
+        if job.status == DONE:
+            self.last_elapsed_time = job.result["elapsed_time"]
+            self.last_time_to_first_text = job.result.get("time_to_first_segment")
+            self.last_vad_stats = dict(job.result["vad"], audio_duration=job.result["audio_duration"]) if "vad" in job.result else None
+            self.last_fallbacks = job.result.get("fallbacks", 0)
+            self.last_resumed_seconds = job.result.get("resumed_seconds")
+            if self.last_time_to_first_text is not None:
+                print(f"Time to first text: {self.last_time_to_first_text:.2f}s")
+            self.status_label.config(text=self._completion_status_text(lang), foreground="green")
+        elif job.status == FAILED:
+            self.status_label.config(text=get_text(lang, "status_transcription_failed"), foreground="red")
+        elif job.status == CANCELLED:
+            self.last_cancelled_file = os.path.basename(job.file_path)
+            self.status_label.config(text=get_text(lang, "status_job_cancelled", file=self.last_cancelled_file), foreground="orange")
+
+    def _completion_status_text(self, lang):
+        """Status text for the last finished transcription in the given language."""
+        if self.last_time_to_first_text is not None:
+            text = get_text(lang, "status_transcription_complete_streamed",
+                            time=self.last_elapsed_time, first=self.last_time_to_first_text)
+        else:
+            text = get_text(lang, "status_transcription_complete", time=self.last_elapsed_time)
+        text += get_text(lang, "status_cache_stats", **get_transcript_cache().stats())
+        if self.last_vad_stats and self.last_vad_stats["audio_duration"] > 0:
+            stats = self.last_vad_stats
+            speedup = stats["audio_duration"] / stats["speech_seconds"] if stats["speech_seconds"] else float("inf")
+            text += get_text(lang, "status_vad_stats", skipped=format_timestamp(stats["skipped_seconds"]),
+                             percent=stats["skipped_seconds"] / stats["audio_duration"] * 100, speedup=speedup)
+        if self.last_fallbacks:
+            text += get_text(lang, "status_fallbacks", count=self.last_fallbacks)
+        if self.last_resumed_seconds:
+            text += get_text(lang, "status_resumed", time=format_timestamp(self.last_resumed_seconds))
+        return text
+
+
+# --- Startup measurement ---
+def measure_startup(root, app, budget_seconds=None):
+    """
+    Prints how long this module's imports took, when the window was first drawn
+    and when the app became interactive (model list filled in), all measured from
+    process start, then closes the app. Returns the process exit code: 1 if the
+    time to interactive is over budget_seconds.
+    """
+    process_started = psutil.Process().create_time()
+    root.update() # Draw the window now instead of waiting for mainloop
+    window_seconds = time.time() - process_started
+    heavy_imports_deferred = "torch" not in sys.modules and "whisper" not in sys.modules
+    outcome = {"exit_code": 0}
+
+    def check_interactive():
+        if app.models_ready_at is None:
+            root.after(10, check_interactive)
+            return
+        interactive_seconds = app.models_ready_at - process_started
+        print(f"Module imports:      {IMPORT_SECONDS:.3f}s")
+        print(f"Window shown:        {window_seconds:.3f}s after process start")
+        print(f"Interactive:         {interactive_seconds:.3f}s after process start")
+        print(f"whisper/torch deferred until after the window: {'yes' if heavy_imports_deferred else 'no'}")
+        if budget_seconds is not None:
+            within_budget = interactive_seconds <= budget_seconds
+            print(f"Budget {budget_seconds:.2f}s: {'OK' if within_budget else 'EXCEEDED'}")
+            outcome["exit_code"] = 0 if within_budget else 1
+        root.destroy()
+
+    check_interactive()
+    root.mainloop()
+    return outcome["exit_code"]
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Whisper transcription GUI.")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Print import time, time to window and time to interactive, then exit")
+    parser.add_argument("--startup-budget", type=float, default=None,
+                        help="With --measure-startup, exit with status 1 if time to interactive exceeds this many seconds")
+    return parser
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    root = tk.Tk()
+    # Optional: Apply a theme for a slightly more modern look on macOS
+    style = ttk.Style(root)
+    try:
+        # 'aqua' is the default macOS theme and usually works well
+        style.theme_use('aqua')
+    except tk.TclError:
+        print(get_text("en", "theme_not_available")) # Use English for console messages
+
+    app = WhisperGUI(root)
+    if args.measure_startup:
+        sys.exit(measure_startup(root, app, args.startup_budget))
     root.mainloop()
\ No newline at end of file
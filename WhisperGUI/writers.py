@@ -0,0 +1,198 @@
+# writers.py
+# Transcript files (plain text, SRT, WebVTT, JSON, TSV) written while segments are decoded.
+#
+# Each writer appends a segment to its file as soon as it arrives and keeps
+# nothing else in memory, so a ten-hour recording costs no more than a short
+# clip. Files are written under a temporary name and renamed into place when
+# the transcript is complete: a crash or a cancelled job never leaves a
+# truncated transcript behind, and an earlier complete one is kept.
+
+import itertools
+import json
+import os
+
+FORMATS = ("txt", "srt", "vtt", "json", "tsv")
+DEFAULT_FORMATS = ("txt",)
+
+# Numbers the temp files of this process; next() on a count is atomic under the GIL
+_temp_ids = itertools.count()
+
+
+def format_subtitle_timestamp(seconds, decimal_marker=","):
+    """HH:MM:SS,mmm as used by SRT (WebVTT uses a '.' before the milliseconds)."""
+    milliseconds = max(0, round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+class SegmentWriter:
+    """Base class: one output file, written segment by segment and renamed into place by close()."""
+
+    extension = None
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # A fresh name every time: jobs for the same file on different models, in one
+        # process or several, may be writing the same transcript at once
+        self._temp_path = f"{path}.{os.getpid()}.{next(_temp_ids)}.tmp"
+        self._file = open(self._temp_path, "x", encoding="utf-8", newline="\n")
+        self.write_header()
+
+    def write_header(self):
+        pass
+
+    def write_footer(self, language):
+        pass
+
+    def _write_segment(self, segment):
+        raise NotImplementedError
+
+    def write_segment(self, segment):
+        self._write_segment(segment)
+        self.count += 1
+        self._file.flush() # Readable by a tail -f while decoding goes on; nothing accumulates in Python
+
+    def close(self, language=None):
+        """Finishes the file and atomically replaces any previous transcript at path."""
+        if self._file.closed:
+            return
+        self.write_footer(language)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        """Drops the partial file; an existing transcript at path is left alone."""
+        if self._file.closed:
+            return
+        self._file.close()
+        try:
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+
+class TextWriter(SegmentWriter):
+    extension = "txt"
+
+    def _write_segment(self, segment):
+        self._file.write(segment["text"].strip() + "\n")
+
+
+class SRTWriter(SegmentWriter):
+    extension = "srt"
+
+    def _write_segment(self, segment):
+        self._file.write(f"{self.count + 1}\n"
+                         f"{format_subtitle_timestamp(segment['start'])} --> "
+                         f"{format_subtitle_timestamp(segment['end'])}\n"
+                         f"{segment['text'].strip().replace('-->', '->')}\n\n")
+
+
+class VTTWriter(SegmentWriter):
+    extension = "vtt"
+
+    def write_header(self):
+        self._file.write("WEBVTT\n\n")
+
+    def _write_segment(self, segment):
+        self._file.write(f"{format_subtitle_timestamp(segment['start'], '.')} --> "
+                         f"{format_subtitle_timestamp(segment['end'], '.')}\n"
+                         f"{segment['text'].strip().replace('-->', '->')}\n\n")
+
+
+class TSVWriter(SegmentWriter):
+    """Start and end in integer milliseconds, like Whisper's own TSV output."""
+
+    extension = "tsv"
+
+    def write_header(self):
+        self._file.write("start\tend\ttext\n")
+
+    def _write_segment(self, segment):
+        text = " ".join(segment["text"].split()) # Tabs and newlines would break the columns
+        self._file.write(f"{round(segment['start'] * 1000)}\t{round(segment['end'] * 1000)}\t{text}\n")
+
+
+class JSONWriter(SegmentWriter):
+    """
+    {"segments": [...], "language": ...}, one segment per line. The full text
+    is left out: it is the segments' texts joined, and collecting it would
+    hold the whole transcript in memory.
+    """
+
+    extension = "json"
+
+    def write_header(self):
+        self._file.write('{"segments": [\n')
+
+    def _write_segment(self, segment):
+        if self.count:
+            self._file.write(",\n")
+        self._file.write(json.dumps(segment, ensure_ascii=False))
+
+    def write_footer(self, language):
+        self._file.write(f'\n], "language": {json.dumps(language)}}}\n')
+
+
+WRITERS = {writer.extension: writer for writer in (TextWriter, SRTWriter, VTTWriter, JSONWriter, TSVWriter)}
+
+
+def get_output_base(file_path, output_dir=None):
+    """Output path without extension: <output_dir or the input's folder>/<input name>."""
+    target_dir = output_dir or os.path.dirname(os.path.abspath(file_path))
+    return os.path.join(target_dir, os.path.splitext(os.path.basename(file_path))[0])
+
+
+class TranscriptWriter:
+    """
+    Writes one transcript in several formats at once, to <base_path>.<format>.
+    Use write_segment as a transcribe() on_segment callback, then close(); as a
+    context manager, an exception aborts every file instead.
+    """
+
+    def __init__(self, base_path, formats=DEFAULT_FORMATS):
+        unknown = [name for name in formats if name not in WRITERS]
+        if unknown:
+            raise ValueError(f"Unknown output format(s) {', '.join(unknown)}, expected {', '.join(FORMATS)}")
+        self.writers = []
+        try:
+            for name in dict.fromkeys(formats): # Once each, in the order given
+                self.writers.append(WRITERS[name](f"{base_path}.{name}"))
+        except OSError:
+            self.abort()
+            raise
+
+    @property
+    def paths(self):
+        return [writer.path for writer in self.writers]
+
+    def write_segment(self, segment):
+        for writer in self.writers:
+            writer.write_segment(segment)
+
+    def write_segments(self, segments):
+        for segment in segments:
+            self.write_segment(segment)
+
+    def close(self, language=None):
+        for writer in self.writers:
+            writer.close(language)
+
+    def abort(self):
+        for writer in self.writers:
+            writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()